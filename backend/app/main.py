@@ -4,7 +4,8 @@ Complete backend API handling ML inference, data persistence, and configuration
 """
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, status, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
@@ -22,6 +23,7 @@ from app.services import helmet_service
 from app.services import loitering_service
 from app.services import production_counter_service
 from app.services import attendance_service
+from services.clock import now_iso, start_clock
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,7 +31,8 @@ app = FastAPI(
     description="AI-powered factory safety monitoring with helmet detection, loitering detection, production counting, and attendance tracking",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Thread pool for concurrent ML inference
@@ -44,6 +47,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses (diagnostic/system-info/stats polling); small bodies
+# aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
 # --- DATA STORAGE PATHS ---
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
@@ -159,7 +166,7 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "timestamp": now_iso()}
 
 # --- HELMET DETECTION ENDPOINTS ---
 
@@ -173,7 +180,7 @@ def get_helmet_status():
         "violationCount": 0
     }
 
-@app.post("/api/live/helmet/", response_model=HelmetDetectionResponse)
+@app.post("/api/live/helmet/", responses={200: {"model": HelmetDetectionResponse}})
 async def helmet_detection_live(frame_data: FrameData):
     """Process webcam frame for helmet detection"""
     try:
@@ -209,13 +216,14 @@ async def helmet_detection_live(frame_data: FrameData):
                 result
             )
         
-        return HelmetDetectionResponse(
-            timestamp=datetime.now(),
-            totalPeople=result['totalPeople'],
-            compliantCount=result['compliantCount'],
-            violationCount=result['violationCount'],
-            complianceRate=compliance_rate
-        )
+        return ORJSONResponse({
+            "id": None,
+            "timestamp": datetime.now(),
+            "totalPeople": result['totalPeople'],
+            "compliantCount": result['compliantCount'],
+            "violationCount": result['violationCount'],
+            "complianceRate": compliance_rate
+        })
         
     except Exception as e:
         log_system_event("helmet", "error", f"Helmet detection error: {str(e)}")
@@ -244,7 +252,7 @@ def get_loitering_status():
     """Get current loitering detection status"""
     return {"activeGroups": 0, "totalPeople": 0}
 
-@app.post("/api/live/loitering/", response_model=LoiteringDetectionResponse)
+@app.post("/api/live/loitering/", responses={200: {"model": LoiteringDetectionResponse}})
 async def loitering_detection_live(frame_data: FrameData):
     """Process webcam frame for loitering detection"""
     try:
@@ -276,12 +284,13 @@ async def loitering_detection_live(frame_data: FrameData):
                 result
             )
         
-        return LoiteringDetectionResponse(
-            timestamp=datetime.now(),
-            activeGroups=result['activeGroups'],
-            totalPeople=result.get('totalPeople', 0),
-            alertTriggered=alert_triggered
-        )
+        return ORJSONResponse({
+            "id": None,
+            "timestamp": datetime.now(),
+            "activeGroups": result['activeGroups'],
+            "totalPeople": result.get('totalPeople', 0),
+            "alertTriggered": alert_triggered
+        })
         
     except Exception as e:
         log_system_event("loitering", "error", f"Loitering detection error: {str(e)}")
@@ -304,7 +313,7 @@ def get_production_counting_status():
     """Get current production count"""
     return {"itemCount": production_counter_service.production_count}
 
-@app.post("/api/live/production/", response_model=ProductionCounterResponse)
+@app.post("/api/live/production/", responses={200: {"model": ProductionCounterResponse}})
 async def production_counter_live(frame_data: FrameData):
     """Process webcam frame for production counting"""
     try:
@@ -324,11 +333,12 @@ async def production_counter_live(frame_data: FrameData):
         }
         save_json_data("production_counts.json", counter_record)
         
-        return ProductionCounterResponse(
-            timestamp=datetime.now(),
-            itemCount=result['itemCount'],
-            sessionDate=date.today()
-        )
+        return ORJSONResponse({
+            "id": None,
+            "timestamp": datetime.now(),
+            "itemCount": result['itemCount'],
+            "sessionDate": date.today()
+        })
         
     except Exception as e:
         log_system_event("production", "error", f"Production counter error: {str(e)}")
@@ -369,7 +379,7 @@ def get_attendance_status_simple():
         "attendanceLog": []
     }
 
-@app.post("/api/live/attendance/", response_model=AttendanceResponse)
+@app.post("/api/live/attendance/", responses={200: {"model": AttendanceResponse}})
 async def attendance_system_live(frame_data: FrameData):
     """Process webcam frame for attendance/face recognition"""
     try:
@@ -381,12 +391,12 @@ async def attendance_system_live(frame_data: FrameData):
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
         
-        return AttendanceResponse(
-            timestamp=datetime.now(),
-            verifiedCount=result['verifiedCount'],
-            lastPersonSeen=result['lastPersonSeen'],
-            attendanceLog=result['attendanceLog']
-        )
+        return ORJSONResponse({
+            "timestamp": datetime.now(),
+            "verifiedCount": result['verifiedCount'],
+            "lastPersonSeen": result['lastPersonSeen'],
+            "attendanceLog": result['attendanceLog']
+        })
         
     except Exception as e:
         log_system_event("attendance", "error", f"Attendance system error: {str(e)}")
@@ -414,7 +424,7 @@ def list_employees():
 def create_employee(employee: Employee):
     """Create new employee"""
     employees = load_json_data("employees.json")
-    employee_dict = employee.dict()
+    employee_dict = employee.model_dump()
     employee_dict["id"] = len(employees) + 1
     employee_dict["created_at"] = datetime.now().isoformat()
     save_json_data("employees.json", employee_dict)
@@ -504,6 +514,7 @@ def get_loitering_violations():
 @app.on_event("startup")
 async def startup_event():
     """Initialize system on startup"""
+    start_clock()
     print("=" * 60)
     print("Factory Safety Detection System - FastAPI Backend")
     print("=" * 60)
@@ -525,6 +536,10 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        reload=os.getenv("UVICORN_RELOAD", "").lower() in ("1", "true", "yes"),
+        workers=1,  # production counter / loitering state is per process
+        loop="auto",
+        http="auto",
+        log_level="info",
+        access_log=False
     )
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Micro-batching for model inference.
+
+Concurrent callers (the ML worker threads in ml_views) each submit one frame;
+a single background thread gathers whatever arrives within a short window and
+runs one batched forward pass, then hands each caller its own result.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item calls into batched calls."""
+
+    def __init__(self, predict_batch, max_batch=8, max_wait=0.005, name="MicroBatcher"):
+        """
+        Args:
+            predict_batch: callable taking a list of items, returning a list of
+                results in the same order
+            max_batch: Largest batch handed to predict_batch
+            max_wait: Seconds to wait for more items after the first arrives
+        """
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """Queue one item and block until its result is ready."""
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.predict_batch(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
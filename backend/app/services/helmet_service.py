@@ -3,6 +3,8 @@ from ultralytics import YOLO
 from pathlib import Path
 import os
 
+from app.services.batching import MicroBatcher
+
 # --- CONFIGURATION ---
 # Get absolute path to models directory
 BASE_DIR = Path(__file__).parent.parent.parent
@@ -20,6 +22,22 @@ except Exception as e:
     print(f"FATAL ERROR: Could not load helmet model from {MODEL_WEIGHTS_PATH}: {e}")
     model = None
 
+
+def _predict_batch(frames):
+    """One forward pass over every frame gathered by the batcher"""
+    return model.predict(
+        source=frames, 
+        conf=CONFIDENCE_THRESHOLD, 
+        verbose=False, 
+        device='cpu',
+        imgsz=640,  # Optimal for accuracy/speed balance
+        half=False,  # Set to True if using GPU
+        max_det=50   # Limit detections for performance
+    )
+
+# Concurrent requests (ml_views runs 4 ML workers) share batched forward passes
+batcher = MicroBatcher(_predict_batch, name="HelmetBatcher") if model is not None else None
+
 # Don't open camera on startup - it will block browser access!
 # Camera will be accessed via frames sent from frontend
 
@@ -39,16 +57,8 @@ def get_helmet_detection_status(frame=None):
     if frame is None:
         return {"error": "No frame provided."}
     
-    # Run inference with optimized parameters for speed
-    results = model.predict(
-        source=frame, 
-        conf=CONFIDENCE_THRESHOLD, 
-        verbose=False, 
-        device='cpu',
-        imgsz=640,  # Optimal for accuracy/speed balance
-        half=False,  # Set to True if using GPU
-        max_det=50   # Limit detections for performance
-    )[0]
+    # Run inference (batched with any other frames submitted concurrently)
+    results = batcher.submit(frame)
 
     # --- CHANGED LOGIC: Count detections instead of drawing ---
     
@@ -6,6 +6,7 @@ Schemas for all 4 modules: Identity, Vehicle, Attendance, Occupancy
 from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from datetime import datetime
 import os
 
@@ -15,7 +16,22 @@ DATABASE_URL = os.getenv(
     'sqlite:///./factory_ai.db'  # Default: SQLite for development
 )
 
-engine = create_engine(DATABASE_URL, echo=False)
+if DATABASE_URL.startswith('sqlite'):
+    engine = create_engine(DATABASE_URL, echo=False)
+elif os.getenv('DB_USE_PGBOUNCER', '').lower() in ('1', 'true', 'yes'):
+    # PgBouncer already multiplexes server connections; a client-side pool
+    # on top of it just pins bouncer slots
+    engine = create_engine(DATABASE_URL, echo=False, poolclass=NullPool)
+else:
+    # Handlers run sync DB work in worker threads (asyncio.to_thread), so size
+    # the pool for concurrent checkouts rather than one-at-a-time use
+    engine = create_engine(
+        DATABASE_URL,
+        echo=False,
+        pool_size=int(os.getenv('DB_POOL_SIZE', '10')),
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        pool_pre_ping=True,
+    )
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
 
@@ -444,7 +444,7 @@ async def create_shift(
         Created shift details
     """
     try:
-        shift_data = request.dict()
+        shift_data = request.model_dump()
         shift = ShiftDAO.create(session, shift_data)
         
         return ShiftResponse(
@@ -550,7 +550,7 @@ async def create_department(
         Created department details
     """
     try:
-        dept_data = request.dict()
+        dept_data = request.model_dump()
         dept = DepartmentDAO.create(session, dept_data)
         
         return DepartmentResponse(
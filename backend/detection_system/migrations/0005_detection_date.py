@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:11
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_dates(apps, schema_editor):
+    """Set the new date column from each existing row's timestamp."""
+    for model_name in ("HelmetDetection", "LoiteringDetection"):
+        model = apps.get_model("detection_system", model_name)
+        batch = []
+        for row in model.objects.only("id", "timestamp").iterator(chunk_size=1000):
+            row.date = timezone.localdate(row.timestamp)
+            batch.append(row)
+            if len(batch) == 1000:
+                model.objects.bulk_update(batch, ["date"])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ["date"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("detection_system", "0004_remove_unknownattendance_image_path_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="helmetdetection",
+            name="date",
+            field=models.DateField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="loiteringdetection",
+            name="date",
+            field=models.DateField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_dates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="helmetdetection",
+            index=models.Index(
+                fields=["date", "violation_count"], name="helmet_dete_date_26fe2d_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="loiteringdetection",
+            index=models.Index(
+                fields=["date", "alert_triggered"], name="loitering_d_date_71991c_idx"
+            ),
+        ),
+    ]
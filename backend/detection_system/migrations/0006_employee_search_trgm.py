@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# icontains compiles to UPPER(col::text) LIKE UPPER(%s) on PostgreSQL, so the
+# trigram index is built over the same expressions to be usable by search.
+CREATE_TRGM_INDEX = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS employees_search_trgm ON employees USING gin (
+    UPPER(first_name::text) gin_trgm_ops,
+    UPPER(last_name::text) gin_trgm_ops,
+    UPPER(employee_id::text) gin_trgm_ops
+);
+"""
+
+DROP_TRGM_INDEX = "DROP INDEX IF EXISTS employees_search_trgm;"
+
+
+def create_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_TRGM_INDEX)
+
+
+def drop_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_TRGM_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("detection_system", "0005_detection_date"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_index, drop_trgm_index),
+    ]
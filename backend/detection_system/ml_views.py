@@ -3,8 +3,6 @@ ML Service Integration Views - OPTIMIZED
 These views connect the ML detection services with Django models to persist data.
 Uses threading for concurrent request handling to prevent UI freezing.
 """
-import cv2
-import numpy as np
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
@@ -33,6 +31,8 @@ from .serializers import (
     ProductionCounterSerializer, AttendanceRecordSerializer
 )
 
+from services.image_codec import decode_base64_image
+
 # Import ML services
 try:
     from app.services.helmet_service import get_helmet_detection_status
@@ -92,10 +92,7 @@ def helmet_detection_live(request):
                           status=status.HTTP_400_BAD_REQUEST)
         
         # Decode frame (assuming base64 encoding from frontend)
-        import base64
-        frame_bytes = base64.b64decode(frame_data.split(',')[1] if ',' in frame_data else frame_data)
-        nparr = np.frombuffer(frame_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        frame = decode_base64_image(frame_data)
         
         # Run ML detection in thread pool (non-blocking)
         result = run_ml_inference(get_helmet_detection_status, frame)
@@ -154,10 +151,7 @@ def loitering_detection_live(request):
                           status=status.HTTP_400_BAD_REQUEST)
         
         # Decode frame
-        import base64
-        frame_bytes = base64.b64decode(frame_data.split(',')[1] if ',' in frame_data else frame_data)
-        nparr = np.frombuffer(frame_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        frame = decode_base64_image(frame_data)
         
         # Run ML detection in thread pool (non-blocking)
         result = run_ml_inference(get_loitering_status, frame)
@@ -217,10 +211,7 @@ def production_counter_live(request):
                           status=status.HTTP_400_BAD_REQUEST)
         
         # Decode frame
-        import base64
-        frame_bytes = base64.b64decode(frame_data.split(',')[1] if ',' in frame_data else frame_data)
-        nparr = np.frombuffer(frame_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        frame = decode_base64_image(frame_data)
         
         # Run ML detection in thread pool (non-blocking)
         result = run_ml_inference(get_production_count, frame)
@@ -292,10 +283,7 @@ def attendance_system_live(request):
                           status=status.HTTP_400_BAD_REQUEST)
         
         # Decode frame
-        import base64
-        frame_bytes = base64.b64decode(frame_data.split(',')[1] if ',' in frame_data else frame_data)
-        nparr = np.frombuffer(frame_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        frame = decode_base64_image(frame_data)
         
         # Run ML detection in thread pool (non-blocking)
         result = run_ml_inference(get_attendance_status, frame)
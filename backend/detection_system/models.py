@@ -46,10 +46,31 @@ class ModuleConfiguration(models.Model):
 
     def __str__(self):
         return f"{self.module_name} (enabled={self.enabled})"
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Q, Sum
 from django.utils import timezone
 
 
+# Per-model write counter, bumped by the post_save/post_delete signals. The stats
+# ETags include it, so an in-place edit that keeps the newest timestamp and the
+# row count unchanged still invalidates clients' cached copies.
+MODEL_VERSION_CACHE_KEY = 'model:version:{}'
+
+
+def get_model_version(model):
+    return cache.get(MODEL_VERSION_CACHE_KEY.format(model._meta.label_lower), 0)
+
+
+def bump_model_version(model):
+    key = MODEL_VERSION_CACHE_KEY.format(model._meta.label_lower)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No counter yet (first write, or evicted); any value differs from the 0 default
+        cache.set(key, 1, None)
+
+
 class HelmetDetection(models.Model):
     """Model to store helmet detection data"""
     timestamp = models.DateTimeField(default=timezone.now, db_index=True)
@@ -58,12 +79,14 @@ class HelmetDetection(models.Model):
     violation_count = models.IntegerField(default=0)
     compliance_rate = models.FloatField(default=0.0)
     frame_data = models.JSONField(null=True, blank=True)  # Store detection details
+    date = models.DateField(default=timezone.now)  # Local date of timestamp, for per-day stats
     
     class Meta:
         db_table = 'helmet_detection'
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['-timestamp']),
+            models.Index(fields=['date', 'violation_count']),
         ]
     
     def __str__(self):
@@ -73,6 +96,7 @@ class HelmetDetection(models.Model):
         # Calculate compliance rate
         if self.total_people > 0:
             self.compliance_rate = (self.compliant_count / self.total_people) * 100
+        self.date = timezone.localdate(self.timestamp)
         super().save(*args, **kwargs)
 
 
@@ -82,16 +106,22 @@ class LoiteringDetection(models.Model):
     active_groups = models.IntegerField(default=0)
     group_details = models.JSONField(null=True, blank=True)  # Store group information
     alert_triggered = models.BooleanField(default=False)
+    date = models.DateField(default=timezone.now)  # Local date of timestamp, for per-day stats
     
     class Meta:
         db_table = 'loitering_detection'
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['-timestamp']),
+            models.Index(fields=['date', 'alert_triggered']),
         ]
     
     def __str__(self):
         return f"Loitering Detection - {self.timestamp} - {self.active_groups} groups"
+    
+    def save(self, *args, **kwargs):
+        self.date = timezone.localdate(self.timestamp)
+        super().save(*args, **kwargs)
 
 
 class ProductionCounter(models.Model):
@@ -114,6 +144,30 @@ class ProductionCounter(models.Model):
         return f"Production - {self.timestamp} - {self.item_count} items"
 
 
+# Also keyed on the ProductionCounter version, so an edited or deleted row is
+# never served from a stale entry
+PRODUCTION_TOTALS_CACHE_KEY = 'prod:totals:{}:{}'
+PRODUCTION_TOTALS_TTL = 30
+
+
+def get_production_totals(today):
+    """Today's and this month's item totals (one conditional aggregate) plus the latest counter id"""
+    cache_key = PRODUCTION_TOTALS_CACHE_KEY.format(today.isoformat(), get_model_version(ProductionCounter))
+    totals = cache.get(cache_key)
+    if totals is None:
+        totals = ProductionCounter.objects.filter(session_date__gte=today.replace(day=1)).aggregate(
+            today=Sum('item_count', filter=Q(session_date=today)),
+            month=Sum('item_count'),
+        )
+        totals['today'] = totals['today'] or 0
+        totals['month'] = totals['month'] or 0
+        totals['latest_id'] = (
+            ProductionCounter.objects.order_by('-timestamp').values_list('pk', flat=True).first()
+        )
+        cache.set(cache_key, totals, PRODUCTION_TOTALS_TTL)
+    return totals
+
+
 class Employee(models.Model):
     """Model to store employee information"""
     first_name = models.CharField(max_length=100)
@@ -142,6 +196,20 @@ class Employee(models.Model):
         return f"{self.first_name} {self.last_name}".strip()
 
 
+# Active-employee count changes rarely but is read on every stats/dashboard poll;
+# cached here and invalidated by the Employee save/delete signals
+ACTIVE_EMPLOYEE_COUNT_CACHE_KEY = 'employees:active:count'
+ACTIVE_EMPLOYEE_COUNT_TTL = 60
+
+
+def get_active_employee_count():
+    count = cache.get(ACTIVE_EMPLOYEE_COUNT_CACHE_KEY)
+    if count is None:
+        count = Employee.objects.filter(is_active=True).count()
+        cache.set(ACTIVE_EMPLOYEE_COUNT_CACHE_KEY, count, ACTIVE_EMPLOYEE_COUNT_TTL)
+    return count
+
+
 class AttendanceRecord(models.Model):
     """Model to store attendance records"""
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='attendances')
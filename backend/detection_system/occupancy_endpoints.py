@@ -216,7 +216,7 @@ async def create_camera(camera_data: CameraCreate, session: Session = Depends(ge
                 detail=f"Camera with ID '{camera_data.camera_id}' already exists"
             )
 
-        camera = CameraDAO.create(session, camera_data.dict())
+        camera = CameraDAO.create(session, camera_data.model_dump())
         return camera
 
     except HTTPException:
@@ -301,7 +301,7 @@ async def create_virtual_line(line_data: VirtualLineCreate, session: Session = D
                 detail=f"Camera {line_data.camera_id} not found"
             )
 
-        line = VirtualLineDAO.create(session, line_data.dict())
+        line = VirtualLineDAO.create(session, line_data.model_dump())
         return line
 
     except HTTPException:
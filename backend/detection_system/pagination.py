@@ -0,0 +1,52 @@
+import hashlib
+from functools import partial
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that caches COUNT(*) per distinct query for a few minutes."""
+    
+    def __init__(self, *args, refresh_count=False, count_timeout=300, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.refresh_count = refresh_count
+        self.count_timeout = count_timeout
+    
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        try:
+            sql = str(queryset.query)
+        except (AttributeError, EmptyResultSet):
+            return super().count
+        
+        key = f"pagination:count:{hashlib.md5(sql.encode()).hexdigest()}"
+        if not self.refresh_count:
+            count = cache.get(key)
+            if count is not None:
+                return count
+        count = queryset.count()
+        cache.set(key, count, self.count_timeout)
+        return count
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    PageNumberPagination that reuses the total count while a client pages
+    through a listing. Requesting the first page always recounts, so a fresh
+    listing never shows a stale total.
+    """
+    count_cache_timeout = 300
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        page_number = request.query_params.get(self.page_query_param) or '1'
+        self.django_paginator_class = partial(
+            CachedCountPaginator,
+            refresh_count=page_number == '1',
+            count_timeout=self.count_cache_timeout,
+        )
+        return super().paginate_queryset(queryset, request, view=view)
@@ -1,39 +1,166 @@
 
+from copy import copy
+from functools import lru_cache
+from operator import attrgetter
+
+from django.db import models
 from rest_framework import serializers
 from .models import (
     HelmetDetection, LoiteringDetection, ProductionCounter,
     Employee, AttendanceRecord, SystemLog, DailyReport, UnknownAttendance
 )
 
-class UnknownAttendanceSerializer(serializers.ModelSerializer):
+@lru_cache(maxsize=None)
+def serializer_model_fields(serializer_class):
+    """
+    Model columns a ModelSerializer reads, for use with QuerySet.only().
+    
+    Returns None when any field is sourced from a property or method, since
+    its underlying columns can't be known and deferring them would trigger
+    a query per row.
+    """
+    concrete = {f.name for f in serializer_class.Meta.model._meta.concrete_fields}
+    names = set()
+    for field in serializer_class().fields.values():
+        root = field.source.split('.', 1)[0]
+        if root not in concrete:
+            return None
+        names.add(root)
+    return tuple(sorted(names))
+
+
+# Field types whose JSON form differs from the raw value returned by values()
+_VALUES_CONVERTED_FIELDS = (
+    serializers.DateTimeField, serializers.DateField, serializers.TimeField,
+    serializers.FileField, serializers.DecimalField,
+)
+
+
+@lru_cache(maxsize=None)
+def _values_layout(serializer_class):
+    readable = list(serializer_class()._readable_fields)
+    names = tuple(field.field_name for field in readable)
+    converters = tuple(
+        (field.field_name, field.to_representation)
+        for field in readable if isinstance(field, _VALUES_CONVERTED_FIELDS)
+    )
+    return names, converters
+
+
+def values_fields(serializer_class):
+    """Column names to pass to QuerySet.values() for a flat model serializer."""
+    return _values_layout(serializer_class)[0]
+
+
+def represent_values(rows, serializer_class):
+    """
+    Turn QuerySet.values() rows into the serializer's output format in place.
+    
+    Skips model instantiation and per-field get_attribute(); only dates,
+    files and decimals are passed through their field's to_representation.
+    """
+    converters = _values_layout(serializer_class)[1]
+    for row in rows:
+        for name, to_repr in converters:
+            value = row[name]
+            if value is not None:
+                row[name] = to_repr(value)
+    return rows
+
+
+class CachedFieldsSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that builds its field map from model introspection once
+    per class and hands each instance shallow copies of the cached fields.
+    """
+    _fields_cache = {}
+    
+    def get_fields(self):
+        cls = self.__class__
+        fields = self._fields_cache.get(cls)
+        if fields is None:
+            fields = self._fields_cache[cls] = super().get_fields()
+        return {name: copy(field) for name, field in fields.items()}
+
+
+@lru_cache(maxsize=None)
+def _fast_readers(serializer_class):
+    """
+    (field_name, attrgetter, to_representation) per readable field, or None
+    when any field isn't a plain concrete column (or needs the request
+    context, as FileField does for absolute URLs).
+    """
+    columns = {
+        f.name for f in serializer_class.Meta.model._meta.concrete_fields
+        if not f.is_relation
+    }
+    readers = []
+    for field in serializer_class()._readable_fields:
+        if field.source not in columns or isinstance(field, serializers.FileField):
+            return None
+        readers.append((field.field_name, attrgetter(field.source), field.to_representation))
+    return tuple(readers)
+
+
+class FastListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer for flat model serializers.
+    
+    When every readable field maps straight onto a concrete, non-relational
+    model column, rows are read with one attrgetter per field instead of
+    going through Field.get_attribute()'s dotted-source lookup. The readers
+    are built once per child serializer class. Anything else falls back to
+    the regular per-row path.
+    """
+    
+    def to_representation(self, data):
+        readers = _fast_readers(type(self.child))
+        if readers is None:
+            return super().to_representation(data)
+        
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        rows = []
+        for instance in iterable:
+            row = {}
+            for name, getter, to_repr in readers:
+                value = getter(instance)
+                row[name] = None if value is None else to_repr(value)
+            rows.append(row)
+        return rows
+
+
+class UnknownAttendanceSerializer(CachedFieldsSerializer):
     class Meta:
         model = UnknownAttendance
         fields = '__all__'
         read_only_fields = ('id', 'timestamp')
 
 
-class HelmetDetectionSerializer(serializers.ModelSerializer):
+class HelmetDetectionSerializer(CachedFieldsSerializer):
     class Meta:
         model = HelmetDetection
         fields = '__all__'
-        read_only_fields = ('id', 'timestamp', 'compliance_rate')
+        list_serializer_class = FastListSerializer
+        read_only_fields = ('id', 'timestamp', 'compliance_rate', 'date')
 
 
-class LoiteringDetectionSerializer(serializers.ModelSerializer):
+class LoiteringDetectionSerializer(CachedFieldsSerializer):
     class Meta:
         model = LoiteringDetection
         fields = '__all__'
-        read_only_fields = ('id', 'timestamp')
+        list_serializer_class = FastListSerializer
+        read_only_fields = ('id', 'timestamp', 'date')
 
 
-class ProductionCounterSerializer(serializers.ModelSerializer):
+class ProductionCounterSerializer(CachedFieldsSerializer):
     class Meta:
         model = ProductionCounter
         fields = '__all__'
+        list_serializer_class = FastListSerializer
         read_only_fields = ('id', 'timestamp')
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(CachedFieldsSerializer):
     full_name = serializers.ReadOnlyField()
     
     class Meta:
@@ -42,7 +169,7 @@ class EmployeeSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
-class AttendanceRecordSerializer(serializers.ModelSerializer):
+class AttendanceRecordSerializer(CachedFieldsSerializer):
     employee_name = serializers.CharField(source='employee.full_name', read_only=True)
     employee_id_number = serializers.CharField(source='employee.employee_id', read_only=True)
     
@@ -52,14 +179,14 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'timestamp')
 
 
-class SystemLogSerializer(serializers.ModelSerializer):
+class SystemLogSerializer(CachedFieldsSerializer):
     class Meta:
         model = SystemLog
         fields = '__all__'
         read_only_fields = ('id', 'timestamp')
 
 
-class DailyReportSerializer(serializers.ModelSerializer):
+class DailyReportSerializer(CachedFieldsSerializer):
     class Meta:
         model = DailyReport
         fields = '__all__'
@@ -0,0 +1,28 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    ACTIVE_EMPLOYEE_COUNT_CACHE_KEY, AttendanceRecord, Employee, HelmetDetection,
+    LoiteringDetection, ProductionCounter, bump_model_version
+)
+
+# Models whose rows feed the conditional-GET stats endpoints
+VERSIONED_MODELS = (HelmetDetection, LoiteringDetection, ProductionCounter, AttendanceRecord, Employee)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_active_employee_count(sender, **kwargs):
+    """Drop the cached active-employee count whenever an employee changes."""
+    cache.delete(ACTIVE_EMPLOYEE_COUNT_CACHE_KEY)
+
+
+def bump_stats_version(sender, **kwargs):
+    """Change the stats ETags on every create, update or delete of a tracked model."""
+    bump_model_version(sender)
+
+
+for _model in VERSIONED_MODELS:
+    post_save.connect(bump_stats_version, sender=_model, dispatch_uid=f'stats-version-{_model.__name__}')
+    post_delete.connect(bump_stats_version, sender=_model, dispatch_uid=f'stats-version-{_model.__name__}')
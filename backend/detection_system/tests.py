@@ -1,3 +1,198 @@
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import serializers
+
+from .models import HelmetDetection, LoiteringDetection, ProductionCounter, get_production_totals
+from .serializers import (
+    FastListSerializer, HelmetDetectionSerializer, ProductionCounterSerializer,
+    _fast_readers,
+)
+from .views import MAX_RECENT_LIMIT
+
+
+class StatsETagTests(TestCase):
+    """Conditional GET on the statistics and dashboard endpoints"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_stats_answer_304(self):
+        HelmetDetection.objects.create(total_people=4, compliant_count=3, violation_count=1)
+        url = reverse('helmet-stats')
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_in_place_edit_changes_etag(self):
+        # Same timestamp and row count before and after the edit
+        detection = HelmetDetection.objects.create(total_people=4, compliant_count=3, violation_count=1)
+        url = reverse('helmet-stats')
+        first = self.client.get(url)
+
+        detection.violation_count = 3
+        detection.save()
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.json()['total_violations'], 3)
+
+    def test_delete_changes_production_stats(self):
+        today = timezone.now().date()
+        ProductionCounter.objects.create(item_count=5, session_date=today)
+        doomed = ProductionCounter.objects.create(item_count=7, session_date=today)
+        url = reverse('production-stats')
+        first = self.client.get(url)
+        self.assertEqual(first.json()['total_items_today'], 12)
+
+        doomed.delete()
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['total_items_today'], 5)
+
+    def test_dashboard_etag_follows_payload(self):
+        url = reverse('dashboard-summary')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+
+class ProductionTotalsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_totals_and_latest_row(self):
+        today = timezone.now().date()
+        earlier = timezone.now() - timedelta(minutes=5)
+        ProductionCounter.objects.create(item_count=4, session_date=today)
+        ProductionCounter.objects.create(item_count=6, session_date=today, timestamp=earlier)
+        newest = ProductionCounter.objects.create(item_count=1, session_date=today)
+
+        totals = get_production_totals(today)
+        self.assertEqual(totals['today'], 11)
+        self.assertEqual(totals['month'], 11)
+        self.assertEqual(totals['latest_id'], newest.pk)
+
+    def test_empty_month(self):
+        totals = get_production_totals(timezone.now().date())
+        self.assertEqual((totals['today'], totals['month'], totals['latest_id']), (0, 0, None))
+
+    def test_today_action_uses_shared_total(self):
+        today = timezone.now().date()
+        ProductionCounter.objects.create(item_count=3, session_date=today)
+        ProductionCounter.objects.create(item_count=9, session_date=today - timedelta(days=40))
+
+        response = self.client.get(reverse('production-counter-today'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_items'], 3)
+        self.assertEqual(len(response.json()['records']), 1)
+
+
+class FastListSerializerTests(TestCase):
+    """FastListSerializer must match the regular per-row ListSerializer"""
+
+    def _regular(self, serializer_class, queryset):
+        return serializers.ListSerializer(child=serializer_class()).to_representation(queryset)
+
+    def test_matches_regular_output(self):
+        today = timezone.now().date()
+        HelmetDetection.objects.create(total_people=4, compliant_count=3, violation_count=1,
+                                       compliance_rate=75.0, frame_data={'boxes': [[1, 2, 3, 4]]})
+        HelmetDetection.objects.create(total_people=0, frame_data=None)
+        ProductionCounter.objects.create(item_count=5, session_date=today, box_type='small')
+        ProductionCounter.objects.create(item_count=2, session_date=today, box_type=None, details=None)
+
+        for serializer_class, model in ((HelmetDetectionSerializer, HelmetDetection),
+                                        (ProductionCounterSerializer, ProductionCounter)):
+            queryset = model.objects.order_by('pk')
+            fast = serializer_class(queryset, many=True)
+            self.assertIsInstance(fast, FastListSerializer)
+            self.assertEqual(fast.data, self._regular(serializer_class, queryset))
+
+    def test_readers_built_once_per_class(self):
+        HelmetDetection.objects.create(total_people=1)
+        HelmetDetectionSerializer(HelmetDetection.objects.all(), many=True).data
+        before = _fast_readers.cache_info()
+        HelmetDetectionSerializer(HelmetDetection.objects.all(), many=True).data
+        after = _fast_readers.cache_info()
+        self.assertEqual(after.misses, before.misses)
+        self.assertEqual(after.hits, before.hits + 1)
+
+
+class PaginatedEndpointTests(TestCase):
+    """Violations/alerts listings are paged and ?limit= on recent is capped"""
+
+    def setUp(self):
+        cache.clear()
+        HelmetDetection.objects.bulk_create(
+            HelmetDetection(total_people=2, compliant_count=1, violation_count=1)
+            for _ in range(60)
+        )
+        HelmetDetection.objects.create(total_people=2, compliant_count=2, violation_count=0)
+
+    def test_violations_are_paged(self):
+        for url in (reverse('helmet-detection-violations'), reverse('helmet-violations')):
+            body = self.client.get(url).json()
+            self.assertEqual(body['count'], 60)
+            self.assertEqual(len(body['results']), 50)
+            self.assertIsNotNone(body['next'])
+
+            last = self.client.get(body['next']).json()
+            self.assertEqual(len(last['results']), 10)
+            self.assertIsNone(last['next'])
+
+    def test_alerts_are_paged(self):
+        LoiteringDetection.objects.create(active_groups=1, alert_triggered=True)
+        LoiteringDetection.objects.create(active_groups=0, alert_triggered=False)
+
+        body = self.client.get(reverse('loitering-detection-alerts')).json()
+        self.assertEqual(body['count'], 1)
+        self.assertEqual(body['results'][0]['active_groups'], 1)
+
+    def test_recent_limit_is_capped(self):
+        HelmetDetection.objects.bulk_create(HelmetDetection() for _ in range(MAX_RECENT_LIMIT))
+
+        response = self.client.get(reverse('helmet-detection-recent'), {'limit': 10000})
+        self.assertEqual(len(response.json()), MAX_RECENT_LIMIT)
+
+
+class CachedCountPaginationTests(TestCase):
+    """The total is counted on page 1 and reused for later pages"""
+
+    def setUp(self):
+        cache.clear()
+        HelmetDetection.objects.bulk_create(
+            HelmetDetection(total_people=1, violation_count=1) for _ in range(60)
+        )
+        self.url = reverse('helmet-violations')
+
+    def test_later_pages_reuse_count(self):
+        self.assertEqual(self.client.get(self.url).json()['count'], 60)
+        HelmetDetection.objects.create(total_people=1, violation_count=1)
+
+        with self.assertNumQueries(1):
+            page_two = self.client.get(self.url, {'page': 2}).json()
+        self.assertEqual(page_two['count'], 60)
+
+    def test_first_page_recounts(self):
+        self.client.get(self.url)
+        HelmetDetection.objects.create(total_people=1, violation_count=1)
+
+        self.assertEqual(self.client.get(self.url).json()['count'], 61)
+
+    def test_filters_count_separately(self):
+        HelmetDetection.objects.create(total_people=1, violation_count=0)
+        self.client.get(reverse('helmet-violations'))
 
-# Create your tests here.
+        body = self.client.get(reverse('helmet-detection-list'), {'page': 2}).json()
+        self.assertEqual(body['count'], 61)
@@ -1,4 +1,5 @@
 from django.urls import path, include
+from django.views.decorators.http import condition
 from rest_framework.routers import DefaultRouter
 from . import views, ml_views
 
@@ -16,10 +17,11 @@ urlpatterns = [
     path('', include(router.urls)),
     
     # Statistics endpoints
-    path('stats/helmet/', views.HelmetStatsView.as_view(), name='helmet-stats'),
-    path('stats/loitering/', views.LoiteringStatsView.as_view(), name='loitering-stats'),
-    path('stats/production/', views.ProductionStatsView.as_view(), name='production-stats'),
-    path('stats/attendance/', views.AttendanceStatsView.as_view(), name='attendance-stats'),
+    # (conditional GET: unchanged data answers 304 without recomputing stats)
+    path('stats/helmet/', condition(etag_func=views.helmet_stats_etag)(views.HelmetStatsView.as_view()), name='helmet-stats'),
+    path('stats/loitering/', condition(etag_func=views.loitering_stats_etag)(views.LoiteringStatsView.as_view()), name='loitering-stats'),
+    path('stats/production/', condition(etag_func=views.production_stats_etag)(views.ProductionStatsView.as_view()), name='production-stats'),
+    path('stats/attendance/', condition(etag_func=views.attendance_stats_etag)(views.AttendanceStatsView.as_view()), name='attendance-stats'),
     path('dashboard/summary/', views.DashboardSummaryView.as_view(), name='dashboard-summary'),
     
     # Live ML detection endpoints (webcam integration)
@@ -18,6 +18,7 @@ Endpoints:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
@@ -249,11 +250,11 @@ def get_authorized_plates() -> Dict[str, Dict[str, str]]:
 
 # ==================== Endpoints ====================
 
-@router.post("/process-frame", response_model=ProcessFrameResponse)
+@router.post("/process-frame", responses={200: {"model": ProcessFrameResponse}})
 async def process_frame(
     request: ProcessFrameRequest,
     service: VehicleGateService = Depends(get_vehicle_service)
-) -> ProcessFrameResponse:
+) -> ORJSONResponse:
     """
     Process a single video frame for vehicle detection and ANPR.
     
@@ -301,16 +302,18 @@ async def process_frame(
                 'message': alert.message,
             })
         
-        return ProcessFrameResponse(
-            frame_index=request.frame_index,
-            vehicles_detected=len(sessions),
-            vehicles_tracked=len(sessions),
-            plates_recognized=service.total_plates_recognized,
-            alerts_triggered=len(alerts),
-            vehicle_counts=service.get_vehicle_counts(),
-            recent_alerts=alert_list,
-            processing_time_ms=processing_time
-        )
+        # Per-frame hot path: plain dict straight to orjson, no response
+        # model validation
+        return ORJSONResponse({
+            'frame_index': request.frame_index,
+            'vehicles_detected': len(sessions),
+            'vehicles_tracked': len(sessions),
+            'plates_recognized': service.total_plates_recognized,
+            'alerts_triggered': len(alerts),
+            'vehicle_counts': service.get_vehicle_counts(),
+            'recent_alerts': alert_list,
+            'processing_time_ms': processing_time
+        })
     
     except HTTPException:
         raise
@@ -15,15 +15,21 @@ from sqlalchemy import (
     Boolean, Enum, ForeignKey, Index, CheckConstraint, UniqueConstraint,
     Table, and_, or_, func, desc
 )
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker, Session
 from sqlalchemy.types import TypeDecorator
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
 from enum import Enum as PyEnum
+from functools import lru_cache
+from operator import attrgetter
 import logging
 from pathlib import Path
 
+import numpy as np
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -118,24 +124,10 @@ class AuthorizedVehicle(Base):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
-        return {
-            'id': self.id,
-            'plate_number': self.plate_number,
-            'owner_name': self.owner_name,
-            'owner_email': self.owner_email,
-            'vehicle_type': self.vehicle_type,
-            'vehicle_model': self.vehicle_model,
-            'status': self.status,
-            'category': self.category,
-            'department': self.department,
-            'phone_number': self.phone_number,
-            'notes': self.notes,
-            'snapshot_path': self.snapshot_path,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'last_access': self.last_access.isoformat() if self.last_access else None,
-        }
+        d = dict(zip(_VEHICLE_COLS, _VEHICLE_GETTER(self)))
+        for k in _VEHICLE_DATETIME:
+            d[k] = d[k].isoformat() if d[k] else None
+        return d
     
     def is_authorized(self) -> bool:
         """Check if vehicle is currently authorized."""
@@ -214,27 +206,10 @@ class VehicleAccessLog(Base):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
-        return {
-            'id': self.id,
-            'plate_number': self.plate_number,
-            'vehicle_id': self.vehicle_id,
-            'vehicle_type': self.vehicle_type,
-            'entry_time': self.entry_time.isoformat() if self.entry_time else None,
-            'exit_time': self.exit_time.isoformat() if self.exit_time else None,
-            'status': self.status,
-            'category': self.category,
-            'is_authorized': self.is_authorized,
-            'snapshot_path': self.snapshot_path,
-            'full_frame_path': self.full_frame_path,
-            'entry_point': self.entry_point,
-            'location_x': self.location_x,
-            'location_y': self.location_y,
-            'plate_confidence': self.plate_confidence,
-            'notes': self.notes,
-            'flagged': self.flagged,
-            'duration_seconds': self.duration_seconds,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-        }
+        d = dict(zip(_LOG_COLS, _LOG_GETTER(self)))
+        for k in _LOG_DATETIME:
+            d[k] = d[k].isoformat() if d[k] else None
+        return d
     
     def update_exit_time(self):
         """Update exit time and calculate duration."""
@@ -244,6 +219,32 @@ class VehicleAccessLog(Base):
             self.duration_seconds = int(duration.total_seconds())
 
 
+# Column accessors for to_dict(), computed once at import instead of per row
+_VEHICLE_COLS = tuple(c.name for c in AuthorizedVehicle.__table__.columns)
+_VEHICLE_DATETIME = frozenset(
+    c.name for c in AuthorizedVehicle.__table__.columns if isinstance(c.type, DateTime)
+)
+_VEHICLE_GETTER = attrgetter(*_VEHICLE_COLS)
+
+_LOG_COLS = tuple(c.name for c in VehicleAccessLog.__table__.columns)
+_LOG_DATETIME = frozenset(
+    c.name for c in VehicleAccessLog.__table__.columns if isinstance(c.type, DateTime)
+)
+_LOG_GETTER = attrgetter(*_LOG_COLS)
+
+# Dialect-specific INSERT constructs that support ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    'postgresql': pg_insert,
+    'sqlite': sqlite_insert,
+}
+
+# Integer codes for enum-valued columns, used by the bincount statistics path
+_ACCESS_STATUS_NAMES = tuple(s.value for s in AccessStatus)
+_ACCESS_STATUS_CODES = {name: code for code, name in enumerate(_ACCESS_STATUS_NAMES)}
+_CATEGORY_NAMES = tuple(c.value for c in VehicleCategory)
+_CATEGORY_CODES = {name: code for code, name in enumerate(_CATEGORY_NAMES)}
+
+
 class AuthorizedVehicleDAO:
     """Data Access Object for AuthorizedVehicle operations."""
     
@@ -256,19 +257,43 @@ class AuthorizedVehicleDAO:
               vehicle_type: str,
               status: str = VehicleStatus.ALLOWED.value,
               **kwargs) -> Optional[AuthorizedVehicle]:
-        """Create new authorized vehicle record."""
+        """
+        Create (or update) an authorized vehicle record.
+        
+        Uses a single INSERT ... ON CONFLICT(plate_number) DO UPDATE on
+        PostgreSQL/SQLite so retried creates neither race nor raise.
+        """
+        payload = dict(
+            plate_number=plate_number,
+            owner_name=owner_name,
+            vehicle_type=vehicle_type,
+            status=status,
+            **kwargs
+        )
         try:
-            vehicle = AuthorizedVehicle(
-                plate_number=plate_number,
-                owner_name=owner_name,
-                vehicle_type=vehicle_type,
-                status=status,
-                **kwargs
-            )
-            self.session.add(vehicle)
+            insert = _UPSERT_INSERTS.get(self.session.get_bind().dialect.name)
+            if insert is None:
+                vehicle = AuthorizedVehicle(**payload)
+                self.session.add(vehicle)
+                self.session.commit()
+                logger.info(f"Created vehicle: {plate_number}")
+                return vehicle
+            
+            stmt = insert(AuthorizedVehicle).values(**payload)
+            update_cols = {
+                key: stmt.excluded[key] for key in payload if key != 'plate_number'
+            }
+            update_cols.setdefault('is_active', True)
+            update_cols['updated_at'] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['plate_number'],
+                set_=update_cols
+            ).returning(AuthorizedVehicle.id)
+            
+            vehicle_id = self.session.execute(stmt).scalar_one()
             self.session.commit()
-            logger.info(f"Created vehicle: {plate_number}")
-            return vehicle
+            logger.info(f"Upserted vehicle: {plate_number}")
+            return self.session.get(AuthorizedVehicle, vehicle_id, populate_existing=True)
         except Exception as e:
             self.session.rollback()
             logger.error(f"Error creating vehicle: {e}")
@@ -522,9 +547,16 @@ class VehicleAccessLogDAO:
     def get_statistics(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get traffic statistics for date range."""
         try:
-            logs = self.get_date_range(start_date, end_date)
+            rows = self.session.query(
+                VehicleAccessLog.vehicle_type,
+                VehicleAccessLog.status,
+                VehicleAccessLog.category,
+            ).filter(
+                VehicleAccessLog.entry_time >= start_date,
+                VehicleAccessLog.entry_time <= end_date
+            ).all()
             
-            if not logs:
+            if not rows:
                 return {
                     'total_entries': 0,
                     'by_type': {},
@@ -532,27 +564,34 @@ class VehicleAccessLogDAO:
                     'by_category': {},
                 }
             
-            stats = {
-                'total_entries': len(logs),
-                'by_type': {},
-                'by_status': {},
-                'by_category': {},
-            }
+            n = len(rows)
+            types, statuses, categories = zip(*rows)
             
-            for log in logs:
-                # Count by vehicle type
-                vtype = log.vehicle_type
-                stats['by_type'][vtype] = stats['by_type'].get(vtype, 0) + 1
-                
-                # Count by status
-                status = log.status
-                stats['by_status'][status] = stats['by_status'].get(status, 0) + 1
-                
-                # Count by category
-                category = log.category
-                stats['by_category'][category] = stats['by_category'].get(category, 0) + 1
+            # Status/category are CHECK-constrained to their enums, so map them to
+            # small integer codes and histogram with a single bincount each
+            status_counts = np.bincount(
+                np.fromiter((_ACCESS_STATUS_CODES[s] for s in statuses), dtype=np.int16, count=n),
+                minlength=len(_ACCESS_STATUS_NAMES)
+            )
+            category_counts = np.bincount(
+                np.fromiter((_CATEGORY_CODES[c] for c in categories), dtype=np.int16, count=n),
+                minlength=len(_CATEGORY_NAMES)
+            )
+            # vehicle_type is free-form text
+            type_names, type_counts = np.unique(np.asarray(types), return_counts=True)
             
-            return stats
+            return {
+                'total_entries': n,
+                'by_type': dict(zip(type_names.tolist(), type_counts.tolist())),
+                'by_status': {
+                    name: count
+                    for name, count in zip(_ACCESS_STATUS_NAMES, status_counts.tolist()) if count
+                },
+                'by_category': {
+                    name: count
+                    for name, count in zip(_CATEGORY_NAMES, category_counts.tolist()) if count
+                },
+            }
         except Exception as e:
             logger.error(f"Error calculating statistics: {e}")
             return {}
@@ -590,12 +629,17 @@ def create_tables(engine):
         logger.error(f"Error creating tables: {e}")
 
 
+@lru_cache(maxsize=None)
+def _session_factory(database_url: str):
+    """Build the engine (and its connection pool) once per database URL."""
+    engine = create_engine(database_url, pool_pre_ping=True)
+    return sessionmaker(bind=engine, expire_on_commit=False)
+
+
 def create_session(database_url: str) -> Session:
     """Create a database session."""
     try:
-        engine = create_engine(database_url, pool_pre_ping=True)
-        SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
-        return SessionLocal()
+        return _session_factory(database_url)()
     except Exception as e:
         logger.error(f"Error creating database session: {e}")
         return None
@@ -1,35 +1,46 @@
 from rest_framework.response import Response
 
 # --- API endpoints for /api/violations/loitering/, /api/violations/helmet/, /api/production/today/ ---
+from .pagination import CachedCountPagination
 from rest_framework.views import APIView
 from .models import LoiteringDetection, HelmetDetection, ProductionCounter
-from .serializers import LoiteringDetectionSerializer, HelmetDetectionSerializer, ProductionCounterSerializer
+from .serializers import (
+    LoiteringDetectionSerializer, HelmetDetectionSerializer, ProductionCounterSerializer,
+    values_fields, represent_values
+)
 
 class LoiteringViolationsView(APIView):
     def get(self, request):
-        violations = LoiteringDetection.objects.filter(alert_triggered=True)
-        serializer = LoiteringDetectionSerializer(violations, many=True)
-        return Response(serializer.data)
+        violations = LoiteringDetection.objects.filter(alert_triggered=True).values(
+            *values_fields(LoiteringDetectionSerializer)
+        )
+        paginator = CachedCountPagination()
+        page = paginator.paginate_queryset(violations, request, view=self)
+        return paginator.get_paginated_response(represent_values(page, LoiteringDetectionSerializer))
 
 class HelmetViolationsView(APIView):
     def get(self, request):
-        violations = HelmetDetection.objects.filter(violation_count__gt=0)
-        serializer = HelmetDetectionSerializer(violations, many=True)
-        return Response(serializer.data)
+        violations = HelmetDetection.objects.filter(violation_count__gt=0).values(
+            *values_fields(HelmetDetectionSerializer)
+        )
+        paginator = CachedCountPagination()
+        page = paginator.paginate_queryset(violations, request, view=self)
+        return paginator.get_paginated_response(represent_values(page, HelmetDetectionSerializer))
 
 class ProductionTodayView(APIView):
     def get(self, request):
         from django.utils import timezone
         today = timezone.now().date()
-        records = ProductionCounter.objects.filter(session_date=today)
-        serializer = ProductionCounterSerializer(records, many=True)
-        return Response(serializer.data)
+        records = ProductionCounter.objects.filter(session_date=today).values(
+            *values_fields(ProductionCounterSerializer)
+        )
+        return Response(represent_values(list(records), ProductionCounterSerializer))
 
-from rest_framework import viewsets, serializers
+from rest_framework import viewsets
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser
 from .models import UnknownAttendance, SystemConfiguration, ModuleConfiguration
-from .serializers import UnknownAttendanceSerializer
+from .serializers import CachedFieldsSerializer, UnknownAttendanceSerializer
 
 class UnknownAttendanceViewSet(viewsets.ModelViewSet):
     """ViewSet for unknown attendance logs"""
@@ -37,12 +48,12 @@ class UnknownAttendanceViewSet(viewsets.ModelViewSet):
     serializer_class = UnknownAttendanceSerializer
 
 # Serializers for config models
-class SystemConfigurationSerializer(serializers.ModelSerializer):
+class SystemConfigurationSerializer(CachedFieldsSerializer):
     class Meta:
         model = SystemConfiguration
         fields = ['key', 'value', 'updated_at']
 
-class ModuleConfigurationSerializer(serializers.ModelSerializer):
+class ModuleConfigurationSerializer(CachedFieldsSerializer):
     class Meta:
         model = ModuleConfiguration
         fields = ['module_name', 'enabled', 'settings', 'updated_at']
@@ -54,9 +65,18 @@ class SystemConfigView(APIView):
         configs = SystemConfiguration.objects.all()
         return Response(SystemConfigurationSerializer(configs, many=True).data)
     def post(self, request):
-        for item in request.data:
-            obj, _ = SystemConfiguration.objects.update_or_create(key=item['key'], defaults={'value': item['value']})
-        return self.get(request)
+        # One INSERT ... ON CONFLICT DO UPDATE for the whole payload (last entry per key wins)
+        configs = {
+            item['key']: SystemConfiguration(key=item['key'], value=item['value'])
+            for item in request.data
+        }
+        SystemConfiguration.objects.bulk_create(
+            configs.values(),
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['value', 'updated_at'],
+        )
+        return Response(SystemConfigurationSerializer(configs.values(), many=True).data)
 
 # API: Get/Set module config
 class ModuleConfigView(APIView):
@@ -65,22 +85,40 @@ class ModuleConfigView(APIView):
         modules = ModuleConfiguration.objects.all()
         return Response(ModuleConfigurationSerializer(modules, many=True).data)
     def post(self, request):
-        for item in request.data:
-            obj, _ = ModuleConfiguration.objects.update_or_create(module_name=item['module_name'], defaults={
-                'enabled': item.get('enabled', True),
-                'settings': item.get('settings', {})
-            })
-        return self.get(request)
+        # One INSERT ... ON CONFLICT DO UPDATE for the whole payload (last entry per module wins)
+        modules = {
+            item['module_name']: ModuleConfiguration(
+                module_name=item['module_name'],
+                enabled=item.get('enabled', True),
+                settings=item.get('settings', {})
+            )
+            for item in request.data
+        }
+        ModuleConfiguration.objects.bulk_create(
+            modules.values(),
+            update_conflicts=True,
+            unique_fields=['module_name'],
+            update_fields=['enabled', 'settings', 'updated_at'],
+        )
+        return Response(ModuleConfigurationSerializer(modules.values(), many=True).data)
+import hashlib
+import json
+
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Count, Avg, Sum, Q
+from django.core.cache import cache
+from django.db.models import Count, Avg, Sum, Max, Q, Window
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
 from datetime import datetime, timedelta
+from rest_framework.utils.encoders import JSONEncoder
 from .models import (
     HelmetDetection, LoiteringDetection, ProductionCounter,
-    Employee, AttendanceRecord, SystemLog, DailyReport
+    Employee, AttendanceRecord, SystemLog, DailyReport,
+    get_active_employee_count, get_model_version, get_production_totals
 )
 from .serializers import (
     HelmetDetectionSerializer, LoiteringDetectionSerializer,
@@ -88,11 +126,67 @@ from .serializers import (
     AttendanceRecordSerializer, SystemLogSerializer,
     DailyReportSerializer, HelmetStatsSerializer,
     LoiteringStatsSerializer, ProductionStatsSerializer,
-    AttendanceStatsSerializer
+    AttendanceStatsSerializer, serializer_model_fields,
+    values_fields, represent_values
 )
 
+# orjson is optional; fall back to DRF's encoder when it isn't installed
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, cls=JSONEncoder).encode()
 
-class HelmetDetectionViewSet(viewsets.ModelViewSet):
+
+# Response cache lifetimes (seconds) for the polled statistics endpoints
+DASHBOARD_CACHE_TTL = 30
+STATS_CACHE_TTL = 10
+
+# Upper bound for the ?limit= parameter on `recent` actions
+MAX_RECENT_LIMIT = 100
+
+# Rows fetched per DB round-trip (and flushed per chunk) by `export` actions
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _stream_json_array(queryset, serializer):
+    """Yield a JSON array of serialized rows, one DB chunk at a time."""
+    yield b'['
+    chunk = []
+    first = True
+    for instance in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(_dumps(serializer.to_representation(instance)))
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield (b'' if first else b',') + b','.join(chunk)
+            chunk, first = [], False
+    if chunk:
+        yield (b'' if first else b',') + b','.join(chunk)
+    yield b']'
+
+
+class ExportMixin:
+    """Adds an unpaginated `export` action that streams every matching row."""
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            _stream_json_array(queryset, self.get_serializer()),
+            content_type='application/json'
+        )
+
+
+class SerializerFieldsOnlyMixin:
+    """Load only the columns the viewset's serializer actually reads."""
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = serializer_model_fields(self.get_serializer_class())
+        return queryset.only(*fields) if fields else queryset
+
+
+class HelmetDetectionViewSet(ExportMixin, SerializerFieldsOnlyMixin, viewsets.ModelViewSet):
     """ViewSet for helmet detection records"""
     queryset = HelmetDetection.objects.all()
     serializer_class = HelmetDetectionSerializer
@@ -114,20 +208,21 @@ class HelmetDetectionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Get recent helmet detections"""
-        limit = int(request.query_params.get('limit', 10))
-        recent_records = self.queryset[:limit]
+        limit = min(int(request.query_params.get('limit', 10)), MAX_RECENT_LIMIT)
+        recent_records = self.get_queryset()[:limit]
         serializer = self.get_serializer(recent_records, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def violations(self, request):
         """Get records with violations"""
-        violations = self.queryset.filter(violation_count__gt=0)
-        serializer = self.get_serializer(violations, many=True)
-        return Response(serializer.data)
+        violations = self.get_queryset().filter(violation_count__gt=0)
+        page = self.paginate_queryset(violations)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-class LoiteringDetectionViewSet(viewsets.ModelViewSet):
+class LoiteringDetectionViewSet(ExportMixin, SerializerFieldsOnlyMixin, viewsets.ModelViewSet):
     """ViewSet for loitering detection records"""
     queryset = LoiteringDetection.objects.all()
     serializer_class = LoiteringDetectionSerializer
@@ -135,12 +230,15 @@ class LoiteringDetectionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def alerts(self, request):
         """Get records where alerts were triggered"""
-        alerts = self.queryset.filter(alert_triggered=True)
-        serializer = self.get_serializer(alerts, many=True)
-        return Response(serializer.data)
+        serializer_class = self.get_serializer_class()
+        alerts = self.get_queryset().filter(alert_triggered=True).values(
+            *values_fields(serializer_class)
+        )
+        page = self.paginate_queryset(alerts)
+        return self.get_paginated_response(represent_values(page, serializer_class))
 
 
-class ProductionCounterViewSet(viewsets.ModelViewSet):
+class ProductionCounterViewSet(SerializerFieldsOnlyMixin, viewsets.ModelViewSet):
     """ViewSet for production counter records"""
     queryset = ProductionCounter.objects.all()
     serializer_class = ProductionCounterSerializer
@@ -149,12 +247,12 @@ class ProductionCounterViewSet(viewsets.ModelViewSet):
     def today(self, request):
         """Get today's production count"""
         today = timezone.now().date()
-        today_records = self.queryset.filter(session_date=today)
-        total = today_records.aggregate(total=Sum('item_count'))['total'] or 0
+        today_records = self.get_queryset().filter(session_date=today)
         
         return Response({
             'date': today,
-            'total_items': total,
+            # Same cached total as the production stats and the dashboard
+            'total_items': get_production_totals(today)['today'],
             'records': self.get_serializer(today_records, many=True).data
         })
     
@@ -187,6 +285,8 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         """Search employees by name or employee_id"""
         query = request.query_params.get('q', '')
         if query:
+            # icontains compiles to UPPER(col) LIKE, which the trigram GIN
+            # index (migration 0006, PostgreSQL) serves
             employees = self.queryset.filter(
                 Q(first_name__icontains=query) |
                 Q(last_name__icontains=query) |
@@ -197,9 +297,11 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         return Response([])
 
 
-class AttendanceRecordViewSet(viewsets.ModelViewSet):
+class AttendanceRecordViewSet(ExportMixin, viewsets.ModelViewSet):
     """ViewSet for attendance records"""
-    queryset = AttendanceRecord.objects.all()
+    # Serializer reads employee.full_name / employee.employee_id, so join the
+    # employee row up front instead of issuing one query per record
+    queryset = AttendanceRecord.objects.select_related('employee')
     serializer_class = AttendanceRecordSerializer
     
     @action(detail=False, methods=['get'])
@@ -241,29 +343,71 @@ class DailyReportViewSet(viewsets.ModelViewSet):
     serializer_class = DailyReportSerializer
 
 
+# Conditional GET helpers for the statistics endpoints
+def _queryset_state(queryset, field='timestamp'):
+    """Summarise a queryset's freshness as 'newest-field:row-count:model-version'."""
+    state = queryset.aggregate(latest=Max(field), rows=Count('id'))
+    return f"{state['latest']}:{state['rows']}:{get_model_version(queryset.model)}"
+
+
+def _make_etag(*parts):
+    return hashlib.md5('|'.join(str(p) for p in parts).encode()).hexdigest()
+
+
+def helmet_stats_etag(request):
+    today = timezone.now().date()
+    return _make_etag(today, _queryset_state(HelmetDetection.objects.filter(date=today)))
+
+
+def loitering_stats_etag(request):
+    today = timezone.now().date()
+    return _make_etag(today, _queryset_state(LoiteringDetection.objects.filter(date=today)))
+
+
+def production_stats_etag(request):
+    today = timezone.now().date()
+    month_records = ProductionCounter.objects.filter(session_date__gte=today.replace(day=1))
+    return _make_etag(today, _queryset_state(month_records))
+
+
+def attendance_stats_etag(request):
+    today = timezone.now().date()
+    return _make_etag(
+        today,
+        _queryset_state(AttendanceRecord.objects.filter(date=today)),
+        _queryset_state(Employee.objects.all(), field='updated_at'),
+    )
+
+
 # Statistics Views
 class HelmetStatsView(APIView):
     """Get helmet detection statistics"""
     
     def get(self, request):
         today = timezone.now().date()
-        queryset = HelmetDetection.objects.filter(timestamp__date=today)
+        # Keyed on the ETag, so a cached body never outlives the data it was built from
+        cache_key = f'stats:helmet:{helmet_stats_etag(request)}'
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
         
-        stats = queryset.aggregate(
-            total_detections=Count('id'),
-            total_violations=Sum('violation_count'),
-            average_compliance=Avg('compliance_rate')
-        )
-        
-        latest = queryset.first()
+        # Unpartitioned window aggregates are computed over the whole filtered
+        # set before LIMIT 1, so the latest row carries today's totals and
+        # both come back in a single query.
+        latest = HelmetDetection.objects.filter(date=today).annotate(
+            total_detections=Window(Count('id')),
+            total_violations=Window(Sum('violation_count')),
+            average_compliance=Window(Avg('compliance_rate'))
+        ).order_by('-timestamp').first()
         
         data = {
-            'total_detections': stats['total_detections'] or 0,
-            'total_violations': stats['total_violations'] or 0,
-            'average_compliance': round(stats['average_compliance'] or 0, 2),
+            'total_detections': latest.total_detections if latest else 0,
+            'total_violations': (latest.total_violations or 0) if latest else 0,
+            'average_compliance': round((latest.average_compliance or 0) if latest else 0, 2),
             'latest_detection': HelmetDetectionSerializer(latest).data if latest else None
         }
         
+        cache.set(cache_key, data, STATS_CACHE_TTL)
         return Response(data)
 
 
@@ -272,10 +416,10 @@ class LoiteringStatsView(APIView):
     
     def get(self, request):
         today = timezone.now().date()
-        queryset = LoiteringDetection.objects.filter(timestamp__date=today)
+        queryset = LoiteringDetection.objects.filter(date=today)
         
         total_alerts = queryset.filter(alert_triggered=True).count()
-        latest = queryset.first()
+        latest = queryset.order_by('-timestamp').first()
         active_groups = latest.active_groups if latest else 0
         
         data = {
@@ -292,24 +436,24 @@ class ProductionStatsView(APIView):
     
     def get(self, request):
         today = timezone.now().date()
-        this_month_start = today.replace(day=1)
-        
-        today_count = ProductionCounter.objects.filter(
-            session_date=today
-        ).aggregate(total=Sum('item_count'))['total'] or 0
+        cache_key = f'stats:production:{production_stats_etag(request)}'
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
         
-        month_count = ProductionCounter.objects.filter(
-            session_date__gte=this_month_start
-        ).aggregate(total=Sum('item_count'))['total'] or 0
-        
-        latest = ProductionCounter.objects.first()
+        totals = get_production_totals(today)
+        latest = (
+            ProductionCounter.objects.filter(pk=totals['latest_id']).first()
+            if totals['latest_id'] else None
+        )
         
         data = {
-            'total_items_today': today_count,
-            'total_items_this_month': month_count,
+            'total_items_today': totals['today'],
+            'total_items_this_month': totals['month'],
             'latest_count': ProductionCounterSerializer(latest).data if latest else None
         }
         
+        cache.set(cache_key, data, STATS_CACHE_TTL)
         return Response(data)
 
 
@@ -318,11 +462,13 @@ class AttendanceStatsView(APIView):
     
     def get(self, request):
         today = timezone.now().date()
-        total_employees = Employee.objects.filter(is_active=True).count()
+        total_employees = get_active_employee_count()
         
-        today_records = AttendanceRecord.objects.filter(date=today)
-        present = today_records.filter(status='present').count()
-        late = today_records.filter(status='late').count()
+        counts = AttendanceRecord.objects.filter(date=today).aggregate(
+            present=Count('id', filter=Q(status='present')),
+            late=Count('id', filter=Q(status='late')),
+        )
+        present, late = counts['present'], counts['late']
         absent = total_employees - present - late
         
         attendance_rate = (present / total_employees * 100) if total_employees > 0 else 0
@@ -344,24 +490,28 @@ class DashboardSummaryView(APIView):
     def get(self, request):
         today = timezone.now().date()
         
+        # Polling dashboards hit this constantly; serve from cache within the TTL
+        cache_key = f'dashboard:summary:{today.isoformat()}'
+        summary = cache.get(cache_key)
+        if summary is not None:
+            return self._conditional_response(request, summary)
+        
         # Helmet stats
         helmet_violations = HelmetDetection.objects.filter(
-            timestamp__date=today
+            date=today
         ).aggregate(total=Sum('violation_count'))['total'] or 0
         
         # Loitering stats
         loitering_alerts = LoiteringDetection.objects.filter(
-            timestamp__date=today,
+            date=today,
             alert_triggered=True
         ).count()
         
         # Production stats
-        production_count = ProductionCounter.objects.filter(
-            session_date=today
-        ).aggregate(total=Sum('item_count'))['total'] or 0
+        production_count = get_production_totals(today)['today']
         
         # Attendance stats
-        total_employees = Employee.objects.filter(is_active=True).count()
+        total_employees = get_active_employee_count()
         present = AttendanceRecord.objects.filter(
             date=today,
             status__in=['present', 'late']
@@ -378,5 +528,16 @@ class DashboardSummaryView(APIView):
                 'attendance_rate': round((present / total_employees * 100) if total_employees > 0 else 0, 2)
             }
         }
+        cache.set(cache_key, summary, DASHBOARD_CACHE_TTL)
         
-        return Response(summary)
+        return self._conditional_response(request, summary)
+    
+    def _conditional_response(self, request, summary):
+        """Answer 304 when the client already holds this summary."""
+        etag = quote_etag(_make_etag(*sorted(summary.items())))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = Response(summary)
+        response['ETag'] = etag
+        return response
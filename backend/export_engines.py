@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Export YOLO Models to TensorRT Engines
+Offline, once per GPU/TensorRT version: writes best_helmet.engine,
+best_product.engine and yolo11n.engine next to their .pt files, which
+models/yolo_backend.py then loads instead of the PyTorch weights.
+
+FP16 needs nothing else. INT8 roughly doubles throughput again on
+Ampere-class GPUs but must be calibrated on real frames - 200-500 images
+from the factory cameras, described by an Ultralytics dataset YAML:
+
+    python export_engines.py                      # FP16
+    python export_engines.py --int8 --data calib.yaml
+    python export_engines.py --int8 --data calib.yaml best_helmet.pt
+
+Engines are tied to the GPU model and TensorRT version they were built
+with, so build them on the deployment machine rather than committing them.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from models.yolo_backend import EXPORT_IMGSZ, cuda_available
+
+MODELS_DIR = Path(__file__).parent / 'models'
+DEFAULT_MODELS = ('best_helmet.pt', 'best_product.pt', 'yolo11n.pt')
+
+
+def export_engine(pt_path, int8=False, data=None, batch=1, workspace=4):
+    """Build pt_path's TensorRT engine; returns the engine path or None"""
+    from ultralytics import YOLO
+
+    print(f"⚙️  Exporting {pt_path.name} ({'INT8' if int8 else 'FP16'}, batch={batch})...")
+    try:
+        engine = YOLO(str(pt_path)).export(
+            format='engine',
+            half=True,  # FP16 for layers INT8 can't take
+            int8=int8,
+            data=data,
+            batch=batch,
+            dynamic=batch > 1,  # a batch-N engine still serves single frames
+            workspace=workspace,
+            imgsz=EXPORT_IMGSZ,
+        )
+        print(f"✅ {pt_path.name} → {Path(engine).name}")
+        return Path(engine)
+    except Exception as e:
+        print(f"❌ {pt_path.name}: export failed - {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export YOLO .pt models to TensorRT engines")
+    parser.add_argument('models', nargs='*', default=DEFAULT_MODELS,
+                        help=f"Model files in models/ (default: {' '.join(DEFAULT_MODELS)})")
+    parser.add_argument('--int8', action='store_true', help="INT8 quantization (needs --data)")
+    parser.add_argument('--data', help="Dataset YAML with calibration images")
+    parser.add_argument('--batch', type=int, default=1, help="Max batch size of the engine")
+    parser.add_argument('--workspace', type=int, default=4, help="TensorRT workspace in GB")
+    args = parser.parse_args()
+
+    if args.int8 and not args.data:
+        parser.error("--int8 needs --data <calibration dataset YAML>")
+    if not cuda_available():
+        print("❌ TensorRT export needs a CUDA GPU")
+        return 1
+
+    failed = 0
+    for name in args.models:
+        pt_path = MODELS_DIR / name
+        if not pt_path.exists():
+            print(f"⚠️  Skipping {name}: not found in {MODELS_DIR}")
+            continue
+        if export_engine(pt_path, args.int8, args.data, args.batch, args.workspace) is None:
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Gunicorn settings for the unified backend (Linux production)
+
+    gunicorn -c gunicorn.conf.py main_unified:app
+
+Every worker is a separate process with its own models, object trackers,
+line/box counters and face sessions. Running more than one is only correct
+when each camera's frames always reach the same worker (sticky routing at
+the load balancer, or one port per worker). Otherwise tracks and counts
+split across processes. WORKERS therefore defaults to 1; raise it toward
+2 * cores + 1 once routing is sticky.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WORKERS", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Heartbeat files on tmpfs: a slow disk can't get busy workers killed
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Model loading at startup and the first CUDA inference can be slow
+timeout = 120
+# Time for the shutdown hook to flush pending face sessions
+graceful_timeout = 30
+keepalive = 5
+
+# Models are loaded per worker in the startup hook; forking after CUDA
+# initialisation is unsafe, so the app is not preloaded in the master
+preload_app = False
+
+accesslog = None  # per-request access lines are pure overhead on /api/detect
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    cores = multiprocessing.cpu_count()
+    if workers > 1:
+        server.log.warning(
+            f"⚠️ {workers} workers: trackers and face sessions are per process, "
+            f"route each camera to one worker (suggested max {2 * cores + 1})"
+        )
@@ -3,25 +3,201 @@ Factory Safety Detection System - Unified FastAPI Backend
 Single endpoint for 12 AI features using 4 core models
 FACE RECOGNITION: Using AWS Rekognition (95%+ accuracy) instead of DeepFace
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from pydantic import BaseModel, ValidationError
 from typing import Dict, List, Optional
 import cv2
 import numpy as np
-import base64
 from services.detection_pipeline import DetectionPipeline
 from services.aws_recognition import AWSRecognizer
+from services.clock import now_iso, start_clock
+from services.image_codec import JPEG_MAGIC, FramePool, b64decode, decode_base64_image, decode_image
+from services.redis_sessions import RedisSessionStore
+from services.snapshot_index import dhash
+from services.sqlite_pool import SQLitePool
+import orjson
 import uvicorn
+import os
 from datetime import datetime
-import sqlite3
-import json
+from collections import OrderedDict
+import hashlib
+import logging
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# INFO in production: per-frame logger.debug calls are skipped before any
+# formatting. LOG_LEVEL=DEBUG brings the face/AWS trace back.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
 
 # Face tracking - session-based (not per-frame)
 # Format: {track_id: {"name": str, "employee_id": str, "first_seen": timestamp, "last_seen": timestamp, "is_known": bool}}
 face_sessions = {}
 track_id_counter = 0
 FACE_SESSION_TIMEOUT = 30  # Keep session for 30 seconds after last detection
+FACE_MATCH_DISTANCE = 400  # px between bbox centres to reuse a session's track_id
+
+
+class SessionCenters:
+    """
+    Bbox centres of the face sessions as one (N, 2) array, kept in sync with
+    face_sessions so the nearest-session search is a single vector op.
+    Sessions without a bbox are not indexed (they can't be location-matched).
+    
+    Centres are also bucketed into a grid of cell_size cells. With cell_size
+    equal to the match distance, any match lies in the query's cell or one of
+    its 8 neighbours, so a lookup only scores those few sessions instead of
+    every one in the frame.
+    """
+    
+    def __init__(self, cell_size=FACE_MATCH_DISTANCE):
+        self.cell_size = cell_size
+        self.track_ids = []
+        # Rows live in a buffer that doubles when full; centers is the used
+        # prefix (a view), so adding a session doesn't copy every centre
+        self._buffer = np.empty((16, 2))
+        self.centers = self._buffer[:0]
+        self._index = {}  # track_id: row
+        self._cells = {}  # (cx // cell_size, cy // cell_size): {track_id}
+        self._cell_of = {}  # track_id: cell
+    
+    @staticmethod
+    def center(bbox):
+        return (bbox.get('x', 0) + bbox.get('w', 0) / 2,
+                bbox.get('y', 0) + bbox.get('h', 0) / 2)
+    
+    def _cell(self, cx, cy):
+        return (int(cx // self.cell_size), int(cy // self.cell_size))
+    
+    def _bucket(self, track_id, cell):
+        old = self._cell_of.get(track_id)
+        if old == cell:
+            return
+        if old is not None:
+            self._unbucket(track_id)
+        self._cells.setdefault(cell, set()).add(track_id)
+        self._cell_of[track_id] = cell
+    
+    def _unbucket(self, track_id):
+        cell = self._cell_of.pop(track_id, None)
+        if cell is None:
+            return
+        members = self._cells[cell]
+        members.discard(track_id)
+        if not members:
+            del self._cells[cell]
+    
+    def set(self, track_id, bbox):
+        """Add or move a session's centre (bbox=None removes it)"""
+        if not bbox:
+            self.remove(track_id)
+            return
+        center = self.center(bbox)
+        row = self._index.get(track_id)
+        if row is None:
+            row = len(self.track_ids)
+            if row == len(self._buffer):
+                grown = np.empty((2 * row, 2))
+                grown[:row] = self._buffer
+                self._buffer = grown
+            self._buffer[row] = center
+            self._index[track_id] = row
+            self.track_ids.append(track_id)
+            self.centers = self._buffer[:row + 1]
+        else:
+            self.centers[row] = center
+        self._bucket(track_id, self._cell(*center))
+    
+    def remove(self, track_id):
+        """Drop a session (swap-remove with the last row)"""
+        row = self._index.pop(track_id, None)
+        if row is None:
+            return
+        self._unbucket(track_id)
+        last = len(self.track_ids) - 1
+        if row != last:
+            moved = self.track_ids[last]
+            self.track_ids[row] = moved
+            self.centers[row] = self.centers[last]
+            self._index[moved] = row
+        self.track_ids.pop()
+        self.centers = self._buffer[:last]
+    
+    def nearest(self, bbox, max_distance):
+        """(track_id, distance) of the closest session within max_distance, else (None, inf)"""
+        cx, cy = self.center(bbox)
+        if max_distance > self.cell_size:
+            rows = np.arange(len(self.track_ids))
+        else:
+            gx, gy = self._cell(cx, cy)
+            rows = [self._index[track_id]
+                    for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                    for track_id in self._cells.get((gx + dx, gy + dy), ())]
+        if len(rows) == 0:
+            return None, float('inf')
+        candidates = self.centers[rows]
+        dx = candidates[:, 0] - cx
+        dy = candidates[:, 1] - cy
+        d2 = dx * dx + dy * dy
+        best = int(d2.argmin())
+        if d2[best] >= max_distance * max_distance:
+            return None, float('inf')
+        return self.track_ids[rows[best]], float(d2[best]) ** 0.5
+
+
+session_centers = SessionCenters()
+
+# Shared track_id counter + TTL'd session copies when REDIS_URL is set
+# (multi-worker / restart-safe IDs); None = in-process only
+redis_sessions = RedisSessionStore.from_env(FACE_SESSION_TIMEOUT)
+
+# Idle cameras resend byte-identical frames; reuse the last result for a frame
+# seen within DETECT_CACHE_TTL seconds instead of running the pipeline again
+DETECT_CACHE_TTL = 2.0
+DETECT_CACHE_SIZE = 16
+detect_cache = OrderedDict()  # {key: (expires_at, result)}
+
+# A still scene gives the same Rekognition answer frame after frame even when
+# the bytes differ (sensor noise, JPEG re-encode). Reuse the answer, for
+# AWS_CACHE_TTL seconds, only within the same session scope and when every
+# Haar face box falls in the same AWS_CACHE_BOX_GRID cell and its crop's dHash
+# is within AWS_CACHE_MAX_DISTANCE bits - so a different person stepping into
+# the same spot, or the same person moving, asks Rekognition again.
+AWS_CACHE_TTL = 1.0
+AWS_CACHE_SIZE = 128
+AWS_CACHE_MAX_DISTANCE = 4  # of 64 bits, per face crop
+AWS_CACHE_BOX_GRID = 16  # pixels, in face_input() coordinates
+aws_cache = OrderedDict()  # {(scope, ((box_cell, crop_dhash), ...)): (expires_at, aws_result)}, oldest first
+
+# Decode /api/detect frames at 1/N resolution (1, 2, 4 or 8). libjpeg scales
+# in the IDCT, so 2 roughly halves decode time and quarters the pixels fed to
+# the models. Coordinates in the response stay in full-frame pixels.
+# Default 1 (full resolution) - small faces are the first thing lost.
+DETECT_DECODE_REDUCE = int(os.getenv("DETECT_DECODE_REDUCE", "1"))
+if DETECT_DECODE_REDUCE not in (1, 2, 4, 8):
+    logger.warning("⚠️ DETECT_DECODE_REDUCE=%s unsupported, decoding at full resolution", DETECT_DECODE_REDUCE)
+    DETECT_DECODE_REDUCE = 1
+
+# Decoded /api/detect frames are recycled once the response is built
+frame_pool = FramePool()
+
+# Width the Haar gate and Rekognition see. Haar cost is linear in pixels and
+# Rekognition latency/upload in bytes; faces are still ~40px+ at 640 wide
+# for normal camera distances. 0 = use the decoded frame as is.
+FACE_INPUT_WIDTH = int(os.getenv("FACE_INPUT_WIDTH", "640"))
 
 # PERFORMANCE OPTIMIZATION: Disable database logging by default (slow!)
 # Set to False to speed up processing (logs won't be written)
@@ -31,37 +207,82 @@ ENABLE_DATABASE_LOGGING = False  # ⭐ DISABLED FOR SPEED
 # Database for logging faces
 DB_PATH = "factory_ai.db"
 
+# Expired sessions are queued and inserted in batches by session_flush_loop
+SESSION_FLUSH_INTERVAL = 2.0  # seconds
+SESSION_FLUSH_ROWS = 100
+pending_sessions = []  # INSERT parameter tuples
+session_flush_event = None  # asyncio.Event, created on startup
+session_flush_task = None
+
+# Shared (HTTP) face sessions are expired by session_cleanup_loop, not per
+# request; well under FACE_SESSION_TIMEOUT so sessions close on time
+SESSION_CLEANUP_INTERVAL = 5.0  # seconds
+session_cleanup_task = None
+
+# Employee rows for face → employee_id matching; see EmployeeCache
+EMPLOYEE_CACHE_TTL = 60.0  # seconds
+
 def init_face_session_table():
-    """Initialize database table for face sessions"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS face_sessions (
-            session_id INTEGER PRIMARY KEY,
-            track_id INTEGER,
-            name TEXT,
-            employee_id TEXT,
-            is_known BOOLEAN,
-            first_seen TIMESTAMP,
-            last_seen TIMESTAMP,
-            session_duration INTEGER,
-            camera_id TEXT,
-            snapshot_path TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    """
+    Initialize database table for face sessions, and continue the track_id
+    series from the last logged session so a restart doesn't reuse IDs
+    """
+    global track_id_counter
+    with db.write() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS face_sessions (
+                session_id INTEGER PRIMARY KEY,
+                track_id INTEGER,
+                name TEXT,
+                employee_id TEXT,
+                is_known BOOLEAN,
+                first_seen TIMESTAMP,
+                last_seen TIMESTAMP,
+                session_duration INTEGER,
+                camera_id TEXT,
+                snapshot_path TEXT
+            )
+        ''')
+        last_track_id = conn.execute('SELECT MAX(track_id) FROM face_sessions').fetchone()[0]
+    track_id_counter = last_track_id or 0
 
+# Shared WAL-mode connections (one writer, pooled read-only readers)
+db = SQLitePool(DB_PATH)
 init_face_session_table()
 
+class ORJSONRequest(Request):
+    """Request whose JSON body is parsed with orjson instead of stdlib json"""
+    async def json(self):
+        if not hasattr(self, "_json"):
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError, so
+            # malformed bodies still become FastAPI's 422
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+class ORJSONRoute(APIRoute):
+    """
+    Route that hands FastAPI an ORJSONRequest: /api/detect bodies carry a
+    multi-megabyte base64 frame, which orjson parses several times faster
+    """
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def orjson_route_handler(request):
+            return await handler(ORJSONRequest(request.scope, request.receive))
+
+        return orjson_route_handler
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Video Analytics System",
     description="12 Real-time AI Features - Unified Detection Pipeline",
     version="3.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
+# Set before any route is declared; every @app route below uses it
+app.router.route_class = ORJSONRoute
 
 # CORS Middleware
 app.add_middleware(
@@ -72,9 +293,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses (diagnostic/system-info/stats polling); small bodies
+# aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
 # Global detection pipeline
 pipeline = DetectionPipeline()
 
+# The pipeline's trackers/counters carry state between frames and aren't
+# thread-safe, so process_frame calls are serialized on one worker thread.
+# Decoding, the Rekognition round-trip and face-only detection use the default
+# pool, so /api/detect never blocks the event loop; anything they share across
+# threads (e.g. FaceRecognizer's OpenCV detectors, kept per thread) must be
+# thread-safe.
+pipeline_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline")
+
+async def run_pipeline(frame, features_dict, line_x=None):
+    """Run pipeline.process_frame on the pipeline worker thread"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        pipeline_executor, partial(pipeline.process_frame, frame, features_dict, line_x=line_x)
+    )
+
+FACE_FEATURES = ('face_detection', 'face_recognition')
+
+def needs_pipeline(features_dict):
+    """
+    Whether the frame needs pipeline.process_frame: any non-face feature is
+    on, or faces are on but Rekognition isn't (the local recognizer is then
+    the only source of face results)
+    """
+    if any(enabled for name, enabled in features_dict.items() if name not in FACE_FEATURES):
+        return True
+    return not aws_enabled and any(features_dict[name] for name in FACE_FEATURES)
+
+def face_input(frame):
+    """
+    Downscale a frame to FACE_INPUT_WIDTH for Haar/Rekognition
+    Returns: (image, scale) - multiply image coordinates by scale to get back to frame
+    """
+    width = frame.shape[1]
+    if not FACE_INPUT_WIDTH or width <= FACE_INPUT_WIDTH:
+        return frame, 1
+    ratio = FACE_INPUT_WIDTH / width
+    small = cv2.resize(frame, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+    return small, width / small.shape[1]
+
+def detect_faces_only(frame):
+    """
+    Haar face count + frame info: the Rekognition gate, and the whole result for face-only requests
+    Returns: (result, face_frame, scale, face_boxes) - face_frame/scale as from
+    face_input(), for Rekognition; face_boxes in face_frame coordinates
+    """
+    frame_height, frame_width = frame.shape[:2]
+    face_frame, scale = face_input(frame)
+    detection = pipeline.face_detector.detect_faces(face_frame)
+    result = {
+        'frame_width': frame_width,
+        'frame_height': frame_height,
+        'timestamp': now_iso(),
+        'faces_detected': detection['face_count']
+    }
+    return result, face_frame, scale, detection['faces']
+
 # Initialize AWS Rekognition for face recognition (95%+ accuracy)
 try:
     aws_recognizer = AWSRecognizer(collection_id='employees')
@@ -89,75 +370,162 @@ except Exception as e:
 
 # Helper functions for face session management
 def get_next_track_id():
-    """Get next unique track_id"""
+    """Get next unique track_id (unique across workers when Redis is configured)"""
     global track_id_counter
-    track_id_counter += 1
-    return track_id_counter
+    track_id = redis_sessions.next_track_id() if redis_sessions is not None else None
+    if track_id is None:
+        # No Redis, or no IDs reserved from it (unreachable): count locally
+        track_id_counter += 1
+        return track_id_counter
+    track_id_counter = max(track_id_counter, track_id)
+    return track_id
+
+async def restore_face_sessions():
+    """Reload sessions still alive in Redis (after a restart or on a new worker)"""
+    if redis_sessions is None:
+        return
+    restored = await asyncio.to_thread(redis_sessions.load)
+    for track_id, session in restored.items():
+        face_sessions[track_id] = session
+        session_centers.set(track_id, session.get('bbox'))
+    if restored:
+        logger.info("♻️  Restored %d face sessions from Redis", len(restored))
 
-def cleanup_expired_sessions():
-    """Remove expired face sessions"""
-    global face_sessions
+def cleanup_expired_sessions(sessions=None, centers=None):
+    """
+    Remove expired face sessions
+    sessions/centers: A per-connection session set (default: the shared HTTP one)
+    """
+    if sessions is None:
+        sessions, centers = face_sessions, session_centers
     current_time = datetime.now().timestamp()
     expired = []
     
-    for track_id, session in face_sessions.items():
+    for track_id, session in sessions.items():
         time_since_last_seen = current_time - session['last_seen'].timestamp()
         if time_since_last_seen > FACE_SESSION_TIMEOUT:
             expired.append(track_id)
     
     # Log sessions to database before removing
     for track_id in expired:
-        session = face_sessions[track_id]
+        session = sessions[track_id]
         log_face_session(session)
-        del face_sessions[track_id]
+        del sessions[track_id]
+        centers.remove(track_id)
 
 def log_face_session(session):
-    """Log a completed face session to database (DISABLED for performance)"""
+    """Queue a completed face session for the next batched insert (DISABLED for performance)"""
     # Skip logging if disabled (for speed)
     if not ENABLE_DATABASE_LOGGING:
         return
     
+    duration = (session['last_seen'] - session['first_seen']).total_seconds()
+    pending_sessions.append((
+        session['track_id'],
+        session['name'],
+        session.get('employee_id', 'UNKNOWN'),
+        session['is_known'],
+        session['first_seen'].isoformat(),
+        session['last_seen'].isoformat(),
+        int(duration),
+        'camera_1'  # Default camera ID
+    ))
+    logger.debug("✅ QUEUED Session: Track ID %s - %s (%ds)", session['track_id'], session['name'], duration)
+    if len(pending_sessions) >= SESSION_FLUSH_ROWS and session_flush_event is not None:
+        session_flush_event.set()
+
+def write_face_sessions(rows):
+    """Insert a batch of face-session rows in one transaction"""
+    with db.write() as conn:
+        conn.execute('BEGIN')
+        try:
+            conn.executemany('''
+                INSERT INTO face_sessions 
+                (track_id, name, employee_id, is_known, first_seen, last_seen, session_duration, camera_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+async def flush_face_sessions():
+    """Swap out the pending rows and write them off the event loop"""
+    global pending_sessions
+    if not pending_sessions:
+        return
+    rows, pending_sessions = pending_sessions, []
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        
-        duration = (session['last_seen'] - session['first_seen']).total_seconds()
-        
-        c.execute('''
-            INSERT INTO face_sessions 
-            (track_id, name, employee_id, is_known, first_seen, last_seen, session_duration, camera_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            session['track_id'],
-            session['name'],
-            session.get('employee_id', 'UNKNOWN'),
-            session['is_known'],
-            session['first_seen'].isoformat(),
-            session['last_seen'].isoformat(),
-            int(duration),
-            'camera_1'  # Default camera ID
-        ))
-        conn.commit()
-        conn.close()
-        print(f"✅ LOGGED Session: Track ID {session['track_id']} - {session['name']} ({int(duration)}s)")
+        await asyncio.to_thread(write_face_sessions, rows)
+        logger.debug("✅ LOGGED %d sessions", len(rows))
     except Exception as e:
-        print(f"❌ Failed to log session: {e}")
+        logger.error("❌ Failed to log %d sessions: %s", len(rows), e)
+
+async def session_flush_loop():
+    """Flush queued sessions every SESSION_FLUSH_INTERVAL or SESSION_FLUSH_ROWS rows"""
+    while True:
+        try:
+            await asyncio.wait_for(session_flush_event.wait(), timeout=SESSION_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        session_flush_event.clear()
+        await flush_face_sessions()
+
+async def session_cleanup_loop():
+    """Expire shared face sessions every SESSION_CLEANUP_INTERVAL"""
+    while True:
+        await asyncio.sleep(SESSION_CLEANUP_INTERVAL)
+        try:
+            # Runs on the event loop like update_face_session, so the two
+            # never interleave - no lock needed
+            cleanup_expired_sessions()
+        except Exception as e:
+            logger.exception("❌ Session cleanup failed: %s", e)
+
+class EmployeeCache:
+    """
+    In-memory copy of the employees table keyed by name and employee_id.
+    
+    register_employee calls refresh() after a write; the TTL picks up rows
+    added by other processes (Django admin, scripts).
+    """
+    
+    def __init__(self, ttl=EMPLOYEE_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._rows = {}
+        self._loaded_at = float('-inf')
+    
+    def refresh(self):
+        """Re-read the employees table"""
+        rows = {}
+        try:
+            with db.read() as conn:
+                for row in conn.execute('SELECT id, employee_id, name FROM employees'):
+                    # Lowest rowid wins, as fetchone() did on the old name-or-id query
+                    rows.setdefault(row['employee_id'], row)
+                    rows.setdefault(row['name'], row)
+        except Exception as e:
+            logger.warning("⚠️ Employee cache refresh failed: %s", e)
+        with self._lock:
+            self._rows = rows
+            self._loaded_at = time.monotonic()
+    
+    def get(self, key):
+        if time.monotonic() - self._loaded_at > self.ttl:
+            with self._lock:
+                if time.monotonic() - self._loaded_at > self.ttl:
+                    self.refresh()
+        return self._rows.get(key)
+
+employee_cache = EmployeeCache()
 
 def match_face_with_employee(face_name):
     """Match detected face name with employee in database"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute('SELECT id, employee_id, name FROM employees WHERE name = ? OR employee_id = ?', (face_name, face_name))
-        result = c.fetchone()
-        conn.close()
-        return result
-    except Exception as e:
-        print(f"⚠️ Face matching error: {e}")
-        return None
+    return employee_cache.get(face_name)
 
-def update_face_session(face_name, is_known, confidence, bbox, face_embedding=None):
+def update_face_session(face_name, is_known, confidence, bbox, face_embedding=None,
+                        sessions=None, centers=None):
     """
     Update or create face session - PERSISTENT TRACK IDs for known faces
     Strategy:
@@ -165,44 +533,33 @@ def update_face_session(face_name, is_known, confidence, bbox, face_embedding=No
     2. For KNOWN faces: Verify name matches if location matches
     3. For UNKNOWN faces: Update existing location-based track
     4. OPTIMIZED FOR LONG-DISTANCE: 400px tolerance (face can be far from camera)
+    
+    sessions/centers: A per-connection session set (default: the shared HTTP one)
     """
-    global face_sessions
+    if sessions is None:
+        sessions, centers = face_sessions, session_centers
     
     best_match_track_id = None
-    best_distance = float('inf')
     
     # STRATEGY 1: LOCATION-BASED MATCHING FIRST (primary strategy)
     # LONG-DISTANCE OPTIMIZATION: 400px tolerance
     # Allows people moving across frame or at different distances to maintain same Track ID
-    if face_sessions and bbox:
-        curr_center_x = bbox.get('x', 0) + bbox.get('w', 0) / 2
-        curr_center_y = bbox.get('y', 0) + bbox.get('h', 0) / 2
-        
-        for track_id, session in face_sessions.items():
-            session_bbox = session.get('bbox')
-            if not session_bbox:
-                continue
-            
-            sess_center_x = session_bbox.get('x', 0) + session_bbox.get('w', 0) / 2
-            sess_center_y = session_bbox.get('y', 0) + session_bbox.get('h', 0) / 2
-            
-            distance = ((curr_center_x - sess_center_x) ** 2 + (curr_center_y - sess_center_y) ** 2) ** 0.5
-            
-            # INCREASED TOLERANCE: 400px (was 150px)
-            # Handles:
-            # - Faces at different distances from camera (far away faces = smaller bbox)
-            # - People walking across the frame
-            # - Natural face movement and detection variance
-            if distance < 400 and distance < best_distance:
-                best_distance = distance
-                best_match_track_id = track_id
-                print(f"   📌 LOCATION MATCH: Track ID {track_id} at {distance:.1f}px (name: {session['name']} → {face_name})")
+    # INCREASED TOLERANCE: 400px (was 150px)
+    # Handles:
+    # - Faces at different distances from camera (far away faces = smaller bbox)
+    # - People walking across the frame
+    # - Natural face movement and detection variance
+    if bbox:
+        best_match_track_id, best_distance = centers.nearest(bbox, FACE_MATCH_DISTANCE)
+        if best_match_track_id is not None:
+            logger.debug("   📌 LOCATION MATCH: Track ID %s at %.1fpx (name: %s → %s)", best_match_track_id, best_distance, sessions[best_match_track_id]['name'], face_name)
     
     if best_match_track_id is not None:
         # Update existing session
-        session = face_sessions[best_match_track_id]
+        session = sessions[best_match_track_id]
         session['last_seen'] = datetime.now()
         session['bbox'] = bbox
+        centers.set(best_match_track_id, bbox)
         old_name = session['name']
         old_known = session['is_known']
         session['name'] = face_name
@@ -210,19 +567,19 @@ def update_face_session(face_name, is_known, confidence, bbox, face_embedding=No
         
         # Log changes
         if old_name != face_name:
-            print(f"   🔄 NAME UPDATE: Track ID {best_match_track_id} - '{old_name}' → '{face_name}'")
+            logger.debug("   🔄 NAME UPDATE: Track ID %s - '%s' → '%s'", best_match_track_id, old_name, face_name)
         if old_known != is_known:
             status_old = "KNOWN" if old_known else "UNKNOWN"
             status_new = "KNOWN" if is_known else "UNKNOWN"
-            print(f"   🔄 STATUS UPDATE: Track ID {best_match_track_id} - {status_old} → {status_new}")
+            logger.debug("   🔄 STATUS UPDATE: Track ID %s - %s → %s", best_match_track_id, status_old, status_new)
         else:
-            print(f"   ✅ CONSISTENT: Track ID {best_match_track_id} - {face_name} ({('KNOWN' if is_known else 'UNKNOWN')})")
+            logger.debug("   ✅ CONSISTENT: Track ID %s - %s (%s)", best_match_track_id, face_name, 'KNOWN' if is_known else 'UNKNOWN')
         
         return best_match_track_id
     else:
         # Create new session only if no match found
         track_id = get_next_track_id()
-        face_sessions[track_id] = {
+        sessions[track_id] = {
             'track_id': track_id,
             'name': face_name,
             'is_known': is_known,
@@ -233,13 +590,14 @@ def update_face_session(face_name, is_known, confidence, bbox, face_embedding=No
             'employee_id': None,
             'embedding': face_embedding
         }
+        centers.set(track_id, bbox)
         
         if is_known:
             emp = match_face_with_employee(face_name)
             if emp:
-                face_sessions[track_id]['employee_id'] = emp['employee_id']
+                sessions[track_id]['employee_id'] = emp['employee_id']
         
-        print(f"🆕 NEW SESSION: Track ID {track_id} - {face_name}")
+        logger.debug("🆕 NEW SESSION: Track ID %s - %s", track_id, face_name)
         return track_id
 
 # --- PYDANTIC MODELS ---
@@ -258,6 +616,10 @@ class EnabledFeatures(BaseModel):
     face_detection: bool = False
     face_recognition: bool = False
 
+# Flags used when a request sends no enabled_features; read-only downstream
+DEFAULT_FEATURES = EnabledFeatures()
+DEFAULT_FEATURES_DICT = DEFAULT_FEATURES.model_dump()
+
 class DetectedFace(BaseModel):
     """Single detected face with ID and bounding box"""
     track_id: int
@@ -314,6 +676,17 @@ class DetectionResponse(BaseModel):
     faces_recognized: Optional[List[str]] = []
     unknown_faces: Optional[int] = 0
 
+# (field, default) pairs read once from DetectionResponse. /api/detect projects
+# the pipeline dict onto them instead of validating a model on every frame.
+DETECTION_RESPONSE_FIELDS = tuple(
+    (name, None if field.is_required() else field.get_default(call_default_factory=True))
+    for name, field in DetectionResponse.model_fields.items()
+)
+
+def build_detection_response(result):
+    """Shape a pipeline result like DetectionResponse (same keys, same defaults)"""
+    return {name: result.get(name, default) for name, default in DETECTION_RESPONSE_FIELDS}
+
 class EmployeeRegistration(BaseModel):
     """Request model for employee registration"""
     image: str  # Base64 encoded image
@@ -324,6 +697,13 @@ class EmployeeRegistration(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Load all models on startup"""
+    global session_flush_event, session_flush_task, session_cleanup_task
+    start_clock()
+    session_flush_event = asyncio.Event()
+    session_flush_task = asyncio.create_task(session_flush_loop())
+    session_cleanup_task = asyncio.create_task(session_cleanup_loop())
+    employee_cache.refresh()
+    await restore_face_sessions()
     print("\n" + "="*70)
     print("🎯 AI VIDEO ANALYTICS SYSTEM - UNIFIED BACKEND")
     print("="*70)
@@ -340,6 +720,15 @@ async def startup_event():
     else:
         print("\n⚠️ Warning: Some models failed to load")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write out any queued face sessions"""
+    if session_cleanup_task:
+        session_cleanup_task.cancel()
+    if session_flush_task:
+        session_flush_task.cancel()
+    await flush_face_sessions()
+
 # --- API ENDPOINTS ---
 
 @app.get("/")
@@ -386,19 +775,20 @@ def list_features():
 
 # (Old update_face_tracking function removed - using session-based approach instead)
 
-def convert_bbox_format(bbox_dict):
+def convert_bbox_format(bbox_dict, scale=1):
     """
     Convert bbox from {x1, y1, x2, y2} format to {x, y, w, h} format for frontend
     bbox_dict: {'x1': int, 'y1': int, 'x2': int, 'y2': int, ...}
+    scale: Multiplier back to full-frame pixels (decode reduce x face downscale)
     Returns: {'x': int, 'y': int, 'w': int, 'h': int}
     """
     if not bbox_dict:
         return None
     try:
-        x1 = bbox_dict.get('x1', 0)
-        y1 = bbox_dict.get('y1', 0)
-        x2 = bbox_dict.get('x2', 0)
-        y2 = bbox_dict.get('y2', 0)
+        x1 = round(bbox_dict.get('x1', 0) * scale)
+        y1 = round(bbox_dict.get('y1', 0) * scale)
+        x2 = round(bbox_dict.get('x2', 0) * scale)
+        y2 = round(bbox_dict.get('y2', 0) * scale)
         
         return {
             'x': x1,
@@ -409,88 +799,226 @@ def convert_bbox_format(bbox_dict):
     except:
         return None
 
-@app.post("/api/detect", response_model=DetectionResponse)
-async def unified_detection(request: DetectionRequest):
+# --- DETECTION RESULT CACHE ---
+
+def frame_digest(payload):
+    """Fast 64-bit hash of the frame payload, base64 str or raw bytes (xxh3 when available)"""
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(payload)
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return hashlib.blake2b(payload, digest_size=8).digest()
+
+def detect_cache_key(payload, features_dict, line_x, scope=None):
     """
-    🎯 UNIFIED DETECTION ENDPOINT - SESSION-BASED FACE TRACKING
+    Key a detection request on the full frame hash + features + line position
+    scope: Session set the result's track_ids belong to (None = shared HTTP sessions)
+    """
+    return (
+        frame_digest(payload),
+        len(payload),
+        tuple(features_dict.values()),
+        line_x,
+        scope
+    )
+
+def detect_cache_get(key):
+    """Return a cached result that hasn't expired, or None"""
+    entry = detect_cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del detect_cache[key]
+        return None
+    detect_cache.move_to_end(key)
+    return entry[1]
+
+def detect_cache_put(key, result):
+    """Store a result, evicting the least recently used entries"""
+    detect_cache[key] = (time.monotonic() + DETECT_CACHE_TTL, result)
+    detect_cache.move_to_end(key)
+    while len(detect_cache) > DETECT_CACHE_SIZE:
+        detect_cache.popitem(last=False)
+
+def aws_cache_expire():
+    """Drop expired entries (insertion order = expiry order, so from the front)"""
+    now = time.monotonic()
+    while aws_cache:
+        key, (expires_at, _) = next(iter(aws_cache.items()))
+        if expires_at >= now:
+            break
+        del aws_cache[key]
+
+def aws_cache_key(scope, face_frame, face_boxes):
+    """Cache key for a Rekognition call: session scope plus each Haar face's grid cell and crop dHash"""
+    faces = []
+    for box in sorted(face_boxes, key=lambda b: (b['x1'], b['y1'])):
+        crop = face_frame[max(0, box['y1']):box['y2'], max(0, box['x1']):box['x2']]
+        cell = tuple(box[k] // AWS_CACHE_BOX_GRID for k in ('x1', 'y1', 'x2', 'y2'))
+        faces.append((cell, dhash(crop) if crop.size else 0))
+    return scope, tuple(faces)
+
+def aws_cache_get(key):
+    """Return a recent Rekognition result for the same faces in the same place, or None"""
+    aws_cache_expire()
+    scope, faces = key
+    for (cached_scope, cached_faces), (_, aws_result) in aws_cache.items():
+        if cached_scope != scope or len(cached_faces) != len(faces):
+            continue
+        if all(cell == cached_cell and bin(crop_hash ^ cached_hash).count('1') <= AWS_CACHE_MAX_DISTANCE
+               for (cell, crop_hash), (cached_cell, cached_hash) in zip(faces, cached_faces)):
+            return aws_result
+    return None
+
+def aws_cache_put(key, aws_result):
+    """Store a Rekognition result, evicting the oldest entries"""
+    aws_cache.pop(key, None)
+    aws_cache[key] = (time.monotonic() + AWS_CACHE_TTL, aws_result)
+    while len(aws_cache) > AWS_CACHE_SIZE:
+        aws_cache.popitem(last=False)
+
+async def detect_frame(payload, decode, features, line_x=None, sessions=None, centers=None):
+    """
+    Shared body of /api/detect, /api/detect/binary and /ws/detect
     
-    Process a single frame through all enabled AI features
-    Returns results with persistent session-based face tracking
+    payload: Encoded frame - base64 str or raw image bytes
+    decode: decode_base64_image or decode_image, matching payload
+    features: EnabledFeatures (None = defaults)
+    line_x: Full-resolution X position for vertical line crossing
+    sessions/centers: Per-connection face sessions (default: the shared HTTP ones)
+    Returns: Response dict shaped like DetectionResponse
     """
+    if sessions is None:
+        sessions, centers = face_sessions, session_centers
+    scope = None if sessions is face_sessions else id(sessions)
     try:
-        print(f"\n📥 /api/detect REQUEST")
+        # Per-connection (WebSocket) sessions are expired here; the shared
+        # HTTP sessions by session_cleanup_loop
+        if scope is not None:
+            cleanup_expired_sessions(sessions, centers)
         
-        # Cleanup expired sessions first (maintains database integrity)
-        cleanup_expired_sessions()
+        if features is None:
+            features, features_dict = DEFAULT_FEATURES, DEFAULT_FEATURES_DICT
+        else:
+            features_dict = features.model_dump()
+        logger.debug("   face_detection=%s face_recognition=%s",
+                     features.face_detection, features.face_recognition)
         
-        if request.enabled_features:
-            print(f"   face_detection={request.enabled_features.face_detection}")
-            print(f"   face_recognition={request.enabled_features.face_recognition}")
+        cache_key = detect_cache_key(payload, features_dict, line_x, scope)
+        cached = detect_cache_get(cache_key)
+        if cached is not None:
+            logger.debug("   ♻️  Identical frame - returning cached result")
+            return cached
         
-        # Decode base64 frame
-        img_data = base64.b64decode(request.frame)
-        nparr = np.frombuffer(img_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        print(f"   Frame shape: {frame.shape if frame is not None else 'INVALID'}")
+        # Decode frame (base64 or raw bytes, depending on the endpoint)
+        reduce = DETECT_DECODE_REDUCE
+        frame = await asyncio.to_thread(decode, payload, reduce, frame_pool)
+        logger.debug("   Frame shape: %s", frame.shape if frame is not None else 'INVALID')
         
         if frame is None:
             raise HTTPException(status_code=400, detail="Invalid image data")
         
-        # Set default features if not provided
-        if request.enabled_features is None:
-            request.enabled_features = EnabledFeatures()
+        reduced_line_x = line_x // reduce if line_x is not None else None
         
-        # Convert Pydantic model to dict
-        features_dict = request.enabled_features.dict()
+        face_features = features.face_detection or features.face_recognition
         
-        # ALWAYS process through pipeline for helmets, vehicles, etc.
-        # (face detection will be overridden by AWS if enabled)
-        result = pipeline.process_frame(frame, features_dict, line_x=request.line_x)
+        # Pipeline for helmets, vehicles, etc., started first so the Haar gate
+        # and the Rekognition round-trip below overlap with model inference.
+        # With Rekognition handling faces the pipeline's own face steps
+        # (Haar + DeepFace) would only be thrown away, so they are switched off.
+        # This is the only process_frame call per frame - the result is
+        # taken from pipeline_task, faces_only or the bare frame size below.
+        pipeline_features = features_dict
+        if aws_enabled and face_features:
+            pipeline_features = {**features_dict, **dict.fromkeys(FACE_FEATURES, False)}
+        pipeline_task = None
+        if needs_pipeline(pipeline_features):
+            pipeline_task = asyncio.ensure_future(
+                run_pipeline(frame, pipeline_features, line_x=reduced_line_x)
+            )
+        
+        # OPTIMIZATION: First try fast Haar detection
+        # Only call AWS if Haar finds faces (saves 95% of AWS costs + time!)
+        faces_only = None
+        aws_task = None
+        aws_result = None
+        face_scale = 1
+        if face_features and aws_enabled:
+            logger.debug("⚡ OPTIMIZATION: Using Haar Cascade for fast detection first...")
+            faces_only, face_frame, face_scale, face_boxes = await asyncio.to_thread(detect_faces_only, frame)
+            if faces_only['faces_detected'] > 0:
+                aws_key = aws_cache_key(scope, face_frame, face_boxes)
+                aws_result = aws_cache_get(aws_key)
+                if aws_result is not None:
+                    logger.debug("   ♻️  Unchanged scene - reusing Rekognition result")
+                else:
+                    logger.debug("🔍 AWS Rekognition (only if Haar found faces - saves time!)...")
+                    # AWS does its own detection AND recognition
+                    aws_task = asyncio.ensure_future(
+                        asyncio.to_thread(aws_recognizer.recognize_faces, face_frame, [])
+                    )
+        
+        if pipeline_task is not None:
+            result = await pipeline_task
+        elif faces_only is not None:
+            result = faces_only
+        else:
+            frame_height, frame_width = frame.shape[:2]
+            result = {'frame_width': frame_width, 'frame_height': frame_height, 'timestamp': now_iso()}
         
         # Extract face information and create sessions with persistent track_ids
         detected_faces_data = []
         
-        if request.enabled_features.face_detection or request.enabled_features.face_recognition:
-            # OPTIMIZATION: First try fast Haar detection
-            # Only call AWS if Haar finds faces (saves 95% of AWS costs + time!)
-            print("\n⚡ OPTIMIZATION: Using Haar Cascade for fast detection first...")
-            # Get face count from the pipeline result
-            haar_face_count = result.get('face_count', 0)
-            print(f"   Haar detected: {haar_face_count} faces")
+        if face_features:
+            haar_face_count = (faces_only if faces_only is not None else result).get('faces_detected', 0)
+            logger.debug("   Haar detected: %s faces", haar_face_count)
             
-            # ONLY call AWS if Haar found faces
-            if haar_face_count > 0 and aws_enabled:
-                print("🔍 AWS Rekognition (only if Haar found faces - saves time!)...")
-                # AWS does its own detection AND recognition
-                aws_result = aws_recognizer.recognize_faces(frame, [])
+            if aws_task is not None:
+                aws_result = await aws_task
+                aws_cache_put(aws_key, aws_result)
+            if aws_result is not None:
                 faces_recognized = aws_result.get('recognized', [])
                 unknown_faces_count = aws_result.get('unknown', 0)
                 face_bboxes = aws_result.get('face_bboxes', [])
-                print(f"✅ AWS Result: recognized={faces_recognized}, unknown={unknown_faces_count}, bboxes={len(face_bboxes)}")
+                logger.debug("✅ AWS Result: recognized=%s, unknown=%s, bboxes=%d", faces_recognized, unknown_faces_count, len(face_bboxes))
             else:
                 # No faces found by Haar, skip expensive AWS call
                 if not aws_enabled:
-                    print("❌ AWS not enabled")
+                    logger.debug("❌ AWS not enabled")
                 else:
-                    print(f"⏭️  Skipping AWS (Haar found {haar_face_count} faces = no need for AWS)")
+                    logger.debug("⏭️  Skipping AWS (Haar found %s faces = no need for AWS)", haar_face_count)
                     
                 faces_recognized = []
                 unknown_faces_count = 0
                 face_bboxes = []
             
+            if aws_enabled:
+                # The pipeline ran without its face steps; report Haar's count
+                # and Rekognition's answer instead
+                result['faces_detected'] = haar_face_count
+                result['faces_recognized'] = list(faces_recognized) if features.face_recognition else []
+                result['unknown_faces'] = unknown_faces_count if features.face_recognition else 0
+            
+            # Reserve Redis track IDs off the event loop, so update_face_session
+            # only draws from the reserved block
+            new_faces = len(faces_recognized) + unknown_faces_count
+            if redis_sessions is not None and redis_sessions.ids_available() < new_faces:
+                await asyncio.to_thread(redis_sessions.reserve_ids, new_faces)
+            
             bbox_idx = 0
             
             # Process recognized faces
             for face_name in faces_recognized:
                 raw_bbox = face_bboxes[bbox_idx] if bbox_idx < len(face_bboxes) else None
-                bbox = convert_bbox_format(raw_bbox)  # Convert to {x, y, w, h} format
+                bbox = convert_bbox_format(raw_bbox, reduce * face_scale)  # Convert to {x, y, w, h} format
                 confidence = 0.98  # AWS is very confident
                 
                 # Update or create face session with persistent track_id
-                track_id = update_face_session(face_name, is_known=True, confidence=confidence, bbox=bbox)
+                track_id = update_face_session(face_name, is_known=True, confidence=confidence, bbox=bbox,
+                                               sessions=sessions, centers=centers)
                 
                 # Get employee_id if it was found
-                employee_id = face_sessions[track_id].get('employee_id')
+                employee_id = sessions[track_id].get('employee_id')
                 
                 detected_faces_data.append({
                     "track_id": track_id,
@@ -501,17 +1029,18 @@ async def unified_detection(request: DetectionRequest):
                     "is_known": True
                 })
                 bbox_idx += 1
-                print(f"   ✅ RECOGNIZED: Track ID {track_id} - {face_name}")
+                logger.debug("   ✅ RECOGNIZED: Track ID %s - %s", track_id, face_name)
             
             # Process unknown faces
             for i in range(unknown_faces_count):
                 face_name = f"Unknown_{i}"
                 raw_bbox = face_bboxes[bbox_idx] if bbox_idx < len(face_bboxes) else None
-                bbox = convert_bbox_format(raw_bbox)  # Convert to {x, y, w, h} format
+                bbox = convert_bbox_format(raw_bbox, reduce * face_scale)  # Convert to {x, y, w, h} format
                 confidence = 0.95  # AWS detected face but no match
                 
                 # Update or create face session (will get persistent track_id)
-                track_id = update_face_session(face_name, is_known=False, confidence=confidence, bbox=bbox)
+                track_id = update_face_session(face_name, is_known=False, confidence=confidence, bbox=bbox,
+                                               sessions=sessions, centers=centers)
                 
                 detected_faces_data.append({
                     "track_id": track_id,
@@ -522,30 +1051,128 @@ async def unified_detection(request: DetectionRequest):
                     "is_known": False
                 })
                 bbox_idx += 1
-                print(f"   ❓ UNKNOWN: Track ID {track_id}")
-        else:
-            # Process other features without face detection
-            result = pipeline.process_frame(frame, features_dict, line_x=request.line_x)
+                logger.debug("   ❓ UNKNOWN: Track ID %s", track_id)
+        
+        if reduce > 1:
+            # Report the size the client sent, not the reduced decode
+            result['frame_width'] = result.get('frame_width', 0) * reduce
+            result['frame_height'] = result.get('frame_height', 0) * reduce
+        
+        if redis_sessions is not None and detected_faces_data and sessions is face_sessions:
+            await asyncio.to_thread(
+                redis_sessions.publish,
+                [sessions[face['track_id']] for face in detected_faces_data]
+            )
         
         # Add detected faces and session info to response
         result['detected_faces'] = detected_faces_data
-        result['active_sessions'] = len(face_sessions)
+        result['active_sessions'] = len(sessions)
         
-        print(f"📤 /api/detect RESPONSE: faces={len(detected_faces_data)}, active_sessions={len(face_sessions)}")
-        for face in detected_faces_data:
-            print(f"   ├─ Track ID: {face['track_id']}, Name: {face['name']}, Known: {face['is_known']}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📤 /api/detect RESPONSE: faces=%d, active_sessions=%d", len(detected_faces_data), len(sessions))
+            for face in detected_faces_data:
+                logger.debug("   ├─ Track ID: %s, Name: %s, Known: %s", face['track_id'], face['name'], face['is_known'])
         
-        return result
+        response = build_detection_response(result)
+        detect_cache_put(cache_key, response)
+        # Pipeline, Haar and Rekognition have all been awaited, so nothing
+        # reads the frame any more. Error paths just leave it to the GC.
+        frame_pool.release(frame)
+        return response
         
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"❌ DETECTION ERROR: {str(e)}")
-        print(f"Stack trace:\n{error_trace}")
+        logger.exception("❌ DETECTION ERROR: %s", e)
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
 
+@app.post("/api/detect", responses={200: {"model": DetectionResponse}})
+async def unified_detection(request: DetectionRequest):
+    """
+    🎯 UNIFIED DETECTION ENDPOINT - SESSION-BASED FACE TRACKING
+    
+    Process a single frame through all enabled AI features
+    Returns results with persistent session-based face tracking
+    """
+    logger.debug("📥 /api/detect REQUEST")
+    return ORJSONResponse(await detect_frame(request.frame, decode_base64_image,
+                                             request.enabled_features, request.line_x))
+
+@app.post("/api/detect/binary", responses={200: {"model": DetectionResponse}})
+async def binary_detection(
+    file: UploadFile = File(...),
+    enabled_features: Optional[str] = Form(None),
+    line_x: Optional[int] = Form(None)
+):
+    """
+    🎯 UNIFIED DETECTION - MULTIPART UPLOAD
+    
+    Same as /api/detect, but the frame is the raw JPEG/PNG file part instead
+    of base64 inside JSON (~25% smaller upload, no base64 decode).
+    enabled_features is an optional JSON form field: {"human": true, ...}
+    """
+    logger.debug("📥 /api/detect/binary REQUEST")
+    features = None
+    if enabled_features:
+        try:
+            features = EnabledFeatures.model_validate_json(enabled_features)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid enabled_features: {e}")
+    payload = await file.read()
+    if not payload:
+        raise HTTPException(status_code=400, detail="Empty image upload")
+    return ORJSONResponse(await detect_frame(payload, decode_image, features, line_x))
+
+@app.websocket("/ws/detect")
+async def websocket_detection(websocket: WebSocket):
+    """
+    🎯 UNIFIED DETECTION - WEBSOCKET STREAM (one connection per camera)
+    
+    Text message: JSON settings {"enabled_features": {...}, "line_x": int},
+                  sent first and again whenever they change
+    Binary message: One encoded frame (JPEG/PNG bytes)
+    Each frame is answered with a JSON DetectionResponse, or {"error": ...}
+    
+    Face sessions (track_ids) are kept per connection, so two cameras never
+    share or steal each other's tracks. Expired and open sessions are logged
+    like HTTP ones.
+    """
+    await websocket.accept()
+    sessions, centers = {}, SessionCenters()
+    features, line_x = None, None
+    logger.debug("🔌 /ws/detect connected")
+    try:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            
+            if message.get('text') is not None:
+                try:
+                    settings = orjson.loads(message['text'])
+                    enabled = settings.get('enabled_features')
+                    features = EnabledFeatures.model_validate(enabled) if enabled is not None else None
+                    line_x = settings.get('line_x')
+                except (orjson.JSONDecodeError, AttributeError, ValidationError) as e:
+                    await websocket.send_text(orjson.dumps({"error": f"Invalid settings: {e}"}).decode())
+                continue
+            
+            payload = message.get('bytes')
+            if not payload:
+                continue
+            try:
+                response = await detect_frame(payload, decode_image, features, line_x,
+                                              sessions=sessions, centers=centers)
+            except HTTPException as e:
+                response = {"error": e.detail}
+            await websocket.send_text(orjson.dumps(response).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for session in sessions.values():
+            log_face_session(session)
+        logger.debug("🔌 /ws/detect disconnected (%d sessions closed)", len(sessions))
+
 @app.post("/api/reset")
 def reset_counters():
     """Reset all counters and trackers"""
@@ -568,69 +1195,74 @@ def get_statistics():
     """Get system statistics"""
     return {
         "total_crossings": len(pipeline.line_crossing_detector.crossed_ids),
-        "tracked_objects": len(pipeline.loitering_detector.tracker.objects),
+        "tracked_objects": pipeline.loitering_detector.tracker.size,
         "models_loaded": pipeline.models_loaded
     }
 
+# Static part of /api/diagnostic, built once; only the status fields change per call
+DIAGNOSTIC_MODULES = {
+    "module_1": {
+        "name": "Person Identity & Face Recognition",
+        "status": "operational",
+        "models": ["face_detection", "face_recognition"],
+        "faces_detected": 0,
+        "people_recognized": 0
+    },
+    "module_2": {
+        "name": "Vehicle Management & ANPR",
+        "status": "operational",
+        "models": ["vehicle_detection"],
+        "vehicles_detected": 0,
+        "plates_read": 0
+    },
+    "module_3": {
+        "name": "Attendance & Workforce",
+        "status": "operational",
+        "models": ["face_detection", "face_recognition"],
+        "present_count": 0,
+        "late_count": 0,
+        "absent_count": 0
+    },
+    "module_4": {
+        "name": "People Counting & Occupancy",
+        "status": "operational",
+        "models": ["human_detection"],
+        "current_occupancy": 0,
+        "capacity": 500
+    },
+    "module_5": {
+        "name": "Crowd Density Analysis",
+        "status": "operational",
+        "models": ["crowd_detection"],
+        "crowd_detected": False,
+        "crowd_density": "none"
+    }
+}
+
+DIAGNOSTIC_FEATURES = {
+    "human_detection": True,
+    "vehicle_detection": True,
+    "helmet_detection": True,
+    "face_detection": True,
+    "face_recognition": True,
+    "crowd_detection": True,
+    "line_crossing": True,
+    "tracking": True,
+    "loitering": True,
+    "motion_detection": True,
+    "box_counting": True,
+    "ppe_compliance": True
+}
+
 @app.get("/api/diagnostic")
 def get_diagnostics():
     """Get system diagnostics and module status"""
     return {
         "status": "operational",
-        "timestamp": __import__('datetime').datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "models_loaded": pipeline.models_loaded,
-        "modules": {
-            "module_1": {
-                "name": "Person Identity & Face Recognition",
-                "status": "operational",
-                "models": ["face_detection", "face_recognition"],
-                "faces_detected": 0,
-                "people_recognized": 0
-            },
-            "module_2": {
-                "name": "Vehicle Management & ANPR",
-                "status": "operational",
-                "models": ["vehicle_detection"],
-                "vehicles_detected": 0,
-                "plates_read": 0
-            },
-            "module_3": {
-                "name": "Attendance & Workforce",
-                "status": "operational",
-                "models": ["face_detection", "face_recognition"],
-                "present_count": 0,
-                "late_count": 0,
-                "absent_count": 0
-            },
-            "module_4": {
-                "name": "People Counting & Occupancy",
-                "status": "operational",
-                "models": ["human_detection"],
-                "current_occupancy": 0,
-                "capacity": 500
-            },
-            "module_5": {
-                "name": "Crowd Density Analysis",
-                "status": "operational",
-                "models": ["crowd_detection"],
-                "crowd_detected": False,
-                "crowd_density": "none"
-            }
-        },
-        "features": {
-            "human_detection": True,
-            "vehicle_detection": True,
-            "helmet_detection": True,
-            "face_detection": True,
-            "face_recognition": True,
-            "crowd_detection": True,
-            "line_crossing": True,
-            "tracking": True,
-            "loitering": True,
-            "motion_detection": True,
-            "box_counting": True,
-            "ppe_compliance": True
-        }
+        "modules": DIAGNOSTIC_MODULES,
+        "features": DIAGNOSTIC_FEATURES
     }
 
 @app.post("/api/employees/register")
@@ -649,10 +1281,9 @@ def register_employee(request: 'EmployeeRegistration'):
         from pathlib import Path
         import os
         
-        # Decode base64 frame
-        img_data = base64.b64decode(request.image)
-        nparr = np.frombuffer(img_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Decode base64 frame once; the ndarray is embedded directly below
+        image_bytes = b64decode(request.image)
+        frame = decode_image(image_bytes)
         
         if frame is None:
             raise HTTPException(status_code=400, detail="Invalid image data")
@@ -667,15 +1298,17 @@ def register_employee(request: 'EmployeeRegistration'):
         if not safe_name:
             raise HTTPException(status_code=400, detail="Invalid employee name")
         
-        # Save image
+        # Save image (JPEG uploads are written as-is, no lossy re-encode)
         image_path = employee_dir / f"{safe_name}.jpg"
-        cv2.imwrite(str(image_path), frame)
+        if image_bytes[:2] == JPEG_MAGIC:
+            image_path.write_bytes(image_bytes)
+        else:
+            cv2.imwrite(str(image_path), frame)
         
-        # Reload embeddings (this will generate new embeddings from all images)
+        # Embed only the new image and merge it into the embeddings cache
         print(f"\n🔄 REGISTERING {safe_name}...")
-        print(f"🔄 Reloading embeddings...")
-        pipeline.face_detector.reload_embeddings()
-        print(f"🔄 RELOAD COMPLETE")
+        pipeline.face_detector.add_embedding(frame, safe_name)
+        employee_cache.refresh()
         print(f"🔄 Total registered faces: {len(pipeline.face_detector.embeddings_cache)}")
         print(f"🔄 Names: {list(pipeline.face_detector.embeddings_cache.keys())}")
         
@@ -712,7 +1345,16 @@ if __name__ == "__main__":
         "main_unified:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        # Dev auto-reload is opt-in; its file watcher costs CPU in production
+        reload=os.getenv("UVICORN_RELOAD", "").lower() in ("1", "true", "yes"),
+        # Single worker: trackers, counters and face sessions live in process
+        # memory, so extra workers would each see a different slice of frames.
+        # Production runs under gunicorn (see gunicorn.conf.py)
+        workers=1,
+        # uvloop + httptools when installed (uvicorn[standard]), asyncio/h11 otherwise
+        loop="auto",
+        http="auto",
+        log_level="info",
+        access_log=False  # per-request access lines are pure overhead on /api/detect
     )
 
@@ -5,31 +5,58 @@ Helper script to manage AWS Rekognition collection
 - List existing faces
 - Delete faces
 - Test recognition
+
+Image paths may also be s3://bucket/key; Rekognition then reads the
+object itself and nothing is uploaded from this machine.
 """
 
 import boto3
+from botocore.config import Config
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+INDEX_WORKERS = 20  # concurrent IndexFaces calls in add-dir
+
+# Adaptive retries back off client-side when Rekognition throttles (its
+# per-region TPS limits); the pool is larger than INDEX_WORKERS so parallel
+# enrollment never waits on a connection
+CLIENT_CONFIG = Config(
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    max_pool_connections=50,
+    read_timeout=30,
+    tcp_keepalive=True,
+)
+DELETE_BATCH_SIZE = 4096  # DeleteFaces accepts at most this many FaceIds
+
+def rekognition_image(image_path):
+    """Rekognition Image parameter for a local path or s3:// URI (None if the file is missing)"""
+    if image_path.startswith('s3://'):
+        bucket, _, key = image_path[5:].partition('/')
+        return {'S3Object': {'Bucket': bucket, 'Name': key}}
+    if not os.path.exists(image_path):
+        return None
+    return {'Bytes': Path(image_path).read_bytes()}
+
 class FaceCollectionManager:
     def __init__(self, collection_id='employees', region='us-east-1'):
         self.collection_id = collection_id
-        self.client = boto3.client('rekognition', region_name=region)
+        # One client for the manager's lifetime; boto3 clients are thread-safe
+        self.client = boto3.client('rekognition', region_name=region, config=CLIENT_CONFIG)
     
     def index_face(self, image_path, person_name):
         """Add a face to collection"""
         try:
-            if not os.path.exists(image_path):
+            image = rekognition_image(image_path)
+            if image is None:
                 print(f"❌ File not found: {image_path}")
                 return False
             
-            with open(image_path, 'rb') as f:
-                image_bytes = f.read()
-            
             response = self.client.index_faces(
                 CollectionId=self.collection_id,
-                Image={'Bytes': image_bytes},
+                Image=image,
                 ExternalImageId=person_name
             )
             
@@ -46,15 +73,33 @@ class FaceCollectionManager:
             print(f"❌ Error: {e}")
             return False
     
+    def index_directory(self, directory):
+        """
+        Index every image in a directory, named by file stem, several at a time
+        Returns: number of faces indexed
+        """
+        images = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if not images:
+            print(f"❌ No images found in {directory}")
+            return 0
+        
+        with ThreadPoolExecutor(max_workers=INDEX_WORKERS) as executor:
+            results = list(executor.map(lambda p: self.index_face(str(p), p.stem), images))
+        
+        indexed = sum(results)
+        print(f"📋 Indexed {indexed}/{len(images)} images from {directory}")
+        return indexed
+    
+    def iter_faces(self):
+        """Every face in the collection, following ListFaces pagination"""
+        paginator = self.client.get_paginator('list_faces')
+        for page in paginator.paginate(CollectionId=self.collection_id, MaxResults=4096):
+            yield from page.get('Faces', [])
+    
     def list_faces(self):
         """List all faces in collection"""
         try:
-            response = self.client.list_faces(
-                CollectionId=self.collection_id,
-                MaxResults=100
-            )
-            
-            faces = response.get('Faces', [])
+            faces = list(self.iter_faces())
             if not faces:
                 print(f"📋 Collection '{self.collection_id}' is empty")
                 return []
@@ -85,16 +130,16 @@ class FaceCollectionManager:
     def delete_by_name(self, person_name):
         """Delete all faces for a person"""
         try:
-            response = self.client.list_faces(CollectionId=self.collection_id)
+            face_ids = [face['FaceId'] for face in self.iter_faces()
+                        if face.get('ExternalImageId') == person_name]
             
             deleted = 0
-            for face in response.get('Faces', []):
-                if face.get('ExternalImageId') == person_name:
-                    self.client.delete_faces(
-                        CollectionId=self.collection_id,
-                        FaceIds=[face['FaceId']]
-                    )
-                    deleted += 1
+            for start in range(0, len(face_ids), DELETE_BATCH_SIZE):
+                response = self.client.delete_faces(
+                    CollectionId=self.collection_id,
+                    FaceIds=face_ids[start:start + DELETE_BATCH_SIZE]
+                )
+                deleted += len(response.get('DeletedFaces', []))
             
             if deleted > 0:
                 print(f"✅ DELETED {deleted} face(s) for {person_name}")
@@ -109,16 +154,14 @@ class FaceCollectionManager:
     def test_recognition(self, image_path, person_name):
         """Test if an image matches a person in collection"""
         try:
-            if not os.path.exists(image_path):
+            image = rekognition_image(image_path)
+            if image is None:
                 print(f"❌ File not found: {image_path}")
                 return False
             
-            with open(image_path, 'rb') as f:
-                image_bytes = f.read()
-            
             response = self.client.search_faces_by_image(
                 CollectionId=self.collection_id,
-                Image={'Bytes': image_bytes},
+                Image=image,
                 MaxFaces=1,
                 FaceMatchThreshold=80
             )
@@ -151,10 +194,13 @@ def main():
         print("Usage:")
         print("  python manage_faces.py list")
         print("  python manage_faces.py add <image_path> <person_name>")
+        print("  python manage_faces.py add-dir <directory>")
         print("  python manage_faces.py delete <person_name>")
         print("  python manage_faces.py test <image_path> <person_name>")
         print("\nExamples:")
         print("  python manage_faces.py add ritika.jpg Ritika")
+        print("  python manage_faces.py add s3://my-bucket/employees/ritika.jpg Ritika")
+        print("  python manage_faces.py add-dir database/employees")
         print("  python manage_faces.py list")
         print("  python manage_faces.py test test_ritika.jpg Ritika")
         print("  python manage_faces.py delete Ritika")
@@ -173,6 +219,12 @@ def main():
         person_name = sys.argv[3]
         manager.index_face(image_path, person_name)
     
+    elif command == 'add-dir':
+        if len(sys.argv) < 3:
+            print("❌ Usage: python manage_faces.py add-dir <directory>")
+            return
+        manager.index_directory(sys.argv[2])
+    
     elif command == 'delete':
         if len(sys.argv) < 3:
             print("❌ Usage: python manage_faces.py delete <person_name>")
@@ -2,10 +2,19 @@
 Box/Production Counting Model Wrapper
 Reuses existing YOLOv8 custom box model with tracking
 """
-from ultralytics import YOLO
+import logging
+import os
+from models.yolo_backend import EXPORT_IMGSZ, cuda_available, load_yolo
 from pathlib import Path
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+# Inference size. Keep it at the export size when a .engine/.onnx is used
+# (their input is fixed); with the .pt weights it can be set to the camera's
+# resolution (a multiple of 32) so frames aren't letterboxed down to 640.
+BOX_IMGSZ = int(os.getenv('BOX_IMGSZ', EXPORT_IMGSZ))
+
 class BoxDetector:
     """Wrapper for box detection and counting"""
     
@@ -13,14 +22,17 @@ class BoxDetector:
         self.model = None
         self.confidence_threshold = 0.25
         self.tracker_config = 'bytetrack.yaml'
+        self.half = False  # FP16 inference, set on load when a GPU is present
         
     def load(self):
         """Load the existing box detection model"""
         try:
             BASE_DIR = Path(__file__).parent.parent
             model_path = BASE_DIR / 'models' / 'best_product.pt'
-            self.model = YOLO(str(model_path))
-            print("✅ Box Detection Model Loaded")
+            self.model = load_yolo(model_path)
+            # ~2x throughput on GPU; layer fusion already happens inside Ultralytics
+            self.half = cuda_available()
+            print(f"✅ Box Detection Model Loaded (imgsz={BOX_IMGSZ}, half={self.half})")
             return True
         except Exception as e:
             print(f"❌ Box model load failed: {e}")
@@ -48,36 +60,44 @@ class BoxDetector:
                 results = self.model.track(
                     frame, 
                     conf=self.confidence_threshold,
+                    imgsz=BOX_IMGSZ,
+                    half=self.half,
                     persist=True,
                     tracker=self.tracker_config,
                     verbose=False
                 )[0]
             else:
-                results = self.model(frame, conf=self.confidence_threshold, verbose=False)[0]
+                results = self.model(frame, conf=self.confidence_threshold, imgsz=BOX_IMGSZ,
+                                     half=self.half, verbose=False)[0]
             
             boxes = []
             
             if results.boxes:
-                for box in results.boxes:
-                    xyxy = box.xyxy[0].cpu().numpy()
-                    conf = float(box.conf[0])
-                    cls_id = int(box.cls[0])
-                    
+                # One device->host copy for every box instead of three per box.
+                # Rows are x1, y1, x2, y2, [track_id,] conf, cls
+                data = results.boxes.data.cpu().numpy()
+                xyxy = data[:, :4]
+                corners = xyxy.astype(np.int32).tolist()
+                centers = ((xyxy[:, :2] + xyxy[:, 2:]) / 2).astype(np.int32).tolist()
+                confs = data[:, -2].tolist()
+                class_ids = data[:, -1].astype(np.int32).tolist()
+                # Boxes carry an id column only when the tracker assigned IDs
+                track_ids = data[:, 4].astype(np.int64).tolist() \
+                    if track and data.shape[1] == 7 else None
+                
+                for i, ((x1, y1, x2, y2), (cx, cy)) in enumerate(zip(corners, centers)):
                     box_data = {
-                        'x1': int(xyxy[0]),
-                        'y1': int(xyxy[1]),
-                        'x2': int(xyxy[2]),
-                        'y2': int(xyxy[3]),
-                        'confidence': conf,
-                        'class_id': cls_id,
-                        'center_x': int((xyxy[0] + xyxy[2]) / 2),
-                        'center_y': int((xyxy[1] + xyxy[3]) / 2)
+                        'x1': x1,
+                        'y1': y1,
+                        'x2': x2,
+                        'y2': y2,
+                        'confidence': confs[i],
+                        'class_id': class_ids[i],
+                        'center_x': cx,
+                        'center_y': cy
                     }
-                    
-                    # Add tracking ID if available
-                    if track and hasattr(box, 'id') and box.id is not None:
-                        box_data['track_id'] = int(box.id[0])
-                    
+                    if track_ids is not None:
+                        box_data['track_id'] = track_ids[i]
                     boxes.append(box_data)
             
             return {
@@ -85,7 +105,7 @@ class BoxDetector:
                 'boxes': boxes
             }
         except Exception as e:
-            print(f"Box detection error: {e}")
+            logger.error("Box detection error: %s", e)
             return self._empty_result()
     
     def _empty_result(self):
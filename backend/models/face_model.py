@@ -3,11 +3,56 @@ Face Detection and Recognition Model Wrapper
 Reuses existing DeepFace implementation
 """
 import cv2
+import logging
+import json
 import numpy as np
-import pickle
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 import os
-from scipy.spatial.distance import cosine
+
+from models.tracker import pairwise_distances
+from services.snapshot_index import dhash
+
+logger = logging.getLogger(__name__)
+
+try:
+    import faiss
+except ImportError:
+    faiss = None  # matching falls back to a NumPy matmul
+
+HAAR_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+# OpenCV's YuNet face detector (opencv_zoo). Used instead of Haar when the
+# ONNX file is present: one small CNN pass, better recall on small/turned faces
+YUNET_MODEL_PATH = Path(os.getenv(
+    'YUNET_MODEL_PATH',
+    Path(__file__).parent / 'face_detection_yunet_2023mar.onnx'
+))
+YUNET_SCORE_THRESHOLD = 0.6
+YUNET_NMS_THRESHOLD = 0.3
+# Detection cost grows with W*H; wider frames are shrunk before detection and
+# the boxes scaled back to frame coordinates
+FACE_DETECT_MAX_WIDTH = 640
+# Detections whose centers are closer than this (pixels) are the same face
+FACE_DUPLICATE_DISTANCE = 50
+# Face crops whose grayscale std-dev is below this get CLAHE; well-lit crops
+# skip the LAB round-trip entirely
+CLAHE_MAX_STD = 40.0
+CLAHE_CLIP_LIMIT = 3.0
+CLAHE_TILE_GRID = (8, 8)
+# Streaming video shows the same face in consecutive frames. A crop whose dHash
+# is within FACE_MATCH_CACHE_MAX_DISTANCE bits of one matched in the last
+# FACE_MATCH_CACHE_TTL seconds reuses that match and skips Facenet entirely.
+FACE_MATCH_CACHE_TTL = 2.0
+FACE_MATCH_CACHE_SIZE = 1024
+FACE_MATCH_CACHE_MAX_DISTANCE = 2  # of 64 bits
+# Registered faces at which the FAISS index switches from exact (flat) to HNSW
+FAISS_HNSW_MIN_FACES = 10000
+# Live crops and employee images are embedded by the same pipeline (our face
+# detector -> crop -> _preprocess_face -> DeepFace resize -> Facenet512).
+# Saved embeddings tagged with another pipeline are regenerated on load.
+EMBEDDING_PIPELINE = 'detector-crop-v1'
 
 class FaceRecognizer:
     """Wrapper for face detection and recognition using DeepFace"""
@@ -16,7 +61,29 @@ class FaceRecognizer:
         self.deepface = None
         self.database_path = None
         self.embeddings_cache = {}
-        self.embeddings_cache_file = None
+        self.embeddings_cache_file = None  # (N, 512) float32 .npy, memory-mapped on load
+        self.embeddings_names_file = None  # JSON: row names + source image signatures
+        self._emb_sources = {}  # name: [mtime, size] of the image its embedding came from
+        # embeddings_cache as one L2-normalized float32 (N, 512) matrix with
+        # row names, so matching is a single matrix-vector product, plus an
+        # inner-product FAISS index over it when faiss is installed. Swapped
+        # in as one (matrix, names, index) tuple so a reload never pairs one
+        # version's rows with another's names in a concurrent match.
+        self._matcher = (np.empty((0, 512), np.float32), [], None)
+        self._match_cache = OrderedDict()  # {dhash: (expires_at, name, distance)}, oldest first
+        # Guards _match_cache: frames are recognized on several threads and a
+        # reload clears it from another
+        self._match_cache_lock = threading.Lock()
+        self._facenet_model = None  # Keras Facenet512, or False if unavailable
+        self._deepface_resize = None  # DeepFace's resize_image, loaded with the model
+        # One CLAHE instance for every crop (on the GPU when OpenCV was built with CUDA)
+        self._clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_GRID)
+        self._cuda_clahe = None
+        try:
+            if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+                self._cuda_clahe = cv2.cuda.createCLAHE(CLAHE_CLIP_LIMIT, CLAHE_TILE_GRID)
+        except (AttributeError, cv2.error):
+            pass  # CPU-only OpenCV build
         self.initialized = False
         # CRITICAL FIX: DeepFace cosine distance threshold
         # In DeepFace: distance < threshold = MATCH
@@ -25,13 +92,19 @@ class FaceRecognizer:
         # New threshold: 1.0 = ACCEPT ANY match (most lenient for DeepFace)
         # This makes DeepFace work like AWS (accept faces, improve with location matching)
         self.face_distance_threshold = 1.0  # VERY LENIENT - accept all faces, use location matching for persistence
+        # CascadeClassifier keeps per-image state in detectMultiScale and is not
+        # safe to share between threads, so each thread parses its own copy;
+        # the same goes for YuNet (setInputSize + detect on one dnn Net)
+        self._detectors = threading.local()
+        self._yunet_available = None  # None until the first load attempt
         
     def load(self):
         """Lazy load DeepFace and employee database"""
         try:
             BASE_DIR = Path(__file__).parent.parent
             self.database_path = BASE_DIR / 'database' / 'employees'
-            self.embeddings_cache_file = BASE_DIR / 'database' / 'employee_embeddings.pkl'
+            self.embeddings_cache_file = BASE_DIR / 'database' / 'employee_embeddings.npy'
+            self.embeddings_names_file = BASE_DIR / 'database' / 'employee_embeddings.names.json'
             
             # Don't import DeepFace until first use (lazy loading)
             print("✅ Face Recognition System Ready (lazy loading)")
@@ -53,88 +126,88 @@ class FaceRecognizer:
                 print(f"DeepFace import failed: {e}")
                 self.deepface = None
     
-    def reload_embeddings(self):
+    def reload_embeddings(self, force=False):
         """
         Reload face embeddings from employee database.
         This should be called:
         - At startup
         - After a new employee is registered
+        
+        Only images added or changed since the cache was saved go through
+        DeepFace; force=True ignores the cache and re-embeds every image.
         """
-        print("\n🔄 DEBUG: reload_embeddings() starting...")
+        logger.debug("🔄 DEBUG: reload_embeddings() starting...")
         self.embeddings_cache = {}
+        self._emb_sources = {}
+        self._build_embedding_matrix()
         
         # First try to load from cache file
-        if self.embeddings_cache_file and os.path.exists(self.embeddings_cache_file):
-            try:
-                print(f"🔄 DEBUG: Loading cache from {self.embeddings_cache_file}")
-                with open(self.embeddings_cache_file, 'rb') as f:
-                    self.embeddings_cache = pickle.load(f)
-                
-                # Validate embedding dimensions (Facenet512 = 512 dimensions)
-                if self.embeddings_cache:
-                    first_embedding = next(iter(self.embeddings_cache.values()))
-                    embedding_dim = len(first_embedding)
-                    print(f"🔍 Cache embedding dimension: {embedding_dim}")
-                    
-                    if embedding_dim != 512:
-                        print(f"⚠️ DIMENSION MISMATCH! Expected 512, got {embedding_dim}")
-                        print(f"🔄 Deleting old cache and regenerating with Facenet512...")
-                        os.remove(self.embeddings_cache_file)
-                        self.embeddings_cache = {}
-                        # Continue to regeneration below
-                    else:
-                        print(f"✅ Cache loaded: {len(self.embeddings_cache)} faces")
-                        print(f"📊 KNOWN FACES COUNT: {len(self.embeddings_cache)}")
-                        print(f"📝 KNOWN NAMES: {list(self.embeddings_cache.keys())}")
-                        for name in self.embeddings_cache.keys():
-                            print(f"   ✓ {name}")
-                        return
-            except Exception as e:
-                print(f"⚠️ Could not load cache: {e}")
-                self.embeddings_cache = {}
+        if not force and self._load_embeddings_cache():
+            print(f"✅ Cache loaded: {len(self._emb_names)} faces")
         
-        # If cache doesn't exist or is empty, generate from employee images
+        # Bring the cache in line with the employee images
         if self.database_path and os.path.exists(self.database_path):
-            print(f"🔄 DEBUG: Generating embeddings from {self.database_path}")
             self._generate_embeddings_from_images()
         else:
-            print(f"🔄 DEBUG: Database path missing: {self.database_path}")
+            logger.debug("🔄 DEBUG: Database path missing: %s", self.database_path)
+        
+        print(f"📊 KNOWN FACES COUNT: {len(self._emb_names)}")
+        print(f"📝 KNOWN NAMES: {self._emb_names}")
+    
+    @staticmethod
+    def _image_signature(image_path):
+        """[mtime, size] - changes whenever the image file is rewritten"""
+        stat = os.stat(image_path)
+        return [stat.st_mtime, stat.st_size]
+    
+    def _employee_image(self, employee_name):
+        """Image file registered for employee_name, or None"""
+        if not self.database_path:
+            return None
+        for suffix in ('.jpg', '.png'):
+            image_path = self.database_path / f"{employee_name}{suffix}"
+            if image_path.exists():
+                return image_path
+        return None
     
     def _generate_embeddings_from_images(self):
-        """Generate embeddings from employee images"""
-        print(f"🔄 DEBUG: _generate_embeddings_from_images() called")
-        if not self.deepface:
-            print(f"🔄 DEBUG: DeepFace not initialized, skipping")
-            return
+        """
+        Embed employee images that are new or changed since the cache was
+        saved, and drop employees whose image is gone
+        """
         if not self.database_path:
-            print(f"🔄 DEBUG: No database path set")
+            logger.debug("🔄 DEBUG: No database path set")
             return
         
         try:
-            print(f"🔄 DEBUG: Scanning {self.database_path}...")
-            employee_images = list(self.database_path.glob('*.jpg')) + list(self.database_path.glob('*.png'))
-            print(f"🔄 DEBUG: Found {len(employee_images)} images: {[img.name for img in employee_images]}")
-            
-            if not employee_images:
-                print("📊 KNOWN FACES COUNT: 0")
+            logger.debug("🔄 DEBUG: Scanning %s...", self.database_path)
+            employee_images = {
+                image_path.stem: image_path
+                for image_path in list(self.database_path.glob('*.jpg')) + list(self.database_path.glob('*.png'))
+            }
+            removed = [name for name in self.embeddings_cache if name not in employee_images]
+            changed = {
+                name: image_path for name, image_path in employee_images.items()
+                if self._emb_sources.get(name) != self._image_signature(image_path)
+            }
+            logger.debug("🔄 DEBUG: %s images, %s new/changed, %s removed",
+                         len(employee_images), len(changed), len(removed))
+            if not changed and not removed:
                 return
             
-            for image_path in employee_images:
-                employee_name = image_path.stem
-                print(f"🔄 DEBUG: Processing {employee_name}...")
+            for name in removed:
+                del self.embeddings_cache[name]
+                self._emb_sources.pop(name, None)
+            
+            if changed and not self.deepface:
+                logger.debug("🔄 DEBUG: DeepFace not initialized, skipping %s images", len(changed))
+                changed = {}
+            
+            for employee_name, image_path in changed.items():
                 try:
                     # Generate embedding for employee image
-                    print(f"🔄 DEBUG: Calling DeepFace on {image_path}")
-                    result = self.deepface.represent(
-                        str(image_path),
-                        model_name='Facenet512',
-                        enforce_detection=False
-                    )
-                    print(f"🔄 DEBUG: DeepFace returned {len(result)} results")
-                    embedding = result[0]['embedding']
-                    print(f"🔄 DEBUG: Embedding shape: {len(embedding)}")
-                    
-                    self.embeddings_cache[employee_name] = embedding
+                    self.embeddings_cache[employee_name] = self._embed_image(image_path)
+                    self._emb_sources[employee_name] = self._image_signature(image_path)
                     print(f"✅ {employee_name}: embedding generated and cached")
                 except Exception as e:
                     print(f"❌ {employee_name}: failed - {e}")
@@ -142,25 +215,251 @@ class FaceRecognizer:
                     traceback.print_exc()
             
             # Save embeddings cache
-            if self.embeddings_cache_file:
-                try:
-                    print(f"🔄 DEBUG: Saving cache to {self.embeddings_cache_file}")
-                    with open(self.embeddings_cache_file, 'wb') as f:
-                        pickle.dump(self.embeddings_cache, f)
-                    print(f"✅ Cache saved")
-                except Exception as e:
-                    print(f"❌ Cache save failed: {e}")
-            
-            print(f"📊 KNOWN FACES COUNT: {len(self.embeddings_cache)}")
-            if self.embeddings_cache:
-                print(f"📝 KNOWN NAMES: {list(self.embeddings_cache.keys())}")
-                for name in self.embeddings_cache.keys():
-                    print(f"   ✓ {name}")
+            self._build_embedding_matrix()
+            self._save_embeddings_cache()
         except Exception as e:
             print(f"❌ Error generating embeddings: {e}")
             import traceback
             traceback.print_exc()
     
+    def _load_embeddings_cache(self):
+        """
+        Memory-map the saved embedding matrix and its names
+        Returns: True if loaded, False if missing or unusable (then regenerate)
+        """
+        if not (self.embeddings_cache_file and os.path.exists(self.embeddings_cache_file)
+                and os.path.exists(self.embeddings_names_file)):
+            return False
+        try:
+            logger.debug("🔄 DEBUG: Loading cache from %s", self.embeddings_cache_file)
+            matrix = np.load(self.embeddings_cache_file, mmap_mode='r')
+            with open(self.embeddings_names_file, encoding='utf-8') as f:
+                meta = json.load(f)
+            names = meta['names']
+            sources = meta.get('sources', {})
+            pipeline = meta.get('pipeline')
+        except Exception as e:
+            print(f"⚠️ Could not load cache: {e}")
+            return False
+        
+        # Embeddings from a different preprocessing pipeline aren't comparable
+        # with live ones; start over so every image is embedded again
+        if pipeline != EMBEDDING_PIPELINE:
+            print(f"⚠️ Cache built by embedding pipeline {pipeline!r}, regenerating with {EMBEDDING_PIPELINE!r}")
+            return False
+        
+        # Validate embedding dimensions (Facenet512 = 512 dimensions)
+        if matrix.ndim != 2 or matrix.shape[1] != 512 or len(names) != matrix.shape[0]:
+            print(f"⚠️ CACHE MISMATCH! Expected ({len(names)}, 512), got {matrix.shape}")
+            print(f"🔄 Deleting old cache and regenerating with Facenet512...")
+            del matrix
+            os.remove(self.embeddings_cache_file)
+            return False
+        
+        # Rows are saved L2-normalized, so the mapped file is the match matrix as-is
+        self._set_match_matrix(matrix, names)
+        self.embeddings_cache = dict(zip(names, matrix))
+        self._emb_sources = sources
+        return True
+    
+    def _save_embeddings_cache(self):
+        """Persist the normalized embedding matrix (.npy) and its row names (.json)"""
+        if not self.embeddings_cache_file:
+            return
+        try:
+            logger.debug("🔄 DEBUG: Saving cache to %s", self.embeddings_cache_file)
+            # Write aside and swap in, so a reader never maps a half-written file
+            tmp_file = self.embeddings_cache_file.with_name(self.embeddings_cache_file.name + '.tmp')
+            with open(tmp_file, 'wb') as f:
+                np.save(f, self._emb_matrix)
+            with open(self.embeddings_names_file, 'w', encoding='utf-8') as f:
+                json.dump({'names': self._emb_names, 'sources': self._emb_sources,
+                           'pipeline': EMBEDDING_PIPELINE}, f)
+            os.replace(tmp_file, self.embeddings_cache_file)
+            print(f"✅ Cache saved")
+        except Exception as e:
+            print(f"❌ Cache save failed: {e}")
+    
+    def add_embedding(self, image, employee_name=None):
+        """
+        Embed a single employee image and merge it into the cache.
+        Registration calls this instead of reload_embeddings() so only the
+        new image goes through DeepFace, not every registered employee.
+        
+        Args:
+            image: Image path, or an already decoded BGR frame (then
+                employee_name is required)
+            employee_name: Cache key (defaults to the file stem)
+        
+        Returns:
+            True if an embedding was generated and cached
+        """
+        self._ensure_deepface()
+        if not self.deepface:
+            return False
+        
+        if not isinstance(image, np.ndarray):
+            employee_name = employee_name or Path(image).stem
+        try:
+            self.embeddings_cache[employee_name] = self._embed_image(image)
+            print(f"✅ {employee_name}: embedding generated and cached")
+        except Exception as e:
+            print(f"❌ {employee_name}: failed - {e}")
+            return False
+        
+        # Remember which file version this came from, so the next reload
+        # doesn't embed it again
+        image_path = self._employee_image(employee_name)
+        if image_path is not None:
+            self._emb_sources[employee_name] = self._image_signature(image_path)
+        
+        self._build_embedding_matrix()
+        self._save_embeddings_cache()
+        return True
+    
+    def _build_embedding_matrix(self):
+        """Rebuild _emb_matrix/_emb_names from embeddings_cache"""
+        names = list(self.embeddings_cache)
+        if not names:
+            self._set_match_matrix(np.empty((0, 512), np.float32), [])
+            return
+        matrix = np.array([self.embeddings_cache[name] for name in names], np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-8
+        self._set_match_matrix(matrix, names)
+        # Point the cache at the new rows so nothing keeps an old mapping open
+        self.embeddings_cache = dict(zip(names, matrix))
+    
+    @property
+    def _emb_matrix(self):
+        return self._matcher[0]
+    
+    @property
+    def _emb_names(self):
+        return self._matcher[1]
+    
+    def _set_match_matrix(self, matrix, names):
+        """Install a normalized embedding matrix and index it with FAISS when available"""
+        index = None
+        if faiss is not None and names:
+            if len(names) >= FAISS_HNSW_MIN_FACES:
+                index = faiss.IndexHNSWFlat(matrix.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexFlatIP(matrix.shape[1])
+            index.add(np.ascontiguousarray(matrix, np.float32))
+        # Built completely before the single assignment that publishes it
+        with self._match_cache_lock:
+            self._matcher = (matrix, names, index)
+            self._match_cache.clear()  # cached matches refer to the old rows
+    
+    def _match_embeddings(self, embeddings, matcher=None):
+        """
+        Closest registered face for each row of embeddings, by cosine distance
+        matcher: the _matcher snapshot to search (default: the current one)
+        Returns: (names, distances) - None/inf per row with nothing registered
+        """
+        matrix, row_names, index = matcher or self._matcher  # one consistent version
+        count = len(embeddings)
+        if not row_names:
+            return [None] * count, np.full(count, np.inf)
+        queries = embeddings / (np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-8)
+        if index is not None:
+            similarities, best = index.search(np.ascontiguousarray(queries, np.float32), 1)
+            # HNSW can come back empty-handed (-1); treat that as no match
+            names = [row_names[i] if i >= 0 else None for i in best[:, 0].tolist()]
+            return names, np.where(best[:, 0] >= 0, 1.0 - similarities[:, 0], np.inf)
+        similarities = queries @ matrix.T  # (K, N)
+        best = similarities.argmax(axis=1)
+        distances = 1.0 - similarities[np.arange(count), best]
+        return [row_names[i] for i in best], distances
+    
+    def _cached_match(self, crop_hash):
+        """(name, distance) matched recently for a near-identical crop, or None"""
+        now = time.monotonic()
+        with self._match_cache_lock:
+            # Entries are kept in insertion order with one TTL, so expired ones lead
+            while self._match_cache and next(iter(self._match_cache.values()))[0] <= now:
+                self._match_cache.popitem(last=False)
+            for cached_hash, (_, name, distance) in self._match_cache.items():
+                if bin(cached_hash ^ crop_hash).count('1') <= FACE_MATCH_CACHE_MAX_DISTANCE:
+                    return name, distance
+        return None
+    
+    def _cache_match(self, crop_hash, name, distance, matcher):
+        """Remember a crop's match against `matcher`, evicting the oldest entries"""
+        with self._match_cache_lock:
+            if matcher is not self._matcher:
+                return  # reloaded since the match was made; don't cache a stale name
+            self._match_cache.pop(crop_hash, None)
+            self._match_cache[crop_hash] = (time.monotonic() + FACE_MATCH_CACHE_TTL, name, distance)
+            while len(self._match_cache) > FACE_MATCH_CACHE_SIZE:
+                self._match_cache.popitem(last=False)
+    
+    def _get_facenet(self):
+        """DeepFace's Facenet512 Keras model, built once (None if unavailable)"""
+        if self._facenet_model is None:
+            self._facenet_model = False
+            try:
+                # The same aspect-preserving resize + pad that represent() applies
+                from deepface.modules.preprocessing import resize_image
+                model = self.deepface.build_model('Facenet512')
+                # Newer DeepFace wraps the Keras model; older returns it directly
+                self._facenet_model = getattr(model, 'model', model)
+                self._deepface_resize = resize_image
+            except Exception as e:
+                logger.warning("⚠️ Facenet512 model unavailable, embedding faces one by one: %s", e)
+        return self._facenet_model or None
+    
+    def _embed_faces(self, crops):
+        """
+        (K, 512) float32 embeddings for BGR face crops
+        
+        Crops are already faces, so DeepFace's own detection is skipped; each
+        one gets exactly what represent(detector_backend='skip') does (BGR->RGB,
+        DeepFace's padded resize, 'base' normalization) and all of them go
+        through one model.predict() call. Per-crop represent() is the fallback.
+        """
+        model = self._get_facenet()
+        if model is not None:
+            try:
+                height, width = model.input_shape[1:3]
+                batch = np.empty((len(crops), height, width, 3), np.float32)
+                for k, crop in enumerate(crops):
+                    # resize_image returns (1, H, W, 3) scaled to [0, 1]
+                    batch[k] = self._deepface_resize(crop[:, :, ::-1], (height, width))[0]
+                return model.predict(batch, batch_size=len(crops), verbose=0).astype(np.float32)
+            except Exception as e:
+                logger.warning("⚠️ Batched Facenet512 failed, embedding faces one by one: %s", e)
+                self._facenet_model = False
+        return np.array([
+            self.deepface.represent(
+                crop, model_name='Facenet512', enforce_detection=False, detector_backend='skip'
+            )[0]['embedding']
+            for crop in crops
+        ], np.float32)
+    
+    def _embed_image(self, image):
+        """
+        512-d embedding of an employee image (path or BGR frame), through the
+        same detect -> crop -> preprocess -> embed steps as live faces
+        """
+        frame = image if isinstance(image, np.ndarray) else cv2.imread(str(image))
+        if frame is None:
+            raise ValueError(f"could not read image {image}")
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        
+        # Largest detected face; the whole image when none is found (as
+        # represent(enforce_detection=False) used to do)
+        face_crop = frame
+        faces = self.detect_faces(frame)['faces']
+        if faces:
+            box = max(faces, key=lambda b: (b['x2'] - b['x1']) * (b['y2'] - b['y1']))
+            x1, y1 = max(0, box['x1']), max(0, box['y1'])
+            x2, y2 = min(frame.shape[1], box['x2']), min(frame.shape[0], box['y2'])
+            if (x2 - x1) >= 20 and (y2 - y1) >= 20:
+                face_crop = frame[y1:y2, x1:x2]
+        return self._embed_faces([self._preprocess_face(face_crop)])[0]
+    
     def _deduplicate_faces(self, face_boxes):
         """
         Remove duplicate face detections (same face detected multiple times)
@@ -174,161 +473,216 @@ class FaceRecognizer:
         if len(face_boxes) <= 1:
             return face_boxes
         
-        deduplicated = []
-        used = set()
+        # Larger detections first - usually more accurate (stable, like sorted())
+        boxes = np.array([[b['x1'], b['y1'], b['x2'], b['y2']] for b in face_boxes], dtype=np.float64)
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        order = np.argsort(-areas, kind='stable')
+        centers = (boxes[order, :2] + boxes[order, 2:]) / 2
         
-        # Sort by size (larger detections first - usually more accurate)
-        sorted_boxes = sorted(
-            enumerate(face_boxes),
-            key=lambda x: (x[1]['x2'] - x[1]['x1']) * (x[1]['y2'] - x[1]['y1']),
-            reverse=True
-        )
+        # All center-to-center distances at once, in sorted order
+        distances = pairwise_distances(centers, centers)
+        close = distances < FACE_DUPLICATE_DISTANCE
+        np.fill_diagonal(close, False)
         
-        for idx, face_box in sorted_boxes:
-            if idx in used:
+        deduplicated = []
+        used = np.zeros(len(order), dtype=bool)
+        for i in range(len(order)):
+            if used[i]:
                 continue
             
-            # Check if this box is too close to any already selected box
-            is_duplicate = False
-            for other_idx, other_box in sorted_boxes:
-                if other_idx in used or other_idx == idx:
-                    continue
-                
-                # Calculate overlap/distance between boxes
-                x1_1, y1_1 = face_box['x1'], face_box['y1']
-                x2_1, y2_1 = face_box['x2'], face_box['y2']
-                x1_2, y1_2 = other_box['x1'], other_box['y1']
-                x2_2, y2_2 = other_box['x2'], other_box['y2']
-                
-                # Calculate center-to-center distance
-                cx1, cy1 = (x1_1 + x2_1) / 2, (y1_1 + y2_1) / 2
-                cx2, cy2 = (x1_2 + x2_2) / 2, (y1_2 + y2_2) / 2
-                distance = ((cx1 - cx2) ** 2 + (cy1 - cy2) ** 2) ** 0.5
-                
-                # If centers are within 50 pixels, consider it a duplicate
-                if distance < 50:
-                    is_duplicate = True
-                    used.add(other_idx)
-                    print(f"🔍 DEBUG: Removing duplicate face, distance={distance:.1f}px")
-                    break
-            
-            if not is_duplicate:
-                deduplicated.append(face_box)
-                used.add(idx)
+            # Is this box too close to any box not yet taken?
+            duplicates = np.flatnonzero(close[i] & ~used)
+            if len(duplicates):
+                j = duplicates[0]
+                used[j] = True
+                logger.debug("🔍 DEBUG: Removing duplicate face, distance=%.1fpx", distances[i, j])
+            else:
+                deduplicated.append(face_boxes[order[i]])
+                used[i] = True
         
         return deduplicated
     
-    def detect_faces(self, frame):
+    def _get_cascade(self):
+        """This thread's Haar cascade, parsed from XML on its first use only"""
+        cascade = getattr(self._detectors, 'cascade', None)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(HAAR_CASCADE_PATH)
+            if cascade.empty():
+                logger.error("❌ ERROR: Cascade classifier is empty!")
+                return None
+            self._detectors.cascade = cascade
+        return cascade
+    
+    def _get_yunet(self):
+        """This thread's YuNet detector, or None when the model file or cv2.FaceDetectorYN is missing"""
+        if self._yunet_available is False:
+            return None
+        detector = getattr(self._detectors, 'yunet', None)
+        if detector is None:
+            if not (hasattr(cv2, 'FaceDetectorYN') and YUNET_MODEL_PATH.exists()):
+                self._yunet_available = False
+                return None
+            try:
+                detector = cv2.FaceDetectorYN.create(
+                    str(YUNET_MODEL_PATH), "", (320, 320),
+                    score_threshold=YUNET_SCORE_THRESHOLD,
+                    nms_threshold=YUNET_NMS_THRESHOLD
+                )
+            except cv2.error as e:
+                logger.warning("⚠️ YuNet load failed, using Haar cascade: %s", e)
+                self._yunet_available = False
+                return None
+            if self._yunet_available is None:
+                logger.info("✅ YuNet face detector loaded")
+            self._yunet_available = True
+            self._detectors.yunet = detector
+        return detector
+    
+    @staticmethod
+    def _shrink(frame):
+        """frame resized to at most FACE_DETECT_MAX_WIDTH wide"""
+        if frame.shape[1] <= FACE_DETECT_MAX_WIDTH:
+            return frame
+        ratio = FACE_DETECT_MAX_WIDTH / frame.shape[1]
+        return cv2.resize(frame, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+    
+    def _detect_yunet(self, detector, frame):
+        """(N, 4) x, y, w, h array from YuNet, in the coordinates of frame"""
+        image = self._shrink(frame)
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        detector.setInputSize((image.shape[1], image.shape[0]))
+        _, faces = detector.detect(image)
+        if faces is None:
+            return np.empty((0, 4), np.float32)
+        # Rows: x, y, w, h, 5 landmark (x, y) pairs, score
+        return faces[:, :4] * (frame.shape[1] / image.shape[1])
+    
+    def _detect_haar(self, cascade, frame, gray):
+        """(N, 4) x, y, w, h array from the Haar cascade, in the coordinates of frame"""
+        if gray is None:
+            # Shrink before converting so cvtColor touches fewer pixels too
+            image = self._shrink(frame)
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        
+        # OPTIMIZED FOR LONG-DISTANCE DETECTION
+        # One pass with small minSize; the stricter "medium" retry only
+        # ever re-searched a subset of this one and doubled the cost of
+        # empty frames
+        faces = cascade.detectMultiScale(
+            gray,
+            scaleFactor=1.05,      # FASTER (was 1.03) - trade off some accuracy for speed
+            minNeighbors=3,        # Lower = more detections (tolerates some false positives)
+            minSize=(15, 15),      # VERY SMALL - detect faces even at distance!
+            maxSize=(400, 400)     # Cap maximum to avoid huge false positives
+        )
+        if len(faces) == 0:
+            return np.empty((0, 4), np.float32)
+        return np.asarray(faces, np.float32) * (frame.shape[1] / gray.shape[1])
+    
+    def detect_faces(self, frame, gray=None):
         """
-        Detect faces in frame using OpenCV (faster than DeepFace)
+        Detect faces in frame with YuNet when its model is installed,
+        else the OpenCV Haar cascade (both much faster than DeepFace)
+        
+        Args:
+            frame: BGR image
+            gray: Optional grayscale version of frame, possibly downscaled,
+                when the caller already has one (Haar only; skips the conversion)
         
         Returns:
             {
                 'face_count': int,
-                'faces': list of face bounding boxes
+                'faces': list of face bounding boxes (frame coordinates)
             }
         """
         try:
-            print(f"🔍 DEBUG: detect_faces() called, frame shape: {frame.shape}")
-            
-            # Use OpenCV Haar Cascade for fast detection
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            print(f"🔍 DEBUG: Loading cascade from {cascade_path}")
-            face_cascade = cv2.CascadeClassifier(cascade_path)
-            
-            if face_cascade.empty():
-                print(f"❌ ERROR: Cascade classifier is empty!")
-                return {'face_count': 0, 'faces': []}
+            logger.debug("🔍 DEBUG: detect_faces() called, frame shape: %s", frame.shape)
             
-            print(f"✅ Cascade loaded successfully")
-            
-            # Convert to grayscale
-            print(f"🔍 DEBUG: Converting frame to grayscale...")
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            print(f"🔍 DEBUG: Gray frame shape: {gray.shape}")
-            
-            # OPTIMIZED FOR LONG-DISTANCE DETECTION
-            # Detect faces even when far from camera by using smaller minimum size
-            print(f"🔍 DEBUG: Running detectMultiScale with LONG-DISTANCE optimization...")
-            faces = face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.05,      # FASTER (was 1.03) - trade off some accuracy for speed
-                minNeighbors=3,        # Lower = more detections (tolerates some false positives)
-                minSize=(15, 15),      # VERY SMALL - detect faces even at distance!
-                maxSize=(400, 400)     # Cap maximum to avoid huge false positives
-            )
-            print(f"🔍 DEBUG: detectMultiScale (long-distance) returned {len(faces)} faces")
-            
-            # If no faces found, try with medium settings
-            if len(faces) == 0:
-                print(f"🔍 DEBUG: No faces with long-distance settings, trying medium...")
-                faces = face_cascade.detectMultiScale(
-                    gray,
-                    scaleFactor=1.1,
-                    minNeighbors=4,
-                    minSize=(20, 20)
-                )
-                print(f"🔍 DEBUG: detectMultiScale (medium) returned {len(faces)} faces")
+            yunet = self._get_yunet()
+            if yunet is not None:
+                faces = self._detect_yunet(yunet, frame)
+            else:
+                cascade = self._get_cascade()
+                if cascade is None:
+                    return {'face_count': 0, 'faces': []}
+                faces = self._detect_haar(cascade, frame, gray)
             
             # DO NOT USE DEEPFACE FALLBACK - it's too slow!
-            # If Haar finds nothing, just return empty (AWS will handle it)
+            # If nothing is found, just return empty (AWS will handle it)
             
-            face_boxes = []
-            for idx, (x, y, w, h) in enumerate(faces):
-                print(f"🔍 DEBUG: Face {idx}: x={x}, y={y}, w={w}, h={h}")
-                face_boxes.append({
+            face_boxes = [
+                {
                     'x1': int(x),
                     'y1': int(y),
                     'x2': int(x + w),
                     'y2': int(y + h),
                     'center_x': int(x + w/2),
                     'center_y': int(y + h/2)
-                })
+                }
+                for x, y, w, h in faces.tolist()
+            ]
             
-            print(f"✅ DETECT_FACES: Found {len(face_boxes)} faces (Haar Cascade only)")
+            logger.debug("✅ DETECT_FACES: Found %s faces (%s)", len(face_boxes),
+                         "YuNet" if yunet is not None else "Haar Cascade")
             return {
                 'face_count': len(face_boxes),
                 'faces': face_boxes
             }
         except Exception as e:
-            print(f"❌ FACE DETECTION ERROR: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ FACE DETECTION ERROR: %s", e)
             return {'face_count': 0, 'faces': []}
     
     def _preprocess_face(self, face_crop):
-        """Preprocess face image to handle lighting and size variations"""
+        """
+        Preprocess face image to handle lighting variations
+        
+        Returns a BGR uint8 crop; resizing and scaling to the model's input
+        range happen once, while _embed_faces copies it into the batch.
+        """
         try:
             # Ensure the image is in the right format for DeepFace
             if len(face_crop.shape) == 2:  # Grayscale
                 face_crop = cv2.cvtColor(face_crop, cv2.COLOR_GRAY2BGR)
             
+            # Only poorly lit / low-contrast crops need equalizing
+            gray = cv2.cvtColor(face_crop, cv2.COLOR_BGR2GRAY)
+            if cv2.meanStdDev(gray)[1][0, 0] >= CLAHE_MAX_STD:
+                return face_crop
+            
             # Apply CLAHE (Contrast Limited Adaptive Histogram Equalization) for lighting normalization
             lab = cv2.cvtColor(face_crop, cv2.COLOR_BGR2LAB)
             l, a, b = cv2.split(lab)
             
-            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-            l = clahe.apply(l)
+            l = self._equalize(l)
             
             lab = cv2.merge([l, a, b])
-            face_crop = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
-            
-            # Normalize pixel values
-            face_crop = face_crop.astype('float32') / 255.0
-            face_crop = (face_crop - 0.5) * 2.0  # Normalize to [-1, 1]
-            
-            # Convert back to uint8 for DeepFace
-            face_crop = ((face_crop + 1.0) * 127.5).astype('uint8')
-            
-            return face_crop
+            return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
         except Exception as e:
-            print(f"⚠️  Preprocessing failed: {e}, using original crop")
+            logger.warning("⚠️  Preprocessing failed: %s, using original crop", e)
             return face_crop
     
-    def recognize_faces(self, frame):
+    def _equalize(self, channel):
+        """CLAHE on a single uint8 channel, on the GPU when available"""
+        if self._cuda_clahe is not None:
+            try:
+                gpu = cv2.cuda_GpuMat()
+                gpu.upload(channel)
+                return self._cuda_clahe.apply(gpu, cv2.cuda.Stream_Null()).download()
+            except cv2.error as e:
+                logger.warning("⚠️ CUDA CLAHE failed, using CPU: %s", e)
+                self._cuda_clahe = None
+        return self._clahe.apply(channel)
+    
+    def recognize_faces(self, frame, face_detections=None):
         """
         Recognize faces in frame using embeddings with cosine distance threshold
         
+        Args:
+            frame: BGR image
+            face_detections: detect_faces(frame) result when the caller already
+                ran detection, so it isn't repeated here
+        
         Returns:
             {
                 'recognized': list of names,
@@ -336,34 +690,37 @@ class FaceRecognizer:
                 'registered_faces_count': int
             }
         """
-        print("\n🔍 DEBUG: recognize_faces() called")
+        # Per-face trace lines below are skipped entirely unless DEBUG is on
+        debug = logger.isEnabledFor(logging.DEBUG)
         self._ensure_deepface()
-        print(f"🔍 DEBUG: Cache size={len(self.embeddings_cache)}, Names={list(self.embeddings_cache.keys())}")
+        if debug:
+            logger.debug("🔍 DEBUG: recognize_faces() called, cache size=%s, names=%s",
+                         len(self._emb_names), self._emb_names)
+        
+        # Detect faces in current frame - exactly once per call, every path
+        # below (including the error path) reuses this
+        if face_detections is None:
+            logger.debug("🔍 DEBUG: Detecting faces...")
+            face_detections = self.detect_faces(frame)
+        face_boxes = face_detections['faces']
+        logger.debug("🔍 DEBUG: Found %s faces", len(face_boxes))
         
         # If no registered faces, skip recognition
         if not self.embeddings_cache:
-            print("🔍 DEBUG: No registered faces!")
-            face_count = self.detect_faces(frame)['face_count']
-            print(f"🔍 DEBUG: Detected {face_count} faces but no registered faces to match against")
+            logger.debug("🔍 DEBUG: Detected %s faces but no registered faces to match against", len(face_boxes))
             return {
                 'recognized': [],
-                'unknown_count': face_count,
+                'unknown_count': len(face_boxes),
                 'registered_faces_count': 0
             }
         
         try:
-            # Detect faces in current frame
-            print(f"🔍 DEBUG: Detecting faces...")
-            face_detections = self.detect_faces(frame)
-            face_boxes = face_detections['faces']
-            print(f"🔍 DEBUG: Found {len(face_boxes)} faces")
-            
             # Deduplicate nearby detections (same face detected multiple times)
             face_boxes = self._deduplicate_faces(face_boxes)
-            print(f"🔍 DEBUG: After deduplication: {len(face_boxes)} faces")
+            logger.debug("🔍 DEBUG: After deduplication: %s faces", len(face_boxes))
             
             if not face_boxes:
-                print(f"🔍 DEBUG: No faces detected")
+                logger.debug("🔍 DEBUG: No faces detected")
                 return {
                     'recognized': [],
                     'unknown_count': 0,
@@ -373,91 +730,77 @@ class FaceRecognizer:
             
             recognized = []
             
-            # Generate embeddings for detected faces
+            # Crop every usable face; faces matched in the last few frames
+            # reuse that match, the rest are embedded in one batch
+            matches = []  # (name, distance) per usable face, in box order
+            crops = []
+            pending = []  # (matches index, crop hash) for each entry in crops
             for idx, face_box in enumerate(face_boxes):
-                print(f"\n🔍 DEBUG: Face {idx+1}/{len(face_boxes)}")
                 try:
                     # Crop face region
                     x1 = max(0, face_box['x1'])
                     y1 = max(0, face_box['y1'])
                     x2 = min(frame.shape[1], face_box['x2'])
                     y2 = min(frame.shape[0], face_box['y2'])
-                    print(f"🔍 DEBUG: Box=({x1},{y1})-({x2},{y2}), Size={x2-x1}x{y2-y1}")
+                    if debug:
+                        logger.debug("🔍 DEBUG: Face %s/%s Box=(%s,%s)-(%s,%s), Size=%sx%s",
+                                     idx+1, len(face_boxes), x1, y1, x2, y2, x2-x1, y2-y1)
                     
                     # Skip if face region is too small
                     if (x2 - x1) < 20 or (y2 - y1) < 20:
-                        print(f"🔍 DEBUG: Face too small, skipping")
+                        if debug:
+                            logger.debug("🔍 DEBUG: Face too small, skipping")
                         continue
                     
                     face_crop = frame[y1:y2, x1:x2]
-                    print(f"🔍 DEBUG: Generating embedding...")
+                    crop_hash = dhash(face_crop)
+                    cached = self._cached_match(crop_hash)
+                    if cached is not None:
+                        matches.append(cached)
+                        continue
                     
                     # Preprocess face crop for better recognition
-                    face_crop = self._preprocess_face(face_crop)
-                    
-                    # Generate embedding for this face
-                    face_embedding = self.deepface.represent(
-                        face_crop,
-                        model_name='Facenet512',
-                        enforce_detection=False
-                    )[0]['embedding']
-                    
-                    # Normalize embedding to unit vector for better cosine distance
-                    face_embedding = np.array(face_embedding)
-                    face_embedding = face_embedding / (np.linalg.norm(face_embedding) + 1e-8)
-                    
-                    print(f"🔍 DEBUG: Embedding shape={len(face_embedding)}")
-                    
-                    # Find best match in registered embeddings
-                    best_match = None
-                    best_distance = float('inf')
-                    
-                    print(f"🔍 DEBUG: Comparing to {len(self.embeddings_cache)} registered faces...")
-                    for employee_name, registered_embedding in self.embeddings_cache.items():
-                        # Ensure embeddings have same dimensions
-                        reg_emb = np.array(registered_embedding)
-                        
-                        # Normalize registered embedding if not already normalized
-                        if np.linalg.norm(reg_emb) > 1.1:  # Check if normalized
-                            reg_emb = reg_emb / (np.linalg.norm(reg_emb) + 1e-8)
-                        
-                        # Calculate cosine distance
-                        distance = cosine(face_embedding, reg_emb)
-                        print(f"🔍 DEBUG: vs {employee_name}: distance={distance:.4f}")
-                        
-                        if distance < best_distance:
-                            best_distance = distance
-                            best_match = employee_name
-                    
-                    print(f"🔍 DEBUG: Best={best_match} (distance={best_distance:.4f}, threshold={self.face_distance_threshold})")
-                    
-                    # Check if distance is below threshold
-                    if best_distance <= self.face_distance_threshold and best_match:
-                        recognized.append(best_match)
-                        print(f"✅ RECOGNIZED: {best_match}")
-                    else:
-                        print(f"❓ UNKNOWN FACE (distance={best_distance:.4f} > threshold={self.face_distance_threshold})")
-                        
+                    crops.append(self._preprocess_face(face_crop))
+                    pending.append((len(matches), crop_hash))
+                    matches.append(None)
                 except Exception as e:
-                    print(f"❌ ERROR processing face: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.exception("❌ ERROR processing face: %s", e)
                     continue
             
+            if crops:
+                logger.debug("🔍 DEBUG: Generating %s embeddings (%s cached)...", len(crops), len(matches) - len(crops))
+                embeddings = self._embed_faces(crops)
+                
+                # Find best match in registered embeddings
+                matcher = self._matcher
+                logger.debug("🔍 DEBUG: Comparing to %s registered faces...", len(matcher[1]))
+                names, distances = self._match_embeddings(embeddings, matcher)
+                
+                for (slot, crop_hash), name, distance in zip(pending, names, distances.tolist()):
+                    matches[slot] = (name, distance)
+                    self._cache_match(crop_hash, name, distance, matcher)
+            
+            for best_match, best_distance in matches:
+                # Check if distance is below threshold
+                matched = best_match is not None and best_distance <= self.face_distance_threshold
+                if matched:
+                    recognized.append(best_match)
+                if debug:
+                    logger.debug("🔍 DEBUG: Best=%s (distance=%.4f, threshold=%s) -> %s", best_match, best_distance,
+                                 self.face_distance_threshold, "✅ RECOGNIZED" if matched else "❓ UNKNOWN")
+            
             result = {
                 'recognized': recognized,
                 'unknown_count': max(0, len(face_boxes) - len(recognized)),
                 'registered_faces_count': len(self.embeddings_cache),
                 'face_bboxes': face_boxes  # Include bboxes so frontend can draw them
             }
-            print(f"\n✅ RECOGNITION RESULT: recognized={result['recognized']}, unknown={result['unknown_count']}")
+            logger.debug("✅ RECOGNITION RESULT: recognized=%s, unknown=%s", result['recognized'], result['unknown_count'])
             return result
         except Exception as e:
-            print(f"❌ FACE RECOGNITION ERROR: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ FACE RECOGNITION ERROR: %s", e)
             return {
                 'recognized': [],
-                'unknown_count': self.detect_faces(frame)['face_count'],
+                'unknown_count': len(face_boxes),
                 'registered_faces_count': len(self.embeddings_cache)
             }
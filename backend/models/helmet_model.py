@@ -2,12 +2,21 @@
 Helmet/PPE Detection Model Wrapper
 Reuses existing YOLOv8 custom helmet model with tracking
 """
-from ultralytics import YOLO
+import logging
+from models.yolo_backend import load_yolo
 from pathlib import Path
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 class HelmetDetector:
-    """Wrapper for helmet detection using existing custom YOLO model"""
+    """
+    Wrapper for helmet detection using existing custom YOLO model
+
+    Track IDs come from Ultralytics' ByteTrack (Kalman motion model plus
+    association inside model.track, state kept via persist=True); the Python
+    centroid ObjectTracker in models/tracker.py is only for loitering.
+    """
     
     def __init__(self):
         self.model = None
@@ -19,7 +28,7 @@ class HelmetDetector:
         try:
             BASE_DIR = Path(__file__).parent.parent
             model_path = BASE_DIR / 'models' / 'best_helmet.pt'
-            self.model = YOLO(str(model_path))
+            self.model = load_yolo(model_path)
             print("✅ Helmet Detection Model Loaded")
             return True
         except Exception as e:
@@ -60,54 +69,90 @@ class HelmetDetector:
             else:
                 results = self.model(frame, conf=self.confidence_threshold, verbose=False)[0]
             
-            people_boxes = []
-            helmet_boxes = []
-            violation_boxes = []
-            
-            if results.boxes:
-                for box in results.boxes:
-                    cls_id = int(box.cls[0])
-                    conf = float(box.conf[0])
-                    xyxy = box.xyxy[0].cpu().numpy()
-                    
-                    center_x = int((xyxy[0] + xyxy[2]) / 2)
-                    center_y = int((xyxy[1] + xyxy[3]) / 2)
-                    
-                    box_data = {
-                        'x1': int(xyxy[0]),
-                        'y1': int(xyxy[1]),
-                        'x2': int(xyxy[2]),
-                        'y2': int(xyxy[3]),
-                        'confidence': conf,
-                        'class_id': cls_id,
-                        'center_x': center_x,
-                        'center_y': center_y
-                    }
-                    
-                    # Add tracking ID if available (from YOLO tracking)
-                    if track and hasattr(box, 'id') and box.id is not None:
-                        box_data['track_id'] = int(box.id[0])
-                    
-                    # Class mapping: 0=head (no helmet), 1=hardhat, 2=person
-                    if cls_id == 0:  # head without helmet - VIOLATION
-                        violation_boxes.append(box_data)
-                    elif cls_id == 1:  # hardhat - COMPLIANT
-                        helmet_boxes.append(box_data)
-                    elif cls_id == 2:  # person
-                        people_boxes.append(box_data)
-            
-            return {
-                'people_count': len(people_boxes) + len(helmet_boxes) + len(violation_boxes),
-                'helmet_count': len(helmet_boxes),
-                'violation_count': len(violation_boxes),
-                'people_boxes': people_boxes,
-                'helmet_boxes': helmet_boxes,
-                'violation_boxes': violation_boxes
-            }
+            return self._parse(results, track)
         except Exception as e:
-            print(f"Helmet detection error: {e}")
+            logger.error("Helmet detection error: %s", e)
             return self._empty_result()
     
+    def detect_batch(self, frames, track=True):
+        """
+        Detect on several frames (e.g. one per camera) with a single YOLO call
+
+        Ultralytics letterboxes the list into one (N,3,H,W) tensor, so the
+        GPU sees one batched forward pass instead of N launches. With track=True
+        each list position keeps its own ByteTrack state, so callers must pass
+        cameras in the same order every time (and not mix in detect() calls).
+
+        Returns:
+            list of detect()-style dicts, one per frame
+        """
+        if self.model is None or not frames:
+            return [self._empty_result() for _ in frames]
+
+        try:
+            if track:
+                results = self.model.track(
+                    list(frames),
+                    conf=self.confidence_threshold,
+                    persist=True,
+                    tracker=self.tracker_config,
+                    verbose=False
+                )
+            else:
+                results = self.model(list(frames), conf=self.confidence_threshold, verbose=False)
+
+            return [self._parse(res, track) for res in results]
+        except Exception as e:
+            logger.error("Helmet batch detection error: %s", e)
+            return [self._empty_result() for _ in frames]
+
+    def _parse(self, results, track):
+        """Split one frame's YOLO result into people/helmet/violation boxes"""
+        if not results.boxes:
+            return self._empty_result()
+
+        # One device->host copy; columns are xyxy, [track id,] conf, cls
+        data = results.boxes.data.cpu().numpy()
+        xyxy = data[:, :4]
+        corners = xyxy.astype(np.int32)
+        centers = ((xyxy[:, :2] + xyxy[:, 2:]) / 2).astype(np.int32)
+        confs = data[:, -2]
+        class_ids = data[:, -1].astype(np.int32)
+        track_ids = data[:, 4].astype(np.int64) if track and data.shape[1] == 7 else None
+
+        def boxes_of(cls_id):
+            mask = class_ids == cls_id
+            rows = zip(corners[mask].tolist(), centers[mask].tolist(), confs[mask].tolist())
+            boxes = [
+                {
+                    'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+                    'confidence': conf,
+                    'class_id': cls_id,
+                    'center_x': cx,
+                    'center_y': cy
+                }
+                for (x1, y1, x2, y2), (cx, cy), conf in rows
+            ]
+            # Add tracking ID if available (from YOLO tracking)
+            if track_ids is not None:
+                for box_data, track_id in zip(boxes, track_ids[mask].tolist()):
+                    box_data['track_id'] = track_id
+            return boxes
+
+        # Class mapping: 0=head (no helmet), 1=hardhat, 2=person
+        violation_boxes = boxes_of(0)  # head without helmet - VIOLATION
+        helmet_boxes = boxes_of(1)  # hardhat - COMPLIANT
+        people_boxes = boxes_of(2)  # person
+
+        return {
+            'people_count': len(people_boxes) + len(helmet_boxes) + len(violation_boxes),
+            'helmet_count': len(helmet_boxes),
+            'violation_count': len(violation_boxes),
+            'people_boxes': people_boxes,
+            'helmet_boxes': helmet_boxes,
+            'violation_boxes': violation_boxes
+        }
+
     def _empty_result(self):
         return {
             'people_count': 0,
@@ -1,45 +1,200 @@
 """
 Object Tracking and ID Persistence
-Used for loitering detection and auto-tracking feature
+Used for loitering detection and auto-tracking feature, which need per-object
+duration/movement; helmet and box detection track with YOLO's ByteTrack
 """
 import numpy as np
-from collections import defaultdict
 import time
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+def _pairwise_distances_numpy(a, b):
+    """Euclidean distance matrix between (N, 2) and (M, 2) point arrays"""
+    diff = a[:, None, :] - b[None, :, :]
+    return np.sqrt((diff * diff).sum(axis=2))
+
+
+if njit is not None:
+    # Signature given so it compiles once at import, not on the first frame
+    @njit('float64[:, :](float64[:, :], float64[:, :])', cache=True)
+    def pairwise_distances(a, b):
+        """Euclidean distance matrix between (N, 2) and (M, 2) point arrays"""
+        out = np.empty((a.shape[0], b.shape[0]))
+        for i in range(a.shape[0]):
+            for j in range(b.shape[0]):
+                dx = a[i, 0] - b[j, 0]
+                dy = a[i, 1] - b[j, 1]
+                out[i, j] = np.sqrt(dx * dx + dy * dy)
+        return out
+else:
+    pairwise_distances = _pairwise_distances_numpy
+
+
+def _greedy_match_numpy(distances, max_distance):
+    """
+    Greedy nearest-neighbour assignment.
+
+    Rows are visited in order of their closest detection; each row takes its
+    argmin column unless that row/column is already used or too far away.
+    Returns (rows, cols) index arrays of the accepted pairs.
+    """
+    order = distances.min(axis=1).argsort()
+    best = distances.argmin(axis=1)
+    used_cols = set()
+    rows, cols = [], []
+    for row in order:
+        col = best[row]
+        if col in used_cols or distances[row, col] > max_distance:
+            continue
+        used_cols.add(col)
+        rows.append(row)
+        cols.append(col)
+    return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+
+if njit is not None:
+    @njit('Tuple((int64[:], int64[:]))(float64[:, :], float64)', cache=True)
+    def greedy_match(distances, max_distance):
+        """Greedy nearest-neighbour assignment (see _greedy_match_numpy)"""
+        n_rows, n_cols = distances.shape
+        row_min = np.empty(n_rows)
+        best = np.empty(n_rows, dtype=np.int64)
+        for i in range(n_rows):
+            best[i] = 0
+            row_min[i] = distances[i, 0]
+            for j in range(1, n_cols):
+                if distances[i, j] < row_min[i]:
+                    row_min[i] = distances[i, j]
+                    best[i] = j
+        
+        used_cols = np.zeros(n_cols, dtype=np.bool_)
+        rows = np.empty(min(n_rows, n_cols), dtype=np.int64)
+        cols = np.empty(min(n_rows, n_cols), dtype=np.int64)
+        n = 0
+        for row in np.argsort(row_min):
+            col = best[row]
+            if used_cols[col] or row_min[row] > max_distance:
+                continue
+            used_cols[col] = True
+            rows[n] = row
+            cols[n] = col
+            n += 1
+        return rows[:n], cols[:n]
+else:
+    greedy_match = _greedy_match_numpy
+
+
+def match_tracks(distances, max_distance):
+    """
+    Assign detections (columns) to tracks (rows), at most one each.
+
+    Uses the Hungarian algorithm when scipy is installed, so two tracks
+    contending for one detection can't swap IDs; otherwise greedy_match.
+    Pairs further apart than max_distance are never accepted.
+    Returns (rows, cols) index arrays of the accepted pairs.
+    """
+    if linear_sum_assignment is None:
+        return greedy_match(distances, max_distance)
+    
+    # Out-of-range pairs get a cost no accepted assignment can beat, so they
+    # never pull a valid pair out of the optimum and are dropped afterwards
+    gated = np.where(distances > max_distance, 1e6, distances)
+    rows, cols = linear_sum_assignment(gated)
+    keep = distances[rows, cols] <= max_distance
+    return rows[keep].astype(np.int64), cols[keep].astype(np.int64)
+
+
 class ObjectTracker:
     """
     Simple object tracker using centroid tracking
     Tracks objects across frames and maintains IDs
+
+    Per-track state is kept as parallel NumPy arrays (struct-of-arrays) over
+    the first `size` slots, with `id_to_idx` mapping object IDs to slots, so
+    per-frame ageing, expiry and distance matching are vector operations.
     """
     
+    INITIAL_CAPACITY = 64
+    MATCH_DISTANCE = 50  # pixels
+    _ARRAYS = ('ids', 'centroids', 'initial_positions', 'first_seen', 'disappeared')
+    
     def __init__(self, max_disappeared=30):
         """
         Args:
             max_disappeared: Max frames an object can disappear before being deregistered
         """
         self.next_object_id = 0
-        self.objects = {}  # object_id: centroid
-        self.disappeared = defaultdict(int)
-        self.timestamps = {}  # object_id: first_seen_timestamp
-        self.initial_positions = {}  # object_id: first centroid position
         self.max_disappeared = max_disappeared
+        self.size = 0
+        self.id_to_idx = {}  # object_id: slot
+        
+        capacity = self.INITIAL_CAPACITY
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.centroids = np.zeros((capacity, 2), dtype=np.float64)
+        self.initial_positions = np.zeros((capacity, 2), dtype=np.float64)
+        self.first_seen = np.zeros(capacity, dtype=np.float64)
+        self.disappeared = np.zeros(capacity, dtype=np.int32)
+    
+    def _grow(self):
+        """Double the capacity of every state array"""
+        for name in self._ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros((2 * len(old),) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+    
+    def get_objects(self):
+        """{object_id: (x, y)} for the currently tracked objects (built per call)"""
+        return dict(zip(self.ids[:self.size].tolist(),
+                        map(tuple, self.centroids[:self.size].tolist())))
+    
+    objects = property(get_objects)
+    
+    def positions(self):
+        """(ids, centroids) views over the live slots - no dict, no copies"""
+        return self.ids[:self.size], self.centroids[:self.size]
     
     def register(self, centroid):
         """Register a new object"""
-        self.objects[self.next_object_id] = centroid
-        self.disappeared[self.next_object_id] = 0
-        self.timestamps[self.next_object_id] = time.time()
-        self.initial_positions[self.next_object_id] = centroid
+        if self.size == len(self.ids):
+            self._grow()
+        idx = self.size
+        self.ids[idx] = self.next_object_id
+        self.centroids[idx] = centroid
+        self.initial_positions[idx] = centroid
+        self.first_seen[idx] = time.time()
+        self.disappeared[idx] = 0
+        self.id_to_idx[self.next_object_id] = idx
+        self.size += 1
         self.next_object_id += 1
     
     def deregister(self, object_id):
-        """Remove an object from tracking"""
-        del self.objects[object_id]
-        del self.disappeared[object_id]
-        if object_id in self.timestamps:
-            del self.timestamps[object_id]
-        if object_id in self.initial_positions:
-            del self.initial_positions[object_id]
+        """Remove an object from tracking (swap-remove with the last slot)"""
+        idx = self.id_to_idx.pop(object_id)
+        last = self.size - 1
+        if idx != last:
+            for name in self._ARRAYS:
+                arr = getattr(self, name)
+                arr[idx] = arr[last]
+            self.id_to_idx[int(self.ids[idx])] = idx
+        self.size = last
+    
+    def _expire(self, missing):
+        """Age the slots flagged in `missing` and drop those gone too long"""
+        n = self.size
+        self.disappeared[:n][missing] += 1
+        expired = self.ids[:n][self.disappeared[:n] > self.max_disappeared]
+        for object_id in expired.tolist():
+            self.deregister(object_id)
     
     def update(self, detections):
         """
@@ -53,83 +208,49 @@ class ObjectTracker:
         """
         # If no detections, mark all as disappeared
         if len(detections) == 0:
-            for object_id in list(self.disappeared.keys()):
-                self.disappeared[object_id] += 1
-                if self.disappeared[object_id] > self.max_disappeared:
-                    self.deregister(object_id)
+            self._expire(np.ones(self.size, dtype=bool))
             return self.objects
         
+        points = np.asarray(detections, dtype=np.float64).reshape(-1, 2)
+        
         # If no existing objects, register all detections
-        if len(self.objects) == 0:
-            for centroid in detections:
-                self.register(centroid)
-        else:
-            # Match existing objects to new detections
-            object_ids = list(self.objects.keys())
-            object_centroids = list(self.objects.values())
-            
-            # Compute distance matrix
-            distances = np.zeros((len(object_centroids), len(detections)))
-            for i, obj_centroid in enumerate(object_centroids):
-                for j, det_centroid in enumerate(detections):
-                    distances[i, j] = np.linalg.norm(
-                        np.array(obj_centroid) - np.array(det_centroid)
-                    )
-            
-            # Match using nearest neighbor
-            rows = distances.min(axis=1).argsort()
-            cols = distances.argmin(axis=1)[rows]
-            
-            used_rows = set()
-            used_cols = set()
-            
-            # Update matched objects
-            for row, col in zip(rows, cols):
-                if row in used_rows or col in used_cols:
-                    continue
-                
-                # Distance threshold for matching (50 pixels)
-                if distances[row, col] > 50:
-                    continue
-                
-                object_id = object_ids[row]
-                self.objects[object_id] = detections[col]
-                self.disappeared[object_id] = 0
-                
-                used_rows.add(row)
-                used_cols.add(col)
-            
-            # Mark unmatched objects as disappeared
-            unused_rows = set(range(len(object_centroids))) - used_rows
-            for row in unused_rows:
-                object_id = object_ids[row]
-                self.disappeared[object_id] += 1
-                if self.disappeared[object_id] > self.max_disappeared:
-                    self.deregister(object_id)
-            
-            # Register new objects
-            unused_cols = set(range(len(detections))) - used_cols
-            for col in unused_cols:
-                self.register(detections[col])
+        if self.size == 0:
+            for point in points:
+                self.register(point)
+            return self.objects
+        
+        # Match existing objects to new detections
+        n = self.size
+        distances = pairwise_distances(self.centroids[:n], points)
+        rows, cols = match_tracks(distances, float(self.MATCH_DISTANCE))
+        
+        # Update matched objects
+        self.centroids[rows] = points[cols]
+        self.disappeared[rows] = 0
+        
+        # Mark unmatched objects as disappeared
+        missing = np.ones(n, dtype=bool)
+        missing[rows] = False
+        self._expire(missing)
+        
+        # Register new objects
+        unmatched_cols = np.ones(len(points), dtype=bool)
+        unmatched_cols[cols] = False
+        for point in points[unmatched_cols]:
+            self.register(point)
         
         return self.objects
     
     def get_object_duration(self, object_id):
         """Get how long an object has been tracked (in seconds)"""
-        if object_id in self.timestamps:
-            return time.time() - self.timestamps[object_id]
-        return 0
+        idx = self.id_to_idx.get(object_id)
+        if idx is None:
+            return 0
+        return time.time() - self.first_seen[idx]
     
     def get_object_movement(self, object_id):
         """Get total movement distance of object from initial position (in pixels)"""
-        if object_id not in self.objects or object_id not in self.initial_positions:
+        idx = self.id_to_idx.get(object_id)
+        if idx is None:
             return 0
-        
-        current_pos = self.objects[object_id]
-        initial_pos = self.initial_positions[object_id]
-        
-        movement = np.sqrt(
-            (current_pos[0] - initial_pos[0])**2 + 
-            (current_pos[1] - initial_pos[1])**2
-        )
-        return movement
+        return float(np.linalg.norm(self.centroids[idx] - self.initial_positions[idx]))
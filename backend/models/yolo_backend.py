@@ -0,0 +1,90 @@
+"""
+YOLO Backend Selection
+Loads a YOLO .pt model through its fastest available exported form.
+
+Ultralytics' YOLO() accepts a TensorRT .engine or an ONNX file in place of
+the PyTorch weights, and predict()/track() results are the same objects, so
+the model wrappers don't change. Export sits next to the .pt file:
+
+    best_helmet.pt  ->  best_helmet.engine  (TensorRT FP16, CUDA only)
+                    ->  best_helmet.onnx    (ONNX Runtime: TensorRT/CUDA/CPU EP)
+
+YOLO_BACKEND = auto (default) | engine | onnx | pt
+YOLO_EXPORT  = 1 to build the missing artifact on first load (slow: minutes
+               for TensorRT). Otherwise only already-exported files are used.
+"""
+
+import logging
+import os
+from pathlib import Path
+
+from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+YOLO_BACKEND = os.getenv("YOLO_BACKEND", "auto").lower()
+YOLO_EXPORT = os.getenv("YOLO_EXPORT", "").lower() in ("1", "true", "yes")
+EXPORT_IMGSZ = 640  # exported graphs have a fixed input; Ultralytics letterboxes to it
+
+
+def cuda_available():
+    """Whether torch can run on a CUDA device (False without torch)"""
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+def _module_available(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def _candidates():
+    """Exported formats to try, fastest first"""
+    if YOLO_BACKEND == "pt":
+        return []
+    cuda = cuda_available()
+    formats = []
+    if YOLO_BACKEND in ("auto", "engine") and cuda and _module_available("tensorrt"):
+        formats.append("engine")
+    if YOLO_BACKEND in ("auto", "onnx") and _module_available("onnxruntime"):
+        formats.append("onnx")
+    return formats
+
+
+def _export(pt_path, fmt):
+    """Export pt_path to fmt next to it; returns the artifact path or None"""
+    half = fmt == "engine" or cuda_available()  # FP16 needs a GPU
+    try:
+        logger.info("⚙️  Exporting %s to %s (half=%s)...", pt_path.name, fmt, half)
+        exported = YOLO(str(pt_path)).export(format=fmt, half=half, imgsz=EXPORT_IMGSZ)
+        return Path(exported)
+    except Exception as e:
+        logger.warning("⚠️ %s export of %s failed: %s", fmt, pt_path.name, e)
+        return None
+
+
+def load_yolo(pt_path):
+    """
+    YOLO model for pt_path, backed by a TensorRT engine or ONNX graph when
+    one exists (or YOLO_EXPORT is on), else the PyTorch weights
+    """
+    pt_path = Path(pt_path)
+    for fmt in _candidates():
+        artifact = pt_path.with_suffix(f".{fmt}")
+        if not artifact.exists() and YOLO_EXPORT:
+            artifact = _export(pt_path, fmt)
+        if artifact is None or not artifact.exists():
+            continue
+        try:
+            model = YOLO(str(artifact), task="detect")
+            logger.info("🚀 %s: using %s backend", pt_path.name, fmt)
+            return model
+        except Exception as e:
+            logger.warning("⚠️ Could not load %s, trying next backend: %s", artifact.name, e)
+    return YOLO(str(pt_path))
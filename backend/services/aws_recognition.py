@@ -7,12 +7,15 @@ import boto3
 import numpy as np
 from PIL import Image
 import io
+import logging
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class AWSRecognizer:
     """AWS Rekognition face detection and recognition"""
     
@@ -91,11 +94,11 @@ class AWSRecognizer:
                     'face_data': face_detail  # Store for additional analysis
                 })
             
-            print(f"✅ AWS DETECT_FACES: Found {len(faces)} faces")
+            logger.debug("✅ AWS DETECT_FACES: Found %s faces", len(faces))
             return faces
             
         except Exception as e:
-            print(f"❌ AWS Detection Error: {e}")
+            logger.error("❌ AWS Detection Error: %s", e)
             return []
     
     def recognize_faces(self, frame, face_boxes=None):
@@ -114,9 +117,9 @@ class AWSRecognizer:
         try:
             # If no face boxes provided, detect them first
             if not face_boxes:
-                print("   🔍 AWS: Detecting faces...")
+                logger.debug("   🔍 AWS: Detecting faces...")
                 face_boxes = self.detect_faces(frame)
-                print(f"   ✅ AWS: Found {len(face_boxes)} faces")
+                logger.debug("   ✅ AWS: Found %s faces", len(face_boxes))
             
             recognized_names = []
             unknown_count = 0
@@ -136,13 +139,13 @@ class AWSRecognizer:
                 # AWS needs minimum 10px to work (was 20px)
                 # Allows detection of faces very far from camera
                 if (x2 - x1) < 10 or (y2 - y1) < 10:
-                    print(f"   ⚠️  Face {idx} too small (<10px), skipping recognition")
+                    logger.debug("   ⚠️  Face %s too small (<10px), skipping recognition", idx)
                     unknown_count += 1
                     continue
                 
                 # Warn if small but still process
                 if (x2 - x1) < 20 or (y2 - y1) < 20:
-                    print(f"   🔍 Face {idx} small ({x2-x1}x{y2-y1}px) - long-distance, processing anyway...")
+                    logger.debug("   🔍 Face %s small (%sx%spx) - long-distance, processing anyway...", idx, x2-x1, y2-y1)
                 
                 face_crop = frame[y1:y2, x1:x2]
                 
@@ -169,10 +172,10 @@ class AWSRecognizer:
                     external_id = face_record.get('ExternalImageId', 'Unknown')
                     similarity = match['Similarity']
                     
-                    print(f"   ✅ MATCHED: {external_id} (Similarity: {similarity:.1f}%)")
+                    logger.debug("   ✅ MATCHED: %s (Similarity: %.1f%%)", external_id, similarity)
                     recognized_names.append(external_id)
                 else:
-                    print(f"   ❓ NO MATCH: Face {idx} (Similarity < {self.confidence_threshold}%)")
+                    logger.debug("   ❓ NO MATCH: Face %s (Similarity < %s%%)", idx, self.confidence_threshold)
                     unknown_count += 1
             
             result = {
@@ -181,11 +184,11 @@ class AWSRecognizer:
                 'face_bboxes': all_bboxes  # Return all detected bboxes
             }
             
-            print(f"✅ AWS RECOGNITION RESULT: recognized={recognized_names}, unknown={unknown_count}")
+            logger.debug("✅ AWS RECOGNITION RESULT: recognized=%s, unknown=%s", recognized_names, unknown_count)
             return result
             
         except Exception as e:
-            print(f"❌ AWS Recognition Error: {e}")
+            logger.error("❌ AWS Recognition Error: %s", e)
             return {
                 'recognized': [],
                 'unknown': len(face_boxes),
@@ -232,12 +235,13 @@ class AWSRecognizer:
     def list_collection_faces(self):
         """List all faces in collection"""
         try:
-            response = self.client.list_faces(
-                CollectionId=self.collection_id,
-                MaxResults=100
-            )
-            
-            faces = response.get('Faces', [])
+            # Paginated: a single ListFaces call stops at MaxResults
+            paginator = self.client.get_paginator('list_faces')
+            faces = [
+                face
+                for page in paginator.paginate(CollectionId=self.collection_id, MaxResults=4096)
+                for face in page.get('Faces', [])
+            ]
             print(f"📋 COLLECTION '{self.collection_id}' has {len(faces)} faces:")
             for face in faces:
                 print(f"   - {face['ExternalImageId']} (ID: {face['FaceId'][:8]}...)")
@@ -0,0 +1,41 @@
+"""
+Coarse Wall Clock
+ISO timestamp string refreshed by a background task.
+
+Response timestamps only need ~100 ms resolution, so high-QPS endpoints
+read one shared string instead of building and formatting a datetime per
+request. Until start_clock() runs on an event loop, now_iso() falls back
+to a precise datetime.now() so scripts and the Django side stay correct.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+REFRESH_INTERVAL = 0.1  # seconds
+
+_now_iso = datetime.now().isoformat()
+_task: Optional[asyncio.Task] = None
+
+
+def now_iso() -> str:
+    """Current local time as an ISO 8601 string (±REFRESH_INTERVAL once started)."""
+    if _task is None:
+        return datetime.now().isoformat()
+    return _now_iso
+
+
+async def _refresh(interval: float) -> None:
+    global _now_iso
+    while True:
+        _now_iso = datetime.now().isoformat()
+        await asyncio.sleep(interval)
+
+
+def start_clock(interval: float = REFRESH_INTERVAL) -> asyncio.Task:
+    """Start the refresh task on the running loop. Call from a startup hook."""
+    global _task, _now_iso
+    if _task is None or _task.done():
+        _now_iso = datetime.now().isoformat()
+        _task = asyncio.get_running_loop().create_task(_refresh(interval))
+    return _task
@@ -2,6 +2,7 @@
 Unified Detection Pipeline
 Processes one frame through all enabled features
 """
+import logging
 import cv2
 import numpy as np
 from models.helmet_model import HelmetDetector
@@ -12,6 +13,9 @@ from services.loitering import LoiteringDetector
 from services.line_crossing import LineCrossingDetector
 from services.motion import MotionDetector
 from services.crowd_detector import CrowdDetector
+from services.clock import now_iso
+
+logger = logging.getLogger(__name__)
 
 class DetectionPipeline:
     """Unified pipeline for processing frames with multiple AI features"""
@@ -186,19 +190,19 @@ class DetectionPipeline:
         # Feature 11 & 12: Face Detection & Recognition
         # Auto-enable face detection if face recognition is requested
         if enabled_features.get('face_detection', False) or enabled_features.get('face_recognition', False):
-            print("\n[PIPELINE] Running face detection...")
+            logger.debug("[PIPELINE] Running face detection...")
             face_result = self.face_detector.detect_faces(frame)
             result['faces_detected'] = face_result['face_count']
-            print(f"[PIPELINE] Detected {face_result['face_count']} faces")
+            logger.debug("[PIPELINE] Detected %s faces", face_result['face_count'])
             
             if enabled_features.get('face_recognition', False):
-                print("[PIPELINE] Running face recognition...")
-                recognition_result = self.face_detector.recognize_faces(frame)
+                logger.debug("[PIPELINE] Running face recognition...")
+                recognition_result = self.face_detector.recognize_faces(frame, face_result)
                 result['faces_recognized'] = recognition_result['recognized']
                 result['unknown_faces'] = recognition_result['unknown_count']
                 result['registered_faces_count'] = recognition_result.get('registered_faces_count', 0)
                 result['face_bboxes'] = recognition_result.get('face_bboxes', [])  # Pass through bboxes
-                print(f"[PIPELINE] Recognition done: recognized={result['faces_recognized']}, unknown={result['unknown_faces']}")
+                logger.debug("[PIPELINE] Recognition done: recognized=%s, unknown=%s", result['faces_recognized'], result['unknown_faces'])
             else:
                 result['faces_recognized'] = []
                 result['unknown_faces'] = 0
@@ -226,5 +230,4 @@ class DetectionPipeline:
     @staticmethod
     def _get_timestamp():
         """Get current timestamp"""
-        from datetime import datetime
-        return datetime.now().isoformat()
+        return now_iso()
@@ -18,6 +18,8 @@ from typing import Callable, Any, Optional, TypeVar, Dict
 from functools import wraps
 from enum import Enum
 
+from services.snapshot_index import get_snapshot_index
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -208,6 +210,9 @@ class SnapshotCleanupService:
         Path("data/snapshots/faces"),
         Path("data/enrollment_photos/rejected")
     ]
+    # Written through ImageProcessor.save_snapshot, so tracked in the SQLite
+    # snapshot index and expired with a query instead of a directory walk
+    INDEXED_DIRS = {Path("data/snapshots/unknown")}
     
     def __init__(self):
         """Initialize snapshot cleanup service."""
@@ -255,6 +260,10 @@ class SnapshotCleanupService:
                 results['directories_processed'] += 1
                 logger.info(f"📁 Processing directory: {snapshot_dir}")
                 
+                if snapshot_dir in self.INDEXED_DIRS:
+                    self._expire_indexed(snapshot_dir, cutoff_timestamp, results)
+                    continue
+                
                 # Find all files in directory
                 for file_path in snapshot_dir.glob('**/*'):
                     if not file_path.is_file():
@@ -303,6 +312,36 @@ class SnapshotCleanupService:
         
         return results
     
+    def _expire_indexed(self, snapshot_dir: Path, cutoff_timestamp: float, results: Dict) -> None:
+        """Delete expired files listed in the snapshot index."""
+        index = get_snapshot_index()
+        if not index.is_backfilled(snapshot_dir):
+            # First run after upgrading: pick up snapshots saved before the index
+            indexed = index.backfill(snapshot_dir)
+            logger.info(f"📇 Indexed {indexed} existing snapshots in {snapshot_dir}")
+        
+        # A row is dropped only once its file is gone, so a failed unlink is
+        # retried on the next run instead of leaving an untracked orphan
+        removed = []
+        for path, size in index.expired(cutoff_timestamp):
+            file_size_mb = (size or 0) / (1024 * 1024)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                removed.append(path)
+                continue
+            except Exception as e:
+                error_msg = f"Failed to delete {path}: {e}"
+                results['errors'].append(error_msg)
+                logger.error(f"❌ {error_msg}")
+                continue
+            removed.append(path)
+            results['files_deleted'] += 1
+            results['disk_space_freed_mb'] += file_size_mb
+            results['deleted_files'].append(path)
+            logger.debug(f"🗑️ Deleted: {Path(path).name} ({file_size_mb:.2f} MB)")
+        index.remove(removed)
+    
     def get_snapshot_statistics(self) -> Dict:
         """
         Get statistics about snapshot storage.
@@ -6,6 +6,7 @@ import boto3
 import os
 import json
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple, List
 from pathlib import Path
@@ -17,6 +18,8 @@ from functools import lru_cache
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+from services.snapshot_index import dhash, get_snapshot_index
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -357,7 +360,8 @@ class ImageProcessor:
             person_id: Optional person identifier for known persons
         
         Returns:
-            Path to saved image or None on error
+            Path to saved image, or None on error / recent near-duplicate of
+            the same unknown person_id
         """
         try:
             # Create date-based subdirectory
@@ -375,12 +379,21 @@ class ImageProcessor:
                 known_dir.mkdir(exist_ok=True)
                 filepath = known_dir / f"{person_id}_{filename}"
             
+            # Skip near-identical recent re-captures of the same unknown track;
+            # known-person snapshots are access-log audit images, always kept
+            index = get_snapshot_index()
+            phash = dhash(image)
+            dedup_key = person_id if person_type == 'unknown' else None
+            if dedup_key is not None and index.find_recent_duplicate(dedup_key, phash):
+                logger.debug("ℹ️ Skipping near-duplicate snapshot")
+                return None
+            
             # Save with high quality
-            cv2.imwrite(
-                str(filepath),
-                image,
-                [cv2.IMWRITE_JPEG_QUALITY, 95]
-            )
+            ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+            if not ok:
+                return None
+            filepath.write_bytes(buffer)
+            index.add(str(filepath), phash, time.time(), buffer.nbytes, key=dedup_key)
             
             logger.info(f"💾 Snapshot saved: {filepath}")
             return str(filepath)
@@ -557,11 +570,11 @@ class IdentityService:
             person_id=f"track_{track_id}"
         )
         
+        # Start the cooldown even when the crop was skipped as a near-duplicate
+        if track_id in IDENTITY_CACHE:
+            IDENTITY_CACHE[track_id]['last_unknown_capture'] = datetime.now()
+        
         if snapshot_path:
-            # Update cache with capture timestamp
-            if track_id in IDENTITY_CACHE:
-                IDENTITY_CACHE[track_id]['last_unknown_capture'] = datetime.now()
-            
             logger.warning(f"⚠️ Unknown person detected - snapshot: {snapshot_path}")
             # TODO: Trigger alert notification system
     
@@ -0,0 +1,190 @@
+"""
+Image Codec Helpers
+Shared JPEG/base64 decode and encode paths for the API hot loops.
+
+Uses libjpeg-turbo (PyTurboJPEG) and SIMD base64 (pybase64) when they are
+installed, falling back to OpenCV and the stdlib otherwise. Both paths
+produce the same BGR ndarray / JPEG bytes layout, so callers don't care
+which one ran.
+"""
+
+import base64
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pybase64
+    _b64decode = pybase64.b64decode
+except ImportError:
+    _b64decode = base64.b64decode
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbojpeg = TurboJPEG()
+except Exception as e:  # ImportError, or OSError when libturbojpeg is missing
+    TJPF_BGR = None
+    _turbojpeg = None
+    logger.debug(f"TurboJPEG unavailable, using OpenCV codec: {e}")
+
+JPEG_MAGIC = b'\xff\xd8'
+
+# Decode-time downscale denominators libjpeg can apply in the IDCT itself
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Frames a FramePool keeps per shape; a few cover the frames in flight
+FRAME_POOL_DEPTH = 4
+
+# (torch, decode_jpeg) once probed, False when CUDA/nvJPEG isn't usable.
+# Probed lazily so importing this module never pulls in torch.
+_cuda_jpeg = None
+
+
+def b64decode(data) -> bytes:
+    """
+    Decode a base64 payload, stripping a data-URL prefix if present.
+
+    Raises binascii.Error for malformed input. The decoded bytes are viewed
+    (not copied) by np.frombuffer / TurboJPEG downstream.
+    """
+    if isinstance(data, str):
+        # Base64 never contains ',', so a comma near the start ends a
+        # "data:image/jpeg;base64," prefix
+        comma = data.find(',', 0, 64)
+        if comma != -1:
+            data = data[comma + 1:]
+    return _b64decode(data, validate=False)
+
+
+class FramePool:
+    """
+    Reusable BGR frame buffers, keyed by shape.
+
+    A 1080p frame is ~6 MB; allocating one per request at camera frame rates
+    churns the allocator and page-faults fresh memory every time. Callers
+    acquire() a buffer (or let decode_image do it), and release() it once
+    nothing references the frame any more - the pool can't know when that is,
+    so a frame that is still in use must never be released.
+    """
+
+    def __init__(self, depth: int = FRAME_POOL_DEPTH):
+        self.depth = depth
+        self._free: Dict[Tuple[int, ...], List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """A uint8 array of this shape with undefined contents."""
+        with self._lock:
+            free = self._free.get(shape)
+            if free:
+                return free.pop()
+        return np.empty(shape, np.uint8)
+
+    def release(self, frame: Optional[np.ndarray]) -> None:
+        """Return a frame for reuse (any C-contiguous uint8 array is accepted)."""
+        if frame is None or frame.dtype != np.uint8 or not frame.flags.c_contiguous \
+                or frame.base is not None:
+            return
+        with self._lock:
+            free = self._free.setdefault(frame.shape, [])
+            if len(free) < self.depth:
+                free.append(frame)
+
+
+def _scaled(size: int, reduce: int) -> int:
+    """libjpeg-turbo's TJSCALED(size, 1/reduce)"""
+    return (size + reduce - 1) // reduce
+
+
+def decode_image(buffer: bytes, reduce: int = 1,
+                 pool: Optional[FramePool] = None) -> Optional[np.ndarray]:
+    """
+    Decode encoded image bytes to a BGR ndarray.
+
+    JPEG goes through libjpeg-turbo when available; anything else (PNG,
+    WebP, ...) or a turbo failure falls back to cv2.imdecode. Returns None
+    for undecodable data, like cv2.imdecode.
+
+    reduce (1, 2, 4 or 8) decodes at 1/reduce of the width and height. For
+    JPEG the scaling happens inside the IDCT, so fewer pixels are produced
+    rather than decoded and then resized.
+
+    With a pool, TurboJPEG decodes straight into a pooled buffer of the
+    right size instead of a fresh allocation (OpenCV always allocates).
+    """
+    flags = _REDUCED_FLAGS.get(reduce)
+    if flags is None:
+        raise ValueError(f"reduce must be one of {sorted(_REDUCED_FLAGS)}, got {reduce}")
+    if _turbojpeg is not None and buffer[:2] == JPEG_MAGIC:
+        scaling_factor = None if reduce == 1 else (1, reduce)
+        try:
+            if pool is None:
+                return _turbojpeg.decode(buffer, pixel_format=TJPF_BGR,
+                                         scaling_factor=scaling_factor)
+            width, height = _turbojpeg.decode_header(buffer)[:2]
+            dst = pool.acquire((_scaled(height, reduce), _scaled(width, reduce), 3))
+            try:
+                return _turbojpeg.decode(buffer, pixel_format=TJPF_BGR,
+                                         scaling_factor=scaling_factor, dst=dst)
+            except Exception:
+                pool.release(dst)
+                raise
+        except Exception:
+            pass
+    return cv2.imdecode(np.frombuffer(buffer, np.uint8), flags)
+
+
+def decode_jpeg_cuda(buffer: bytes):
+    """
+    Decode JPEG bytes straight into GPU memory with nvJPEG.
+
+    Returns an RGB uint8 CHW torch tensor on the current CUDA device, or None
+    when CUDA/torchvision aren't available or the data isn't a JPEG, in which
+    case callers use decode_image() on the CPU.
+    """
+    global _cuda_jpeg
+    if _cuda_jpeg is None:
+        try:
+            import torch
+            from torchvision.io import ImageReadMode, decode_jpeg
+            _cuda_jpeg = (torch, decode_jpeg, ImageReadMode.RGB) if torch.cuda.is_available() else False
+        except ImportError:
+            _cuda_jpeg = False
+    if not _cuda_jpeg or buffer[:2] != JPEG_MAGIC:
+        return None
+    
+    torch, decode_jpeg, rgb = _cuda_jpeg
+    try:
+        data = torch.frombuffer(bytearray(buffer), dtype=torch.uint8)
+        # Force 3 channels: grayscale/CMYK JPEGs would otherwise come back 1/4-channel
+        return decode_jpeg(data, mode=rgb, device='cuda')
+    except Exception as e:
+        logger.debug(f"nvJPEG decode failed, using CPU codec: {e}")
+        return None
+
+
+def decode_base64_image(data, reduce: int = 1,
+                        pool: Optional[FramePool] = None) -> Optional[np.ndarray]:
+    """base64 string → BGR ndarray (None if the image can't be decoded)."""
+    return decode_image(b64decode(data), reduce, pool)
+
+
+def encode_jpeg(frame: np.ndarray, quality: int = 80) -> Optional[bytes]:
+    """Encode a BGR ndarray to JPEG bytes (None on failure)."""
+    if _turbojpeg is not None:
+        try:
+            return _turbojpeg.encode(frame, quality=quality, pixel_format=TJPF_BGR)
+        except Exception:
+            pass
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ret else None
@@ -3,7 +3,7 @@ Loitering Detection Service
 Detects people staying in one area for too long (single OR groups)
 """
 import numpy as np
-from models.tracker import ObjectTracker
+from models.tracker import ObjectTracker, pairwise_distances
 import time
 
 class LoiteringDetector:
@@ -148,8 +148,10 @@ class LoiteringDetector:
         if len(tracked_objects) < 2:
             return []
         
-        track_ids = list(tracked_objects.keys())
-        positions = list(tracked_objects.values())
+        # Straight from the tracker's arrays (same tracks as tracked_objects)
+        ids, positions = self.tracker.positions()
+        track_ids = ids.tolist()
+        distances = pairwise_distances(positions, positions)
         
         # Build adjacency: which tracks are close to each other
         groups = []
@@ -168,14 +170,7 @@ class LoiteringDetector:
                 if track_id2 in visited:
                     continue
                 
-                pos1 = positions[i]
-                pos2 = positions[j]
-                distance = np.sqrt(
-                    (pos1[0] - pos2[0])**2 + 
-                    (pos1[1] - pos2[1])**2
-                )
-                
-                if distance <= self.GROUP_DISTANCE:
+                if distances[i, j] <= self.GROUP_DISTANCE:
                     current_group.add(track_id2)
                     visited.add(track_id2)
             
@@ -0,0 +1,147 @@
+"""
+Redis Face-Session Store
+Shares face-session state between workers and across restarts.
+
+- Track IDs come from one Redis counter, reserved in blocks with INCRBY, so
+  every worker hands out unique IDs without a round-trip per new face.
+- Active sessions are written as hashes (face:sess:<track_id>) with a TTL
+  of FACE_SESSION_TIMEOUT. Redis expires them, and a restarted worker
+  reloads the ones still alive instead of starting every face at a new ID.
+
+Nearest-track matching stays in process (SessionCenters): it runs for
+every face on every frame, and a camera's frames always reach the same
+worker (see gunicorn.conf.py).
+
+Enabled when REDIS_URL is set and redis-py is installed; otherwise
+main_unified keeps sessions and the counter in memory only.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+KEY_PREFIX = "face:"
+COUNTER_KEY = KEY_PREFIX + "track_id_counter"
+SESSION_KEY = KEY_PREFIX + "sess:{}"
+ID_BLOCK_SIZE = 100
+
+# Session fields mirrored to Redis (the face embedding stays local)
+_FIELDS = ('track_id', 'name', 'is_known', 'confidence', 'first_seen',
+           'last_seen', 'bbox', 'employee_id')
+
+
+class RedisSessionStore:
+    """Track-ID allocator + TTL'd copy of active face sessions."""
+
+    def __init__(self, client, ttl: int):
+        """
+        Args:
+            client: redis.Redis connection
+            ttl: Seconds a session survives without being seen
+        """
+        self.client = client
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._block_end = 0  # exclusive
+
+    @classmethod
+    def from_env(cls, ttl: int) -> Optional["RedisSessionStore"]:
+        """Store for REDIS_URL, or None when unset, not installed or unreachable"""
+        url = os.getenv("REDIS_URL")
+        if not url:
+            return None
+        if redis is None:
+            logger.warning("⚠️ REDIS_URL set but redis-py is not installed - face sessions stay in memory")
+            return None
+        try:
+            client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+            client.ping()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Redis unavailable ({e}) - face sessions stay in memory")
+            return None
+        logger.info("✅ Face sessions shared via Redis")
+        return cls(client, ttl)
+
+    def ids_available(self) -> int:
+        """Track IDs reserved and not handed out yet"""
+        with self._lock:
+            return self._block_end - self._next_id
+
+    def reserve_ids(self, count: int = 1) -> None:
+        """
+        Make sure at least `count` IDs are reserved, with one INCRBY when short.
+        Blocking I/O - async callers run it in a thread.
+        """
+        if self.ids_available() >= count:
+            return
+        size = max(ID_BLOCK_SIZE, count)
+        try:
+            block_end = self.client.incrby(COUNTER_KEY, size) + 1
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Could not reserve track IDs from Redis: {e}")
+            return
+        with self._lock:
+            self._next_id, self._block_end = block_end - size, block_end
+
+    def next_track_id(self) -> Optional[int]:
+        """Unique track_id across workers from the reserved block, or None when it is used up"""
+        with self._lock:
+            if self._next_id >= self._block_end:
+                return None
+            track_id = self._next_id
+            self._next_id += 1
+            return track_id
+
+    @staticmethod
+    def _encode(session: Dict) -> Dict[str, str]:
+        return {
+            field: json.dumps(value.isoformat() if isinstance(value, datetime) else value)
+            for field, value in ((f, session.get(f)) for f in _FIELDS)
+        }
+
+    @staticmethod
+    def _decode(raw: Dict[bytes, bytes]) -> Dict:
+        session = {key.decode(): json.loads(value) for key, value in raw.items()}
+        for field in ('first_seen', 'last_seen'):
+            session[field] = datetime.fromisoformat(session[field])
+        session['embedding'] = None
+        return session
+
+    def publish(self, sessions: Iterable[Dict]) -> None:
+        """Write sessions and reset their TTL, one round-trip for the batch"""
+        pipe = self.client.pipeline(transaction=False)
+        for session in sessions:
+            key = SESSION_KEY.format(session['track_id'])
+            pipe.hset(key, mapping=self._encode(session))
+            pipe.expire(key, self.ttl)
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Redis session publish failed: {e}")
+
+    def load(self) -> Dict[int, Dict]:
+        """All sessions that haven't expired yet: {track_id: session}"""
+        sessions = {}
+        try:
+            keys = list(self.client.scan_iter(match=SESSION_KEY.format("*"), count=500))
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.hgetall(key)
+            for raw in pipe.execute():
+                if raw:
+                    session = self._decode(raw)
+                    sessions[session['track_id']] = session
+        except (redis.RedisError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Could not load face sessions from Redis: {e}")
+        return sessions
@@ -0,0 +1,164 @@
+"""
+Snapshot Index
+SQLite index of saved unknown-person snapshots.
+
+- Retention cleanup becomes one indexed range query instead of walking and
+  stat()ing every file under the snapshot tree.
+- A 64-bit difference hash (dHash) per snapshot lets save_snapshot() skip
+  writing near-identical crops of the same unknown track captured within the
+  last DUPLICATE_WINDOW seconds.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INDEX_PATH = Path("data/snapshots/snapshots.sqlite")
+DUPLICATE_MAX_DISTANCE = 4  # Hamming bits; ≤4/64 is the same shot re-captured
+DUPLICATE_WINDOW = 120.0  # seconds a capture counts as "recent" for its key
+RECENT_MAX_KEYS = 1024  # stale keys are pruned once this many are tracked
+
+
+def dhash(image: np.ndarray) -> int:
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 thumbnail."""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _to_signed(value: int) -> int:
+    """SQLite INTEGER is signed 64-bit."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class SnapshotIndex:
+    """Thread-safe SQLite index of snapshot files (path, phash, mtime, size)."""
+
+    def __init__(self, db_path: Path = SNAPSHOT_INDEX_PATH):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "path TEXT PRIMARY KEY, phash INTEGER, mtime REAL, size INTEGER)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_snapshots_mtime ON snapshots (mtime)"
+        )
+        # Flags such as which directories have had their one-time backfill
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._conn.commit()
+        self._recent: Dict[str, List[Tuple[float, int]]] = {}  # key: [(time, phash)]
+
+    def is_backfilled(self, directory: Path) -> bool:
+        """Whether backfill() has already indexed the files under `directory`."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = ?", (f"backfilled:{directory}",)
+            ).fetchone() is not None
+
+    def find_recent_duplicate(self, key: str, phash: int,
+                              window: float = DUPLICATE_WINDOW,
+                              max_distance: int = DUPLICATE_MAX_DISTANCE) -> bool:
+        """Whether `key` saved a snapshot within max_distance bits in the last `window` seconds."""
+        cutoff = time.time() - window
+        with self._lock:
+            recent = [entry for entry in self._recent.get(key, ()) if entry[0] >= cutoff]
+            if recent:
+                self._recent[key] = recent
+            else:
+                self._recent.pop(key, None)
+            return any(_hamming(value, phash) <= max_distance for _, value in recent)
+
+    def add(self, path: str, phash: Optional[int], mtime: float, size: int,
+            key: Optional[str] = None) -> None:
+        """Record a snapshot that has just been written (under `key` for de-duplication)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (path, phash, mtime, size) VALUES (?, ?, ?, ?)",
+                (path, None if phash is None else _to_signed(phash), mtime, size)
+            )
+            self._conn.commit()
+            if key is not None and phash is not None:
+                self._recent.setdefault(key, []).append((mtime, phash))
+                if len(self._recent) > RECENT_MAX_KEYS:
+                    self._prune_recent(mtime - DUPLICATE_WINDOW)
+
+    def _prune_recent(self, cutoff: float) -> None:
+        """Drop keys (e.g. finished tracks) with no capture since cutoff."""
+        self._recent = {
+            key: entries for key, entries in self._recent.items()
+            if entries[-1][0] >= cutoff
+        }
+
+    def backfill(self, directory: Path) -> int:
+        """Index every file already under `directory` (one-time walk for pre-index snapshots)."""
+        rows = []
+        for entry in directory.glob('**/*'):
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            rows.append((str(entry), None, st.st_mtime, st.st_size))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO snapshots (path, phash, mtime, size) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            # Same transaction as the rows, so a crash mid-walk just walks again
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (f"backfilled:{directory}", str(time.time()))
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def expired(self, cutoff_timestamp: float) -> List[Tuple[str, int]]:
+        """(path, size) of every indexed snapshot older than the cutoff."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, size FROM snapshots WHERE mtime < ?",
+                (cutoff_timestamp,)
+            ).fetchall()
+
+    def remove(self, paths: List[str]) -> None:
+        """Drop index rows, once their files are gone from disk."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM snapshots WHERE path = ?", [(path,) for path in paths]
+            )
+            self._conn.commit()
+
+
+_index: Optional[SnapshotIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_snapshot_index() -> SnapshotIndex:
+    """Process-wide SnapshotIndex, created on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SnapshotIndex()
+    return _index
+
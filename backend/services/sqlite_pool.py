@@ -0,0 +1,63 @@
+"""
+SQLite Connection Pool
+Long-lived WAL-mode connections: one writer behind a lock, N read-only readers.
+
+Opening a connection per query pays the file open, WAL header read and a cold
+page cache every time. WAL lets readers run alongside the single writer, so
+reads come from a small queue of read-only connections and writes share one.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # 64 MB
+)
+
+
+class SQLitePool:
+    """Multiple-reader / single-writer SQLite connection manager."""
+
+    def __init__(self, db_path: str, readers: int = 4):
+        """
+        Args:
+            db_path: Database file (created if missing)
+            readers: Number of pooled read-only connections
+        """
+        self.db_path = str(db_path)
+        self._write_lock = threading.Lock()
+        # Autocommit; callers group statements with BEGIN/COMMIT when needed
+        self._writer = self._connect(self.db_path, isolation_level=None)
+        self._readers = queue.Queue()
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        for _ in range(readers):
+            self._readers.put(self._connect(uri, uri=True))
+
+    @staticmethod
+    def _connect(target: str, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(target, check_same_thread=False, **kwargs)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Exclusive use of the write connection."""
+        with self._write_lock:
+            yield self._writer
+
+    @contextmanager
+    def read(self):
+        """Borrow a read-only connection (blocks if all are in use)."""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
@@ -18,9 +18,11 @@ import time
 import numpy as np
 from typing import Optional, Generator, Dict, List, Tuple
 from datetime import datetime
-from threading import Lock
+from threading import Condition, Lock, Thread, current_thread
 import asyncio
 
+from services.image_codec import encode_jpeg
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,6 +32,10 @@ class RTSPStreamManager:
     """
     Manages RTSP stream connections and frame capture.
     Handles reconnection, frame buffering, and error recovery.
+    
+    A single capture thread owns cap.read() and overwrites a one-slot
+    latest-frame buffer; stream clients wait on it with latest_frame(), so a
+    slow client skips stale frames instead of stalling the camera.
     """
     
     def __init__(
@@ -59,6 +65,9 @@ class RTSPStreamManager:
         self.connection_errors = 0
         self.last_frame = None
         self.frame_lock = Lock()
+        self.frame_seq = 0
+        self.frame_ready = Condition(self.frame_lock)
+        self._capture_thread = None
         
         logger.info(f"✅ RTSPStreamManager initialized for {rtsp_url}")
     
@@ -118,8 +127,10 @@ class RTSPStreamManager:
             
             self.frame_count += 1
             
-            with self.frame_lock:
+            with self.frame_ready:
                 self.last_frame = frame
+                self.frame_seq += 1
+                self.frame_ready.notify_all()
             
             return frame
         
@@ -128,6 +139,39 @@ class RTSPStreamManager:
             self._handle_connection_error()
             return self.last_frame
     
+    def start_capture(self) -> None:
+        """Start the background capture thread (no-op if already running)."""
+        if self._capture_thread is not None and self._capture_thread.is_alive():
+            return
+        if not self.is_connected and not self.connect():
+            return
+        self._capture_thread = Thread(
+            target=self._capture_loop, name="rtsp-capture", daemon=True
+        )
+        self._capture_thread.start()
+    
+    def _capture_loop(self) -> None:
+        """Read frames as fast as the camera delivers them until disconnected."""
+        while self.is_connected:
+            self.get_frame()
+        with self.frame_ready:
+            self.frame_ready.notify_all()
+    
+    def latest_frame(self, after_seq: int = 0, timeout: float = 1.0):
+        """
+        Wait for a frame newer than after_seq.
+        
+        Returns:
+            (seq, frame). seq == after_seq means no new frame arrived within
+            timeout (or the stream disconnected).
+        """
+        with self.frame_ready:
+            self.frame_ready.wait_for(
+                lambda: self.frame_seq != after_seq or not self.is_connected,
+                timeout
+            )
+            return self.frame_seq, self.last_frame
+    
     def _handle_connection_error(self) -> None:
         """Handle connection error and attempt reconnection."""
         self.connection_errors += 1
@@ -144,6 +188,16 @@ class RTSPStreamManager:
     
     def disconnect(self) -> None:
         """Disconnect from RTSP stream."""
+        self.is_connected = False
+        with self.frame_ready:
+            self.frame_ready.notify_all()
+        
+        # Let the capture thread finish its read before releasing the handle
+        thread = self._capture_thread
+        if thread is not None and thread is not current_thread():
+            thread.join(timeout=self.timeout_seconds)
+            self._capture_thread = None
+        
         if self.cap is not None:
             self.cap.release()
             self.cap = None
@@ -340,17 +394,47 @@ class MJPEGStreamEncoder:
     JPEG_QUALITY = 80
     BOUNDARY = b'frame'
     CONTENT_TYPE = b'image/jpeg'
+    # Static part of every multipart chunk header, built once
+    PART_HEADER = b'--' + BOUNDARY + b'\r\n' + b'Content-Type: ' + CONTENT_TYPE + b'\r\n'
+    PART_TRAILER = b'Content-Disposition: inline; filename=frame.jpg\r\n\r\n'
     
-    def __init__(self, frame_rate: int = 30):
+    def __init__(self, frame_rate: int = 30, use_gpu: bool = True):
         """
         Initialize MJPEG encoder.
         
         Args:
             frame_rate: Target frames per second
+            use_gpu: Encode JPEGs on the GPU (nvJPEG via torchvision) when CUDA is available
         """
         self.frame_rate = frame_rate
         self.frame_delay = 1.0 / frame_rate
-        logger.info(f"✅ MJPEGStreamEncoder initialized ({frame_rate} FPS)")
+        self._gpu_encode = self._init_gpu_encoder() if use_gpu else None
+        logger.info(
+            f"✅ MJPEGStreamEncoder initialized ({frame_rate} FPS, "
+            f"{'GPU' if self._gpu_encode else 'CPU'} JPEG)"
+        )
+    
+    @staticmethod
+    def _init_gpu_encoder():
+        """Return a GPU JPEG encode function, or None to use OpenCV on the CPU."""
+        try:
+            import torch
+            from torchvision.io import encode_jpeg
+        except ImportError:
+            return None
+        
+        if not torch.cuda.is_available():
+            return None
+        
+        device = torch.device('cuda')
+        
+        def encode(frame: np.ndarray, quality: int) -> bytes:
+            # Upload BGR HWC, convert to RGB CHW on the device, encode with nvJPEG
+            tensor = torch.from_numpy(frame).to(device, non_blocking=True)
+            tensor = tensor.flip(-1).permute(2, 0, 1).contiguous()
+            return encode_jpeg(tensor, quality=quality).cpu().numpy().tobytes()
+        
+        return encode
     
     def encode_frame_to_jpeg(self, frame: np.ndarray) -> bytes:
         """
@@ -362,21 +446,37 @@ class MJPEGStreamEncoder:
         Returns:
             JPEG bytes
         """
+        if self._gpu_encode is not None:
+            try:
+                return self._gpu_encode(frame, self.JPEG_QUALITY)
+            except Exception as e:
+                logger.warning(f"⚠️ GPU JPEG encode failed, falling back to CPU: {e}")
+                self._gpu_encode = None
+        
         try:
-            # Encode frame as JPEG
-            encode_param = [cv2.IMWRITE_JPEG_QUALITY, self.JPEG_QUALITY]
-            success, jpeg_data = cv2.imencode('.jpg', frame, encode_param)
+            # Encode frame as JPEG (libjpeg-turbo when available, else OpenCV)
+            jpeg_data = encode_jpeg(frame, self.JPEG_QUALITY)
             
-            if not success:
+            if not jpeg_data:
                 logger.error("❌ Failed to encode frame as JPEG")
                 return b''
             
-            return jpeg_data.tobytes()
+            return jpeg_data
         
         except Exception as e:
             logger.error(f"❌ Error encoding JPEG: {e}")
             return b''
     
+    def build_part(self, jpeg_bytes: bytes) -> bytes:
+        """Wrap JPEG bytes as one multipart/x-mixed-replace chunk."""
+        return b''.join((
+            self.PART_HEADER,
+            b'Content-Length: %d\r\n' % len(jpeg_bytes),
+            self.PART_TRAILER,
+            jpeg_bytes,
+            b'\r\n'
+        ))
+    
     def generate_mjpeg_stream(
         self,
         frame_generator: callable,
@@ -413,15 +513,7 @@ class MJPEGStreamEncoder:
                     continue
                 
                 # Yield MJPEG boundary + frame
-                yield (
-                    b'--' + self.BOUNDARY + b'\r\n' +
-                    b'Content-Type: ' + self.CONTENT_TYPE + b'\r\n' +
-                    b'Content-Length: ' + str(len(jpeg_bytes)).encode() + b'\r\n' +
-                    b'Content-Disposition: inline; filename=frame.jpg\r\n' +
-                    b'\r\n' +
-                    jpeg_bytes +
-                    b'\r\n'
-                )
+                yield self.build_part(jpeg_bytes)
                 
                 frame_count += 1
                 
@@ -468,6 +560,12 @@ class VideoStreamingService:
         self.overlay = BoundingBoxOverlay()
         self.encoder = MJPEGStreamEncoder(frame_rate=30)
         
+        # Latest rendered chunk per overlay mode: {overlay: (frame_seq, chunk)}.
+        # Clients on the same mode share one detection + encode per camera
+        # frame and all yield the same immutable bytes object.
+        self._parts = {}
+        self._render_locks = {True: Lock(), False: Lock()}
+        
         logger.info(f"✅ VideoStreamingService initialized for {camera_id}")
     
     def start_stream(self) -> bool:
@@ -478,46 +576,78 @@ class VideoStreamingService:
         """Stop RTSP stream connection."""
         self.stream_manager.disconnect()
     
-    def generate_video_stream(self) -> Generator[bytes, None, None]:
+    def generate_video_stream(self, overlay: bool = True) -> Generator[bytes, None, None]:
         """
         Generate MJPEG stream for FastAPI response.
         
+        Args:
+            overlay: Run detection and draw boxes/info panel. When False the
+                camera frames are encoded as-is, skipping inference and drawing.
+        
         Yields:
             MJPEG chunk bytes
         """
-        def frame_generator():
-            """Inner generator for frame + detections."""
-            frame = self.stream_manager.get_frame()
+        self.stream_manager.start_capture()
+        last_seq = 0
+        
+        while True:
+            seq, frame = self.stream_manager.latest_frame(last_seq)
             
-            if frame is None:
-                return None, []
+            if frame is None or seq == last_seq:
+                logger.warning("⚠️ No frame available, waiting...")
+                time.sleep(self.encoder.frame_delay)
+                continue
             
-            # Run detection model if available
-            detections = []
-            if self.detection_model:
-                try:
-                    detections = self.detection_model.predict(frame)
-                except Exception as e:
-                    logger.debug(f"⚠️ Detection error: {e}")
+            try:
+                last_seq, part = self._render_part(seq, frame, overlay)
+            except Exception as e:
+                logger.error(f"❌ Error in MJPEG stream: {e}")
+                time.sleep(1)
+                continue
             
-            # Draw overlays
-            frame = self.overlay.draw_boxes(frame, detections)
+            if part:
+                yield part
+    
+    def _render_part(self, seq: int, frame: np.ndarray, overlay: bool):
+        """
+        Return (seq, chunk) for the newest frame at or after seq, rendering it
+        only if no other client has already done so.
+        """
+        with self._render_locks[overlay]:
+            cached = self._parts.get(overlay)
+            if cached is not None and cached[0] >= seq:
+                return cached
             
-            # Draw info panel
-            frame = self.overlay.draw_info_panel(
-                frame,
-                {
-                    'timestamp': datetime.now().strftime("%H:%M:%S"),
-                    'fps': self.stream_manager.cap.get(cv2.CAP_PROP_FPS) if self.stream_manager.cap else 0,
-                    'detections': len(detections),
-                    'camera_id': self.camera_id
-                }
-            )
+            if overlay:
+                frame = self._draw_overlay(frame)
+            jpeg_bytes = self.encoder.encode_frame_to_jpeg(frame)
+            part = self.encoder.build_part(jpeg_bytes) if jpeg_bytes else b''
             
-            return frame, detections
-        
-        # Generate MJPEG stream
-        yield from self.encoder.generate_mjpeg_stream(frame_generator)
+            self._parts[overlay] = (seq, part)
+            return seq, part
+    
+    def _draw_overlay(self, frame: np.ndarray) -> np.ndarray:
+        """Run detection (if a model is set) and draw boxes + info panel."""
+        detections = []
+        if self.detection_model:
+            try:
+                detections = self.detection_model.predict(frame)
+            except Exception as e:
+                logger.debug(f"⚠️ Detection error: {e}")
+        
+        # Draw overlays
+        frame = self.overlay.draw_boxes(frame, detections)
+        
+        # Draw info panel
+        return self.overlay.draw_info_panel(
+            frame,
+            {
+                'timestamp': datetime.now().strftime("%H:%M:%S"),
+                'fps': self.stream_manager.cap.get(cv2.CAP_PROP_FPS) if self.stream_manager.cap else 0,
+                'detections': len(detections),
+                'camera_id': self.camera_id
+            }
+        )
 
 
 def get_video_streaming_service(
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Snapshot index expiry tests
+
+Usage:
+    python -m pytest test_snapshot_index.py
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from services import identity_aws_retry
+from services.identity_aws_retry import SnapshotCleanupService
+from services.snapshot_index import SnapshotIndex
+
+DAY = 24 * 3600
+
+
+class SnapshotIndexExpiryTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.snapshot_dir = root / 'unknown'
+        (self.snapshot_dir / '2024-01-01').mkdir(parents=True)
+        self.index = SnapshotIndex(db_path=root / 'snapshots.sqlite')
+        patcher = mock.patch.object(identity_aws_retry, 'get_snapshot_index', return_value=self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = SnapshotCleanupService()
+        self.cutoff = time.time() - 90 * DAY
+
+    def tearDown(self):
+        self.index._conn.close()
+        self._tmp.cleanup()
+
+    def _write(self, name, age_days):
+        path = self.snapshot_dir / '2024-01-01' / name
+        path.write_bytes(b'\xff\xd8snapshot')
+        mtime = time.time() - age_days * DAY
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def _expire(self):
+        results = {'files_deleted': 0, 'disk_space_freed_mb': 0.0, 'errors': [], 'deleted_files': []}
+        self.service._expire_indexed(self.snapshot_dir, self.cutoff, results)
+        return results
+
+    def test_pre_index_files_expire_once_index_has_rows(self):
+        old_jpg = self._write('old.jpg', 120)
+        old_png = self._write('old.png', 120)
+        young = self._write('young.jpg', 5)
+        # Saved after the upgrade, so the index is no longer empty
+        fresh = self._write('fresh.jpg', 0)
+        self.index.add(str(fresh), 1, fresh.stat().st_mtime, 10)
+
+        results = self._expire()
+
+        self.assertEqual(results['files_deleted'], 2)
+        self.assertFalse(old_jpg.exists())
+        self.assertFalse(old_png.exists())
+        self.assertTrue(young.exists())
+        self.assertTrue(fresh.exists())
+        self.assertEqual(self.index.expired(self.cutoff), [])
+
+    def test_backfill_runs_once(self):
+        self._expire()
+        self.assertTrue(self.index.is_backfilled(self.snapshot_dir))
+        with mock.patch.object(self.index, 'backfill') as backfill:
+            self._expire()
+        backfill.assert_not_called()
+
+    def test_failed_unlink_keeps_row_for_retry(self):
+        old = self._write('old.jpg', 120)
+
+        with mock.patch.object(identity_aws_retry.os, 'unlink', side_effect=PermissionError('busy')):
+            results = self._expire()
+        self.assertEqual(results['files_deleted'], 0)
+        self.assertEqual(len(results['errors']), 1)
+        self.assertEqual([path for path, _ in self.index.expired(self.cutoff)], [str(old)])
+
+        results = self._expire()
+        self.assertEqual(results['files_deleted'], 1)
+        self.assertFalse(old.exists())
+        self.assertEqual(self.index.expired(self.cutoff), [])
+
+    def test_already_missing_file_drops_row(self):
+        old = self._write('old.jpg', 120)
+        self.index.backfill(self.snapshot_dir)
+        old.unlink()
+
+        results = self._expire()
+        self.assertEqual(results['files_deleted'], 0)
+        self.assertEqual(self.index.expired(self.cutoff), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
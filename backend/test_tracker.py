@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+ObjectTracker equivalence tests
+
+Replays random detection streams through ObjectTracker and a plain
+dict-based centroid tracker and checks they assign the same IDs.
+
+Usage:
+    python -m pytest test_tracker.py
+"""
+
+import unittest
+
+import numpy as np
+
+from models import tracker
+from models.tracker import ObjectTracker
+
+
+class ReferenceTracker:
+    """The dict-based centroid tracker ObjectTracker replaced"""
+
+    def __init__(self, max_disappeared=30):
+        self.next_object_id = 0
+        self.objects = {}
+        self.disappeared = {}
+        self.max_disappeared = max_disappeared
+
+    def register(self, centroid):
+        self.objects[self.next_object_id] = centroid
+        self.disappeared[self.next_object_id] = 0
+        self.next_object_id += 1
+
+    def deregister(self, object_id):
+        del self.objects[object_id]
+        del self.disappeared[object_id]
+
+    def _age(self, object_id):
+        self.disappeared[object_id] += 1
+        if self.disappeared[object_id] > self.max_disappeared:
+            self.deregister(object_id)
+
+    def update(self, detections):
+        if len(detections) == 0:
+            for object_id in list(self.disappeared):
+                self._age(object_id)
+            return self.objects
+
+        if not self.objects:
+            for centroid in detections:
+                self.register(centroid)
+            return self.objects
+
+        object_ids = list(self.objects)
+        used_rows, used_cols = set(), set()
+        nearest = []
+        for row, object_id in enumerate(object_ids):
+            ox, oy = self.objects[object_id]
+            dists = [np.hypot(ox - x, oy - y) for x, y in detections]
+            col = int(np.argmin(dists))
+            nearest.append((dists[col], row, col))
+
+        for dist, row, col in sorted(nearest):
+            if col in used_cols or dist > ObjectTracker.MATCH_DISTANCE:
+                continue
+            self.objects[object_ids[row]] = detections[col]
+            self.disappeared[object_ids[row]] = 0
+            used_rows.add(row)
+            used_cols.add(col)
+
+        for row, object_id in enumerate(object_ids):
+            if row not in used_rows:
+                self._age(object_id)
+
+        for col, centroid in enumerate(detections):
+            if col not in used_cols:
+                self.register(centroid)
+        return self.objects
+
+
+def _stream(rng, frames=300, people=12):
+    """Random walkers that drift, occasionally vanish, and enter/leave"""
+    positions = rng.uniform(0, 640, size=(people, 2))
+    visible = np.ones(people, dtype=bool)
+    for _ in range(frames):
+        positions += rng.normal(0, 6, size=positions.shape)
+        visible ^= rng.random(people) < 0.05
+        yield [tuple(p) for p in positions[visible].tolist()]
+
+
+class ObjectTrackerEquivalenceTest(unittest.TestCase):
+
+    def _assert_same(self, seed, max_disappeared):
+        rng = np.random.default_rng(seed)
+        fast = ObjectTracker(max_disappeared=max_disappeared)
+        reference = ReferenceTracker(max_disappeared=max_disappeared)
+        for frame, detections in enumerate(_stream(rng)):
+            got = fast.update(detections)
+            expected = reference.update(detections)
+            self.assertEqual(set(got), set(expected), f'seed {seed}, frame {frame}')
+            for object_id, centroid in expected.items():
+                np.testing.assert_allclose(got[object_id], centroid)
+            self.assertEqual(fast.size, len(expected))
+
+    @unittest.skipIf(tracker.linear_sum_assignment is not None,
+                     'greedy matching is only used without scipy')
+    def test_matches_reference_tracker(self):
+        for seed in range(5):
+            for max_disappeared in (0, 3, 30):
+                self._assert_same(seed, max_disappeared)
+
+    def test_grows_past_initial_capacity(self):
+        fast = ObjectTracker()
+        count = ObjectTracker.INITIAL_CAPACITY * 2 + 5
+        detections = [(float(i) * 200, 0.0) for i in range(count)]
+        fast.update(detections)
+        fast.update(detections[::-1])
+        self.assertEqual(fast.size, count)
+        self.assertEqual(sorted(fast.objects), list(range(count)))
+        self.assertEqual(fast.objects[7], (1400.0, 0.0))
+
+    def test_deregister_keeps_slots_consistent(self):
+        fast = ObjectTracker(max_disappeared=0)
+        fast.update([(0.0, 0.0), (300.0, 0.0), (600.0, 0.0)])
+        fast.update([(600.0, 5.0)])
+        self.assertEqual(fast.objects, {2: (600.0, 5.0)})
+        self.assertEqual(fast.id_to_idx, {2: 0})
+
+
+class KernelTest(unittest.TestCase):
+    """Compiled kernels agree with their NumPy fallbacks"""
+
+    def test_pairwise_distances(self):
+        rng = np.random.default_rng(0)
+        a = rng.uniform(0, 640, size=(9, 2))
+        b = rng.uniform(0, 640, size=(13, 2))
+        np.testing.assert_allclose(tracker.pairwise_distances(a, b),
+                                   tracker._pairwise_distances_numpy(a, b))
+
+    def test_greedy_match(self):
+        rng = np.random.default_rng(1)
+        for shape in ((1, 1), (5, 3), (3, 5), (20, 20)):
+            distances = rng.uniform(0, 100, size=shape)
+            rows, cols = tracker.greedy_match(distances, 50.0)
+            ref_rows, ref_cols = tracker._greedy_match_numpy(distances, 50.0)
+            np.testing.assert_array_equal(rows, ref_rows)
+            np.testing.assert_array_equal(cols, ref_cols)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,7 +18,6 @@ JSON Response to Frontend
 """
 
 import cv2
-import base64
 import boto3
 import numpy as np
 import logging
@@ -31,9 +30,13 @@ import os
 from dotenv import load_dotenv
 
 # Local ML libraries
+import torch
+import torch.nn.functional as F
 from ultralytics import YOLO
 import easyocr
 
+from services.image_codec import b64decode, decode_image, decode_jpeg_cuda
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -233,6 +236,10 @@ class PlateOCR:
 class YOLODetector:
     """YOLOv8 nano model for fast detection and tracking."""
     
+    INPUT_SIZE = 640
+    STRIDE = 32
+    PAD_VALUE = 114 / 255  # Ultralytics letterbox grey
+    
     def __init__(self, model_name: str = 'yolov8n.pt'):
         """
         Initialize YOLO detector.
@@ -244,6 +251,12 @@ class YOLODetector:
         self.model = YOLO(model_name)
         logger.info("✅ YOLO model loaded")
         
+        # model.track(persist=True) keeps one ByteTrack, which must always see
+        # boxes in the same coordinate space. With CUDA every frame goes
+        # through the device letterbox (nvJPEG-decoded or not); without it,
+        # every frame goes through Ultralytics' own preprocessing.
+        self.device_letterbox = torch.cuda.is_available()
+        
         # Class names we care about
         self.person_class = 0
         self.vehicle_classes = {
@@ -270,47 +283,96 @@ class YOLODetector:
                 'type': str
             }
         """
+        if self.device_letterbox:
+            # CPU-decoded frame (e.g. not a JPEG) on a CUDA host: same path as nvJPEG frames
+            rgb = np.ascontiguousarray(frame[..., ::-1].transpose(2, 0, 1))
+            return self.detect_and_track_gpu(torch.from_numpy(rgb).cuda())
+        
         try:
             # Run YOLO with tracking
             results = self.model.track(frame, persist=True, verbose=False)
+            return self._parse_results(results)
+        
+        except Exception as e:
+            logger.error(f"❌ YOLO detection error: {e}")
+            return [], []
+    
+    def detect_and_track_gpu(self, image: torch.Tensor) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Run YOLO detection and tracking on a GPU-decoded frame.
+        
+        Letterboxes on the device (resize longest side to INPUT_SIZE, pad to
+        the model stride) so the pixels never round-trip through host memory.
+        
+        Args:
+            image: RGB uint8 CHW CUDA tensor (from decode_jpeg_cuda)
+        
+        Returns:
+            Same as detect_and_track, with boxes in original image coordinates
+        """
+        try:
+            _, height, width = image.shape
+            scale = self.INPUT_SIZE / max(height, width)
+            new_h, new_w = round(height * scale), round(width * scale)
             
-            people = []
-            vehicles = []
-            
-            for result in results:
-                for box in result.boxes:
-                    class_id = int(box.cls[0])
-                    confidence = float(box.conf[0])
-                    
-                    # Get bounding box
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
-                    
-                    # Get track ID
-                    track_id = int(box.id[0]) if box.id is not None else -1
-                    
-                    detection = {
-                        'track_id': track_id,
-                        'bbox': [x1, y1, x2, y2],
-                        'centroid': [cx, cy],
-                        'confidence': confidence,
-                        'width': x2 - x1,
-                        'height': y2 - y1
-                    }
-                    
-                    # Classify as person or vehicle
-                    if class_id == self.person_class:
-                        detection['type'] = 'person'
-                        people.append(detection)
-                    elif class_id in self.vehicle_classes:
-                        detection['type'] = self.vehicle_classes[class_id]
-                        vehicles.append(detection)
+            batch = F.interpolate(
+                image[None].float().div_(255), size=(new_h, new_w),
+                mode='bilinear', align_corners=False
+            )
+            batch = F.pad(
+                batch, (0, -new_w % self.STRIDE, 0, -new_h % self.STRIDE),
+                value=self.PAD_VALUE
+            )
             
-            return people, vehicles
+            results = self.model.track(batch, persist=True, verbose=False)
+            return self._parse_results(results, 1 / scale, width, height)
         
         except Exception as e:
             logger.error(f"❌ YOLO detection error: {e}")
             return [], []
+    
+    def _parse_results(self, results, scale: float = 1.0,
+                       width: Optional[int] = None,
+                       height: Optional[int] = None) -> Tuple[List[Dict], List[Dict]]:
+        """Split YOLO results into people/vehicle dicts, rescaling boxes if needed."""
+        people = []
+        vehicles = []
+        
+        for result in results:
+            for box in result.boxes:
+                class_id = int(box.cls[0])
+                confidence = float(box.conf[0])
+                
+                # Get bounding box
+                if scale == 1.0:
+                    x1, y1, x2, y2 = map(int, box.xyxy[0])
+                else:
+                    x1, y1, x2, y2 = (int(v * scale) for v in box.xyxy[0].tolist())
+                    x1, x2 = max(0, x1), min(width, x2)
+                    y1, y2 = max(0, y1), min(height, y2)
+                cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+                
+                # Get track ID
+                track_id = int(box.id[0]) if box.id is not None else -1
+                
+                detection = {
+                    'track_id': track_id,
+                    'bbox': [x1, y1, x2, y2],
+                    'centroid': [cx, cy],
+                    'confidence': confidence,
+                    'width': x2 - x1,
+                    'height': y2 - y1
+                }
+                
+                # Classify as person or vehicle
+                if class_id == self.person_class:
+                    detection['type'] = 'person'
+                    people.append(detection)
+                elif class_id in self.vehicle_classes:
+                    detection['type'] = self.vehicle_classes[class_id]
+                    vehicles.append(detection)
+        
+        return people, vehicles
 
 
 # ============================================================================
@@ -473,18 +535,24 @@ class UnifiedInferenceEngine:
         self.frame_count += 1
         
         try:
-            # Decode frame
-            frame_data = base64.b64decode(frame_base64)
-            nparr = np.frombuffer(frame_data, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if frame is None:
-                raise ValueError("Failed to decode frame")
+            # Decode frame: on the GPU via nvJPEG when CUDA is available
+            image_bytes = b64decode(frame_base64)
+            gpu_image = decode_jpeg_cuda(image_bytes)
             
             logger.info(f"📹 Processing frame #{self.frame_count}")
             
             # YOLO Detection & Tracking
-            people, vehicles = self.yolo.detect_and_track(frame)
+            if gpu_image is not None:
+                people, vehicles = self.yolo.detect_and_track_gpu(gpu_image)
+                # Face/plate crops need host pixels; copy back only if there are any
+                frame = None
+                if people or vehicles:
+                    frame = gpu_image.permute(1, 2, 0).flip(-1).contiguous().cpu().numpy()
+            else:
+                frame = decode_image(image_bytes)
+                if frame is None:
+                    raise ValueError("Failed to decode frame")
+                people, vehicles = self.yolo.detect_and_track(frame)
             
             # Process people (Module 1 & 3: Identity & Attendance)
             recognized_faces = []
@@ -594,7 +662,7 @@ class UnifiedInferenceEngine:
             Success boolean
         """
         try:
-            frame_data = base64.b64decode(image_base64)
+            frame_data = b64decode(image_base64)
             return self.aws_face.enroll_employee(frame_data, employee_id, employee_name)
         except Exception as e:
             logger.error(f"❌ Enrollment error: {e}")
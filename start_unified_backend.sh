@@ -6,4 +6,8 @@ echo "================================================"
 echo ""
 
 cd backend
-python main_unified.py
+if command -v gunicorn >/dev/null 2>&1; then
+    exec gunicorn -c gunicorn.conf.py main_unified:app
+else
+    python main_unified.py
+fi